@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+TRITON Acquisition - Deadline-scheduled sensor sampling on the Pi
+
+test.py's main loop used to read the sensors, print, log, send over LoRa
+(listening up to 0.6 s afterwards) and then sleep 50 ms, so the sample
+period was "50 ms plus whatever else happened": anything from 50 to over
+700 ms. Here sampling runs on its own thread:
+
+- every SensorTask has its own rate; its deadlines are absolute
+  (start + n x period on time.perf_counter), so a late sample doesn't push
+  the following ones back and the rate doesn't drift
+- one thread runs all tasks, earliest deadline first, so sensors on the
+  same I2C bus never overlap; between deadlines it sleeps
+- a task that falls more than a period behind skips the missed deadlines
+  (counted as an overrun) instead of sampling back to back to catch up
+- each reading becomes a Sample with its scheduled and actual time and
+  goes into a bounded deque: append() and popleft() are atomic, so the
+  sampler and the consumer (logging, LoRa) never wait for each other. If
+  the consumer falls behind by more than `queue_size` samples, the oldest
+  are dropped and counted
+- stats() gives per task the achieved rate, lateness (actual - scheduled:
+  mean, p95, max), interval jitter, read durations, overruns and drops
+
+Usage (benchmark):
+    # Sample period of the old sleep loop vs. the scheduler with a slow consumer
+    python3 acquisition.py [--seconds 5] [--rate 20]
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+QUEUE_SIZE = 1000           # Samples waiting for the consumer
+STATS_WINDOW = 500          # Recent samples per task behind the lateness/jitter figures
+
+
+class SensorTask:
+    """One sensor read at a fixed rate; `read()` returns its values (an exception marks a failed read)."""
+
+    def __init__(self, name, rate_hz, read):
+        self.name = name
+        self.rate_hz = float(rate_hz)
+        self.period = 1.0 / self.rate_hz
+        self.read = read
+
+        self.next_deadline = None
+        self.seq = 0
+        self.samples = 0
+        self.errors = 0
+        self.overruns = 0
+        self.missed = 0
+        self.first_actual = None
+        self.last_actual = None
+        self._lateness = deque(maxlen=STATS_WINDOW)
+        self._durations = deque(maxlen=STATS_WINDOW)
+
+
+class Sample:
+    """One reading of one task."""
+
+    __slots__ = ("task", "seq", "scheduled", "actual", "duration", "values")
+
+    def __init__(self, task, seq, scheduled, actual, duration, values):
+        self.task = task            # SensorTask name
+        self.seq = seq              # Deadline number (gaps: skipped deadlines)
+        self.scheduled = scheduled  # perf_counter deadline
+        self.actual = actual        # perf_counter when the read started
+        self.duration = duration    # Seconds the read took
+        self.values = values        # read()'s result, None if it raised
+
+    def __repr__(self):
+        return (f"Sample({self.task!r}, seq={self.seq}, late={(self.actual - self.scheduled) * 1e3:.2f} ms, "
+                f"values={self.values!r})")
+
+
+class AcquisitionScheduler:
+    """Runs SensorTasks at their rates on one thread (see module docstring)."""
+
+    def __init__(self, tasks, queue_size=QUEUE_SIZE, clock=time.perf_counter):
+        self.tasks = list(tasks)
+        self.clock = clock
+        self.queue = deque(maxlen=queue_size)
+        self.dropped = 0
+        self.started = None
+        self._stats_lock = threading.Lock()     # Guards the stats windows, not the queue
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ==================== Lifecycle ====================
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or not self.tasks:
+            return
+        self._stop.clear()
+        self.started = self.clock()
+        for task in self.tasks:
+            task.next_deadline = self.started
+        self._thread = threading.Thread(target=self._run, name="acquisition", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self):
+        """All queued samples, oldest first (consumer side)."""
+        samples = []
+        queue = self.queue
+        while queue:
+            samples.append(queue.popleft())
+        return samples
+
+    # ==================== Sampling ====================
+
+    def _run(self):
+        while not self._stop.is_set():
+            task = min(self.tasks, key=lambda t: t.next_deadline)
+            scheduled = task.next_deadline
+            wait = scheduled - self.clock()
+            if wait > 0 and self._stop.wait(wait):
+                return
+            self._sample(task, scheduled)
+
+    def _sample(self, task, scheduled):
+        actual = self.clock()
+        try:
+            values = task.read()
+        except Exception:
+            values = None
+        finished = self.clock()
+
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(Sample(task.name, task.seq, scheduled, actual, finished - actual, values))
+
+        with self._stats_lock:
+            task.samples += 1
+            task.errors += values is None
+            if task.first_actual is None:
+                task.first_actual = actual
+            task.last_actual = actual
+            task._lateness.append(actual - scheduled)
+            task._durations.append(finished - actual)
+
+            # Next absolute deadline; skip the ones already missed
+            task.seq += 1
+            task.next_deadline = scheduled + task.period
+            behind = finished - task.next_deadline
+            if behind >= task.period:
+                skipped = int(behind // task.period)
+                task.overruns += 1
+                task.missed += skipped
+                task.seq += skipped
+                task.next_deadline += skipped * task.period
+
+    # ==================== Statistics ====================
+
+    def stats(self):
+        out = {"queue_depth": len(self.queue), "queue_dropped": self.dropped, "tasks": {}}
+        with self._stats_lock:
+            for task in self.tasks:
+                lateness = sorted(task._lateness)
+                durations = list(task._durations)
+                span = (task.last_actual - task.first_actual) if task.samples > 1 else 0.0
+                out["tasks"][task.name] = {
+                    "rate_hz": task.rate_hz,
+                    "actual_rate_hz": round((task.samples - 1) / span, 2) if span else None,
+                    "samples": task.samples,
+                    "errors": task.errors,
+                    "overruns": task.overruns,
+                    "missed": task.missed,
+                    "lateness_ms": _summary(lateness),
+                    "interval_jitter_ms": round(_stdev(list(task._lateness)) * 1e3, 3),
+                    "read_ms": {"mean": round(sum(durations) / len(durations) * 1e3, 3) if durations else None,
+                                "max": round(max(durations) * 1e3, 3) if durations else None},
+                }
+        return out
+
+    def status_line(self):
+        """One console line with the figures worth watching."""
+        stats = self.stats()
+        parts = []
+        for name, task in stats["tasks"].items():
+            late = task["lateness_ms"]
+            parts.append(f"{name} {task['actual_rate_hz'] or 0:.1f}/{task['rate_hz']:g} Hz "
+                         f"late p95 {late['p95'] or 0:.1f} ms max {late['max'] or 0:.1f} ms "
+                         f"overruns {task['overruns']}")
+        return " | ".join(parts) + f" | queue {stats['queue_depth']} (dropped {stats['queue_dropped']})"
+
+
+class LoopTimer:
+    """
+    Busy time of the consumer's passes (the work between its waits), with
+    the same mean/p95/max as the tasks' lateness: when printing or disk
+    writes creep into the loop, this is where it shows.
+    """
+
+    def __init__(self, window=STATS_WINDOW, clock=time.perf_counter):
+        self.clock = clock
+        self.passes = 0
+        self._started = None
+        self._durations = deque(maxlen=window)
+
+    def start(self):
+        self._started = self.clock()
+
+    def stop(self):
+        if self._started is not None:
+            self._durations.append(self.clock() - self._started)
+            self.passes += 1
+            self._started = None
+
+    def stats(self):
+        return {"passes": self.passes, "busy_ms": _summary(sorted(self._durations))}
+
+    def status_line(self):
+        busy = self.stats()["busy_ms"]
+        return f"loop busy p95 {busy['p95'] or 0:.2f} ms max {busy['max'] or 0:.2f} ms"
+
+
+def _summary(ordered):
+    """mean/p95/max in ms of sorted seconds."""
+    if not ordered:
+        return {"mean": None, "p95": None, "max": None}
+    return {"mean": round(sum(ordered) / len(ordered) * 1e3, 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1e3, 3),
+            "max": round(ordered[-1] * 1e3, 3)}
+
+
+def _stdev(values):
+    """Standard deviation of the sample-to-sample change (how much the period varies)."""
+    steps = [b - a for a, b in zip(values, values[1:])]
+    if len(steps) < 2:
+        return 0.0
+    mean = sum(steps) / len(steps)
+    return math.sqrt(sum((s - mean) ** 2 for s in steps) / (len(steps) - 1))
+
+
+# ==================== Benchmark ====================
+
+def benchmark(seconds=5.0, rate=20.0):
+    import random
+
+    rng = random.Random(0)
+
+    def read():
+        time.sleep(0.002)                    # I2C transfer
+        return [rng.random()]
+
+    def consume():
+        # Print + log, and every 4th sample a LoRa send with its listen window
+        time.sleep(0.001)
+        if rng.random() < 0.25:
+            time.sleep(0.1 + rng.uniform(0.0, 0.5))
+
+    # The old loop: read, consume, sleep 50 ms
+    stamps = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        stamps.append(time.perf_counter())
+        read()
+        consume()
+        time.sleep(0.05)
+    periods = sorted(b - a for a, b in zip(stamps, stamps[1:]))
+
+    # The scheduler, with the same consumer on the main thread
+    task = SensorTask("sensor", rate, read)
+    scheduler = AcquisitionScheduler([task])
+    scheduler.start()
+    end = time.perf_counter() + seconds
+    consumed = 0
+    while time.perf_counter() < end:
+        consumed += len(scheduler.drain())
+        consume()
+        time.sleep(0.005)
+    scheduler.stop()
+    consumed += len(scheduler.drain())
+    stats = scheduler.stats()["tasks"]["sensor"]
+
+    def ms(value):
+        return f"{value * 1e3:7.1f}"
+
+    print(f"[BENCH] {seconds:g} s each, 2 ms sensor reads, a 0.1-0.6 s radio wait after every 4th sample")
+    print(f"[BENCH] sleep loop : {len(stamps):5d} samples ({len(stamps) / seconds:5.1f}/s)  period mean "
+          f"{ms(sum(periods) / len(periods))} ms  p95 {ms(periods[int(0.95 * len(periods))])} ms  "
+          f"max {ms(periods[-1])} ms")
+    late = stats["lateness_ms"]
+    print(f"[BENCH] scheduler  : {stats['samples']:5d} samples ({stats['actual_rate_hz']:5.1f}/s, target {rate:g})  "
+          f"lateness mean {late['mean']:.3f} ms  p95 {late['p95']:.3f} ms  max {late['max']:.3f} ms  "
+          f"jitter {stats['interval_jitter_ms']:.3f} ms  overruns {stats['overruns']}  consumed {consumed}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Acquisition scheduler benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=20.0)
+    args = parser.parse_args()
+
+    benchmark(args.seconds, args.rate)
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+TRITON Airtime - TDMA slot scheduling for the half-duplex LoRa link
+
+The radios can't receive while transmitting. Airtime used to be shared by
+sleeps: the Pi listened 0.1 s + 10 x 50 ms after every telemetry packet and
+app.py sent throttle commands every 150 ms / 2 s, so commands and telemetry
+collided whenever the two timings lined up. Here the ground station times
+a superframe and both ends only transmit in their own slot:
+
+    | beacon | downlink | guard | uplink           | guard | beacon | ...
+      PC       PC: commands       Pi: backlog report,
+                                  ACKs, telemetry
+
+- the beacon (a TYPE_BEACON frame) carries the superframe number and the
+  slot lengths; the Pi times its uplink slot from the moment the beacon
+  arrived (SlotClock) and keeps that timing for BEACON_LOSS_LIMIT
+  superframes without a beacon. Without beacons (an older ground station)
+  it falls back to sending right away
+- SlotPlanner sizes every superframe from the queues: the downlink slot from
+  the commands about to be sent, the uplink slot from the airtime the Pi
+  reported as pending at the start of its last slot (a TYPE_BACKLOG frame).
+  Slots grow at once and shrink halfway per superframe, between the MIN_/MAX_
+  limits, so command latency stays below one maximal superframe
+- Uplink fills the Pi's slot: the backlog report first, then replies (ACKs),
+  then telemetry. Samples wait as raw values and are delta-encoded only
+  when they fit, so a full slot drops the oldest samples, never a frame the
+  ground station's delta decoder needs
+
+Usage (simulation):
+    # Legacy sleep-based timing vs. TDMA on a simulated half-duplex channel
+    python3 airtime.py [--duration 600] [--seed 0] [--loss 0.02]
+"""
+
+import math
+import struct
+from collections import deque
+
+from lora_frame import TYPE_BACKLOG, TYPE_BEACON, FrameError, pack_frame, unpack_frame
+
+BYTE_RATE = 960.0           # Bytes/s on air (9600 baud 8N1, transparent-mode module)
+PACKET_OVERHEAD = 0.02      # Seconds per transmission: preamble, TX/RX turnaround
+GUARD = 0.03                # Silence before and after the uplink slot (s)
+MIN_DOWNLINK = 0.05
+MAX_DOWNLINK = 0.30
+MIN_UPLINK = 0.15
+MAX_UPLINK = 0.60
+BEACON_LOSS_LIMIT = 3       # Superframes the Pi keeps its slot timing without a beacon
+MAX_PENDING_SAMPLES = 20    # Pi samples waiting for the uplink; older ones are dropped
+TELEMETRY_FRAME_BOUND = 48  # Largest telemetry (key or delta) frame on the wire, bytes
+
+_BEACON = struct.Struct(">HHB")     # downlink ms, uplink ms, guard ms
+_BACKLOG = struct.Struct(">H")      # pending uplink airtime, ms
+
+
+def airtime(nbytes, byte_rate=BYTE_RATE, overhead=PACKET_OVERHEAD):
+    """Seconds on air for one transmission of `nbytes`."""
+    return overhead + nbytes / byte_rate
+
+
+def _ms(seconds):
+    return max(0, min(0xFFFF, round(seconds * 1000)))
+
+
+BEACON_SIZE = len(pack_frame(TYPE_BEACON, 0, bytes(_BEACON.size)))
+BACKLOG_SIZE = len(pack_frame(TYPE_BACKLOG, 0, bytes(_BACKLOG.size)))
+BEACON_AIRTIME = airtime(BEACON_SIZE)
+
+
+# ==================== Superframe ====================
+
+class SlotPlan:
+    """Slot lengths of one superframe (seconds); times count from the end of the beacon."""
+
+    __slots__ = ("number", "downlink", "uplink", "guard")
+
+    def __init__(self, number, downlink, uplink, guard=GUARD):
+        self.number = number
+        self.downlink = downlink
+        self.uplink = uplink
+        self.guard = guard
+
+    @property
+    def uplink_offset(self):
+        """Start of the uplink slot after the beacon was received."""
+        return self.downlink + self.guard
+
+    @property
+    def superframe(self):
+        """Beacon to beacon."""
+        return BEACON_AIRTIME + self.downlink + self.guard + self.uplink + self.guard
+
+    def beacon(self):
+        """Wire bytes of the beacon that announces this plan."""
+        return pack_frame(TYPE_BEACON, self.number,
+                          _BEACON.pack(_ms(self.downlink), _ms(self.uplink), min(0xFF, _ms(self.guard))))
+
+    def as_dict(self):
+        return {"number": self.number, "downlink_s": self.downlink, "uplink_s": self.uplink,
+                "guard_s": self.guard, "superframe_s": self.superframe}
+
+    def __repr__(self):
+        return (f"SlotPlan({self.number}, downlink={self.downlink:.3f}, uplink={self.uplink:.3f}, "
+                f"guard={self.guard:.3f})")
+
+
+def beacon_of(frame):
+    """SlotPlan of a COBS-encoded frame if it is a beacon, else None."""
+    try:
+        frame_type, number, payload = unpack_frame(frame)
+    except FrameError:
+        return None
+    if frame_type != TYPE_BEACON or len(payload) != _BEACON.size:
+        return None
+    downlink, uplink, guard = _BEACON.unpack(payload)
+    return SlotPlan(number, downlink / 1000, uplink / 1000, guard / 1000)
+
+
+def backlog_frame(seconds, seq=0):
+    """Wire bytes of a backlog report: uplink airtime the Pi still has queued."""
+    return pack_frame(TYPE_BACKLOG, seq, _BACKLOG.pack(_ms(seconds)))
+
+
+def backlog_of(frame):
+    """Reported backlog (s) of a COBS-encoded frame if it is a backlog report, else None."""
+    try:
+        frame_type, _, payload = unpack_frame(frame)
+    except FrameError:
+        return None
+    if frame_type != TYPE_BACKLOG or len(payload) != _BACKLOG.size:
+        return None
+    return _BACKLOG.unpack(payload)[0] / 1000
+
+
+class SlotPlanner:
+    """Ground station side: the plan of each superframe, sized from the queues."""
+
+    def __init__(self, min_downlink=MIN_DOWNLINK, max_downlink=MAX_DOWNLINK,
+                 min_uplink=MIN_UPLINK, max_uplink=MAX_UPLINK, guard=GUARD):
+        self.min_downlink = min_downlink
+        self.max_downlink = max_downlink
+        self.min_uplink = min_uplink
+        self.max_uplink = max_uplink
+        self.guard = guard
+        self.number = 0
+        self._uplink = min_uplink
+
+    @property
+    def max_superframe(self):
+        """Longest superframe, i.e. the bound on command latency."""
+        return SlotPlan(0, self.max_downlink, self.max_uplink, self.guard).superframe
+
+    def next_plan(self, downlink_sizes, uplink_backlog):
+        """
+        Plan for the next superframe.
+
+        `downlink_sizes` are the wire sizes of the messages sent after the
+        beacon, `uplink_backlog` the airtime (s) the Pi last reported.
+        """
+        downlink = sum(airtime(size) for size in downlink_sizes)
+        downlink = min(max(downlink, self.min_downlink), self.max_downlink)
+
+        # Room for the backlog, the next report and one fresh telemetry frame
+        wanted = uplink_backlog + airtime(BACKLOG_SIZE) + airtime(TELEMETRY_FRAME_BOUND)
+        wanted = min(max(wanted, self.min_uplink), self.max_uplink)
+        # Grow at once, shrink halfway: one burst doesn't make the slots flap
+        self._uplink = wanted if wanted >= self._uplink else (self._uplink + wanted) / 2
+
+        plan = SlotPlan(self.number, downlink, self._uplink, self.guard)
+        self.number = (self.number + 1) & 0xFFFF
+        return plan
+
+
+class SlotClock:
+    """Pi side: where the uplink slots are, from the last beacon."""
+
+    def __init__(self, loss_limit=BEACON_LOSS_LIMIT):
+        self.loss_limit = loss_limit
+        self.plan = None
+        self.beacons = 0
+        self._beacon_at = None
+
+    def on_beacon(self, plan, now):
+        """A beacon (see beacon_of) finished arriving at `now`."""
+        self.plan = plan
+        self._beacon_at = now
+        self.beacons += 1
+
+    def synced(self, now):
+        return self.plan is not None and now - self._beacon_at < self.loss_limit * self.plan.superframe
+
+    def uplink_window(self, now):
+        """(start, end) of the uplink slot containing `now` or the next one; None if not synced."""
+        if not self.synced(now):
+            return None
+        period = self.plan.superframe
+        start = self._beacon_at + self.plan.uplink_offset
+        if now > start:
+            start += math.floor((now - start) / period) * period
+        end = start + self.plan.uplink
+        if now >= end:
+            start += period
+            end += period
+        return start, end
+
+
+# ==================== Pi Uplink ====================
+
+class Uplink:
+    """
+    The Pi's outgoing traffic, handed out slot by slot.
+
+    A backlog report goes first, then replies (ACK lines, bytes), then as many
+    pending samples as fit, each delta-encoded by `encoder` (see
+    lora_frame.DeltaEncoder) at that moment. Telemetry that is already
+    encoded (binary or text frames) waits with the samples, not the replies:
+    both queues hold at most `max_samples`, the oldest are dropped.
+    """
+
+    def __init__(self, encoder, max_samples=MAX_PENDING_SAMPLES):
+        self.encoder = encoder
+        self._replies = deque()
+        self._frames = deque()
+        self._samples = deque()
+        self.max_samples = max_samples
+        self.dropped_samples = 0
+        self._frame_bytes = float(TELEMETRY_FRAME_BOUND)  # Running mean of bytes per sample
+        self._busy_until = 0.0
+        self._reported = None
+
+    def add_reply(self, data):
+        """An ACK line: sent before any telemetry, never dropped."""
+        self._replies.append(data)
+
+    def add_frame(self, data):
+        """A telemetry frame encoded by the caller (binary/text modes)."""
+        if len(self._frames) >= self.max_samples:
+            self._frames.popleft()
+            self.dropped_samples += 1
+        self._frames.append(data)
+
+    def add_sample(self, values, timestamp=None):
+        if len(self._samples) >= self.max_samples:
+            self._samples.popleft()
+            self.dropped_samples += 1
+        self._samples.append((list(values), timestamp))
+
+    def backlog(self):
+        """Airtime (s) of everything pending, telemetry at the recent bytes per sample."""
+        replies = sum(airtime(len(message)) for message in (*self._replies, *self._frames))
+        samples = len(self._samples) * self._frame_bytes
+        return replies + (airtime(samples) if samples else 0.0)
+
+    def _encode(self, values, timestamp):
+        frame = self.encoder.encode(values, timestamp)
+        self._frame_bytes += 0.1 * ((len(frame) if frame else 0) - self._frame_bytes)
+        return frame
+
+    def drain(self, now, window):
+        """Wire messages to write at `now` that end inside the slot `window` = (start, end)."""
+        start, end = window
+        if now < start or now >= end:
+            return []
+        t = max(now, self._busy_until)
+        out = []
+
+        def fits(size):
+            return t + airtime(size) <= end
+
+        if self._reported != start and fits(BACKLOG_SIZE):
+            out.append(backlog_frame(self.backlog()))
+            t += airtime(BACKLOG_SIZE)
+            self._reported = start
+        while self._replies and fits(len(self._replies[0])):
+            reply = self._replies.popleft()
+            out.append(reply)
+            t += airtime(len(reply))
+        while self._frames and not self._replies and fits(len(self._frames[0])):
+            frame = self._frames.popleft()
+            out.append(frame)
+            t += airtime(len(frame))
+        while self._samples and not self._replies and fits(TELEMETRY_FRAME_BOUND):
+            frame = self._encode(*self._samples.popleft())
+            if frame:
+                out.append(frame)
+                t += airtime(len(frame))
+
+        self._busy_until = t
+        return out
+
+    def drain_all(self):
+        """Everything pending, for a Pi that isn't synchronized to beacons."""
+        out = list(self._replies) + list(self._frames)
+        self._replies.clear()
+        self._frames.clear()
+        while self._samples:
+            frame = self._encode(*self._samples.popleft())
+            if frame:
+                out.append(frame)
+        return out
+
+
+# ==================== Channel Simulation ====================
+
+class _Channel:
+    """Half-duplex radio channel: overlapping transmissions are all lost."""
+
+    def __init__(self, rng, loss):
+        self.rng = rng
+        self.loss = loss
+        self._pending = []      # (start, end, sender, message)
+        self._history = deque() # Recent transmissions, for overlap checks
+        self.sent = 0
+        self.collided = 0
+        self.lost = 0
+        self.busy = {}          # sender -> radio free at
+
+    def send(self, sender, now, message):
+        start = max(now, self.busy.get(sender, 0.0))
+        end = start + airtime(len(message))
+        self.busy[sender] = end
+        entry = (start, end, sender, message)
+        self._pending.append(entry)
+        self._history.append(entry)
+        self.sent += 1
+        return end
+
+    def deliveries(self, now):
+        """(end, receiver-side sender, message) of transmissions finished by `now` that arrived."""
+        done = [e for e in self._pending if e[1] <= now]
+        self._pending = [e for e in self._pending if e[1] > now]
+        while self._history and self._history[0][1] < now - 5.0:
+            self._history.popleft()
+        arrived = []
+        for start, end, sender, message in done:
+            if any(o[0] < end and start < o[1] and o[2] != sender for o in self._history):
+                self.collided += 1
+            elif self.rng.random() < self.loss:
+                self.lost += 1
+            else:
+                arrived.append((end, sender, message))
+        return arrived
+
+
+def _throttle_changes(rng, duration, mean_interval=4.0):
+    t, changes = 0.0, []
+    while True:
+        t += rng.expovariate(1 / mean_interval)
+        if t >= duration:
+            return changes
+        changes.append((t, rng.choice([0, 10, 20, 30, 40, 50, 60, 75])))
+
+
+def _parse_command(message):
+    parts = message.decode(errors='ignore').strip().split(":")
+    return int(parts[2]) if len(parts) >= 3 and parts[1] == "THROTTLE" else None
+
+
+def simulate(scheme, duration=600.0, seed=0, loss=0.02, dt=0.005):
+    """Run `scheme` ("legacy" or "tdma") over a simulated channel; returns a metrics dict."""
+    import random
+
+    from lora_frame import (DEFAULT_THRESHOLDS, DeltaDecoder, DeltaEncoder, FrameSplitter,
+                            TelemetryCodec, _bench_samples, column_thresholds)
+
+    rng = random.Random(seed)
+    channel = _Channel(random.Random(seed + 1), loss)
+    codec = TelemetryCodec()
+    encoder = DeltaEncoder(codec, column_thresholds(DEFAULT_THRESHOLDS))
+    decoder = DeltaDecoder(codec)
+    thresholds = column_thresholds(DEFAULT_THRESHOLDS)
+    rows = list(_bench_samples(int(duration / 0.05) + 1, period=0.05))
+    changes = deque(_throttle_changes(rng, duration))
+
+    target, target_since, confirmed = 0, 0.0, 0
+    applied = 0
+    latencies, pending_change = [], None
+    telemetry = decode_errors = acks = 0
+    ground, fresh_ticks, ticks = None, 0, 0
+
+    # Legacy state (app.py motor_transmit_loop, test.py main loop)
+    pc_next = pi_next = 0.0
+    # TDMA state
+    planner, clock, uplink = SlotPlanner(), SlotClock(), Uplink(encoder)
+    frame_end, pi_backlog, last_command = 0.0, 0.0, -10.0
+    pi_next_sample = 0.0
+
+    def pi_receive(message, now):
+        nonlocal applied, pending_change
+        value = _parse_command(message)
+        if value is None:
+            return None
+        applied = value
+        if pending_change is not None and value == target:
+            latencies.append(now - pending_change)
+            pending_change = None
+        return f"ACK:THROTTLE:{value}:OK\n".encode()
+
+    def pc_receive(message):
+        nonlocal confirmed, telemetry, decode_errors, acks, pi_backlog, ground
+        if message.startswith(b"ACK:"):
+            confirmed = int(message.split(b":")[2])
+            acks += 1
+            return
+        for _, frame in FrameSplitter().feed(message):
+            backlog = backlog_of(frame)
+            if backlog is not None:
+                pi_backlog = backlog
+                continue
+            try:
+                ground = decoder.decode(frame).values
+                telemetry += 1
+            except FrameError:
+                decode_errors += 1
+
+    t = 0.0
+    while t < duration:
+        while changes and changes[0][0] <= t:
+            _, target = changes.popleft()
+            target_since = t
+            if pending_change is None and target != applied:
+                pending_change = t
+            elif target == applied:
+                pending_change = None
+
+        for end, sender, message in channel.deliveries(t):
+            if sender == "pc":
+                plan = beacon_of(message[1:-1]) if message[:1] == b"\x00" else None
+                if plan is not None:
+                    clock.on_beacon(plan, end)
+                else:
+                    reply = pi_receive(message, end)
+                    if reply:
+                        if scheme == "tdma":
+                            uplink.add_reply(reply)
+                        else:
+                            channel.send("pi", t, reply)
+            else:
+                pc_receive(message)
+
+        if scheme == "legacy":
+            # PC: send, listen, sleep; heartbeat by the modulo heuristic
+            if t >= pc_next:
+                since = t - target_since
+                active = since < 3.0
+                if active or since % 2.0 < 0.2:
+                    channel.send("pc", t, f"CMD:THROTTLE:{target}\n".encode())
+                pc_next = t + (0.1 + 0.15 if active else 0.5 + 2.0)
+            # Pi: sample, send, then sleep 0.1 s + listen 10 x 50 ms, then 50 ms
+            if t >= pi_next:
+                frame = encoder.encode(rows[int(t / 0.05)], None)
+                if frame:
+                    channel.send("pi", t, frame)
+                    pi_next = t + 0.1 + 0.5 + 0.05
+                else:
+                    pi_next = t + 0.05
+        else:
+            # PC: beacon plus the commands at the start of each superframe
+            if t >= frame_end:
+                commands = []
+                if target != confirmed or t - last_command >= 2.0:
+                    commands.append(f"CMD:THROTTLE:{target}\n".encode())
+                    last_command = t
+                plan = planner.next_plan([len(c) for c in commands], pi_backlog)
+                channel.send("pc", t, plan.beacon())
+                for command in commands:
+                    channel.send("pc", t, command)
+                frame_end = t + plan.superframe
+            # Pi: a sample every 50 ms, transmissions only inside the uplink slot
+            if t >= pi_next_sample:
+                uplink.add_sample(rows[int(t / 0.05)], None)
+                pi_next_sample += 0.05
+            window = clock.uplink_window(t)
+            if window is not None:
+                for message in uplink.drain(t, window):
+                    channel.send("pi", t, message)
+
+        # Ground view within the thresholds (+ rounding) of the Pi's current sample?
+        ticks += 1
+        if ground is not None and all(g is not None and abs(g - w) <= limit + 0.051 for g, w, limit
+                                      in zip(ground[1:], rows[int(t / 0.05)][1:], thresholds[1:])):
+            fresh_ticks += 1
+        t += dt
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3 if latencies else float("nan")
+
+    return {"scheme": scheme, "transmissions": channel.sent, "collided": channel.collided,
+            "lost": channel.lost, "telemetry_per_s": telemetry / duration, "decode_errors": decode_errors,
+            "in_threshold": fresh_ticks / max(ticks, 1),
+            "commands_applied": len(latencies), "latency_p50_ms": pct(0.5), "latency_p95_ms": pct(0.95),
+            "latency_max_ms": latencies[-1] * 1e3 if latencies else float("nan"), "acks": acks,
+            "dropped_samples": uplink.dropped_samples}
+
+
+def benchmark(duration=600.0, seed=0, loss=0.02):
+    print(f"[BENCH] {duration:.0f} s simulated, 9600 baud half-duplex, {loss:.0%} random loss, "
+          f"throttle change every ~4 s")
+    print(f"[BENCH] max superframe {SlotPlanner().max_superframe * 1e3:.0f} ms "
+          f"(bound on TDMA command latency)")
+    print(f"[BENCH] {'scheme':<7} {'tx':>6} {'collided':>9} {'frames/s':>9} {'lost deltas':>12} "
+          f"{'in thr.':>8} {'cmd p50':>8} {'cmd p95':>8} {'cmd max':>8}")
+    for scheme in ("legacy", "tdma"):
+        m = simulate(scheme, duration, seed, loss)
+        print(f"[BENCH] {scheme:<7} {m['transmissions']:>6} {m['collided']:>9} {m['telemetry_per_s']:>9.2f} "
+              f"{m['decode_errors']:>12} {m['in_threshold']:>8.1%} {m['latency_p50_ms']:>6.0f}ms "
+              f"{m['latency_p95_ms']:>6.0f}ms {m['latency_max_ms']:>6.0f}ms")
+    print("[BENCH] in thr. = share of time the ground's rebuilt row is within the thresholds of the Pi's current one")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LoRa airtime scheduling simulation")
+    parser.add_argument("--duration", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--loss", type=float, default=0.02)
+    args = parser.parse_args()
+
+    benchmark(args.duration, args.seed, args.loss)
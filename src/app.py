@@ -103,12 +103,35 @@ import time
 import json
 import glob as glob_module
 import io
-import csv
 import threading
 from datetime import datetime
 
 from flask import Flask, request, jsonify, render_template, send_from_directory, Response
 
+import numpy as np
+
+from airtime import SlotPlanner, backlog_of
+from bme280_driver import PROFILES as BME280_PROFILES
+from command_tracker import CommandTracker, split_sequence, with_sequence
+from downsample import METHODS as DOWNSAMPLE_METHODS, LodTiers, downsample
+from event_stream import EventBroker
+from excel_export import export_to_tempfile, metadata_rows, stream_file
+from export_jobs import FORMATS as EXPORT_FORMATS, ExportJobs
+from export_stream import MODES as EXPORT_MODES, export_metadata, stream_export
+from history_store import HistoryStore
+from link_metrics import LinkMetrics
+from lora_frame import SENSOR_SETTINGS, TYPE_DELTA, TYPE_TELEMETRY, DeltaDecoder, FrameError, TelemetryCodec, \
+    threshold_command, unpack_frame
+from mission_catalog import MissionCatalog
+from mission_loader import load_mission_data
+from mission_log import MissionLogWriter, binary_path, sidecar_paths, write_mission_log
+from pdf_report import write_pdf_report
+from recording_writer import FSYNC_POLICIES, RecordingWriter
+from running_stats import RunningStats, as_column_statistics
+from serial_link import PRIORITY_COMMAND, PRIORITY_CONFIG, PRIORITY_URGENT, SerialLink
+from stats_engine import describe, window_statistics
+from time_index import find_range, range_length
+
 # Configuration directory setup
 CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config'))
 CONFIG_FILE = os.path.join(CONFIG_DIR, 'triton_config.json')
@@ -116,6 +139,7 @@ CONFIG_FILE = os.path.join(CONFIG_DIR, 'triton_config.json')
 # Default configuration values
 DEFAULT_CONFIG = {
     "sea_level_pressure": 993.9,
+    "bme280_profile": "balanced",
     "transmission_thresholds": {
         "temp_bme280": 0.25,
         "humidity": 1.0,
@@ -126,7 +150,8 @@ DEFAULT_CONFIG = {
         "temp_mpu": 0.25
     },
     "update_frequency": 1.0,
-    "history_length": 300
+    "history_length": 300,
+    "recording_fsync": "batch"
 }
 
 def load_config():
@@ -203,15 +228,28 @@ ARCHIVE_DIR = os.path.join(LOG_DIR, "previous_data")
 os.makedirs(LOG_DIR, exist_ok=True)
 os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
-latest_data = {"timestamp": "", "data": {}}
-history = {"Elapsed [s]": []}  # For graphing
-for key in [
+HISTORY_LABELS = [
+    "Elapsed [s]",
     "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
     "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
     "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
     "Temp_MPU [°C]"
-]:
-    history[key] = []
+]
+HISTORY_SPILL_FILE = os.path.join(LOG_DIR, "session_history.spill")
+
+latest_data = {"timestamp": "", "data": {}}
+# For graphing: bounded by config["history_length"], older rows spill to disk
+history = HistoryStore(
+    HISTORY_LABELS,
+    capacity=int(load_config().get("history_length", DEFAULT_CONFIG["history_length"])),
+    spill_path=HISTORY_SPILL_FILE,
+    time_label="Elapsed [s]"
+)
+# Pre-aggregated min/max/mean tiers of the whole session for zoomed-out charts
+history_lod = LodTiers(HISTORY_LABELS)
+# Session statistics kept up to date per row (/stats, exports); rows are
+# numbered like the history's, so both are appended and cleared together
+history_stats = RunningStats(HISTORY_LABELS)
 
 # ==================== Recording State ====================
 RECORDINGS_DIR = os.path.join(LOG_DIR, "recordings")
@@ -225,6 +263,70 @@ recording_state = {
     "point_count": 0
 }
 recording_lock = threading.Lock()
+# Owns the open recording file; rows are queued and written in batches
+recording_writer = None
+
+# ==================== Mission Catalog ====================
+# Cached size / row count / time span / min-max per mission file for the listing endpoints
+missions = MissionCatalog(os.path.join(LOG_DIR, "mission_catalog.jsonl"), {
+    "logs": LOG_DIR,
+    "logs/previous_data": ARCHIVE_DIR,
+    "logs/recordings": RECORDINGS_DIR
+})
+
+# ==================== Export Jobs ====================
+# Large exports are built in worker processes; finished files are cached in logs/exports
+EXPORT_DIR = os.path.join(LOG_DIR, "exports")
+exports = ExportJobs(EXPORT_DIR)
+
+# ==================== Live Event Stream ====================
+# Pushes rows, motor status and recording state to dashboards (see /events)
+events = EventBroker()
+
+
+def get_recording_snapshot():
+    """Public part of the recording state"""
+    with recording_lock:
+        return {
+            "is_recording": recording_state["is_recording"],
+            "filename": recording_state["filename"],
+            "start_time": recording_state["start_time"],
+            "point_count": recording_state["point_count"]
+        }
+
+
+def ingest_row(values, data_dict, timestamp):
+    """Store an accepted sensor row: chart history, active recording and live stream"""
+    with history.lock:
+        seq, row = history.append(values)
+        history_stats.add(row)
+    history_lod.add(row)
+
+    # Write to recording if active
+    append_recording_data(data_dict, timestamp)
+
+    if events.client_count:
+        recording = get_recording_snapshot()
+        events.publish("row", {
+            "seq": seq,
+            "epoch": history.epoch,
+            "capacity": history.capacity,
+            "timestamp": timestamp,
+            "row": dict(zip(HISTORY_LABELS, HistoryStore.to_list(row))),
+            "recording_points": recording["point_count"] if recording["is_recording"] else None
+        })
+
+
+@app.route("/events", methods=["GET"])
+def event_stream():
+    """Server-Sent Events stream: 'row', 'motor' and 'recording' events"""
+    sub = events.subscribe()
+    return Response(
+        events.stream(sub),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 
 @app.route("/", methods=["GET"])
 def index():
@@ -237,39 +339,92 @@ def dashboard():
 
 @app.route("/update", methods=["POST"])
 def update():
-    global latest_data, history
+    global latest_data
     content = request.json
     latest_data = content
 
     elapsed = float(content["data"]["Elapsed [s]"])
-    history["Elapsed [s]"].append(elapsed)
-
-    for key in history:
-        if key != "Elapsed [s]":
-            try:
-                history[key].append(float(content["data"][key]))
-            except:
-                history[key].append(None)
-
-    # Write to recording if active
-    append_recording_data(content["data"], content.get("timestamp", datetime.now().isoformat()))
+    ingest_row({**content["data"], "Elapsed [s]": elapsed}, content["data"],
+               content.get("timestamp", datetime.now().isoformat()))
 
     return jsonify(status="ok")
 
 
 @app.route("/data", methods=["GET"])
 def get_data():
+    """
+    Return chart history.
+
+    Without parameters the whole ring is returned. With `since=<cursor>` (the
+    cursor from the previous response) only rows appended after it are sent.
+    `reset` tells the client to drop its copy, e.g. after the data was cleared
+    or when it fell too far behind; `epoch` changes whenever cursors from
+    earlier responses stop being valid.
+    """
+    max_points = request.args.get('max_points', type=int)
+    if max_points:
+        return get_downsampled_data(max_points)
+
+    since = request.args.get('since', type=int)
+    epoch = request.args.get('epoch', type=int)
+
+    cursor, epoch, reset, columns = history.since(since, epoch)
+    return jsonify({
+        "timestamp": latest_data["timestamp"],
+        "history": {key: HistoryStore.to_list(values) for key, values in columns.items()},
+        "cursor": cursor,
+        "epoch": epoch,
+        "reset": reset,
+        "capacity": history.capacity
+    })
+
+def get_downsampled_data(max_points):
+    """
+    /data?max_points=N[&method=lttb|minmax|avg][&start=&end=]
+
+    Reduces the history to at most N rows per response. Ranges still inside
+    the ring are reduced from raw rows (O(ring)); anything reaching into
+    spilled rows is answered from the LOD tiers (O(buckets)).
+    """
+    method = request.args.get('method', 'lttb')
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({"error": f"Invalid method. Use one of: {', '.join(DOWNSAMPLE_METHODS)}"}), 400
+    max_points = max(max_points, 2)
+
+    cursor, epoch, _, columns = history.since(None)
+    elapsed = columns["Elapsed [s]"]
+    ring_covers = history.spilled == 0 or (
+        start is not None and len(elapsed) and start >= np.nanmin(elapsed))
+
+    if ring_covers:
+        source = "raw"
+        if start is not None or end is not None:
+            rows = find_range(elapsed, start, end)
+            columns = {key: values[rows] for key, values in columns.items()}
+        columns, _ = downsample(columns, "Elapsed [s]", max_points, method)
+    else:
+        source = "lod"
+        columns = history_lod.query(max_points, method, start, end) or columns
+
     return jsonify({
         "timestamp": latest_data["timestamp"],
-        "history": history
+        "history": {key: HistoryStore.to_list(values) for key, values in columns.items()},
+        "cursor": cursor,
+        "epoch": epoch,
+        "reset": True,
+        "capacity": history.capacity,
+        "downsampled": {"method": method, "max_points": max_points, "source": source}
     })
 
+
 @app.route("/generate_random_data", methods=["POST"])
 def generate_random_data():
-    global latest_data, history
+    global latest_data
     
     # Get current elapsed time or start from 0
-    current_elapsed = history["Elapsed [s]"][-1] if history["Elapsed [s]"] else 0
+    current_elapsed = history.last("Elapsed [s]", 0)
     new_elapsed = current_elapsed + random.uniform(1.0, 3.0)  # 1-3 second increment
     
     # Generate realistic sensor data
@@ -296,26 +451,14 @@ def generate_random_data():
     
     # Update global data structures (same as /update endpoint)
     latest_data = generated_payload
-    history["Elapsed [s]"].append(new_elapsed)
-    
-    for key in history:
-        if key != "Elapsed [s]":
-            try:
-                history[key].append(float(random_data[key]))
-            except:
-                history[key].append(None)
-
-    # Write to recording if active
-    append_recording_data(random_data, generated_payload["timestamp"])
+    ingest_row({**random_data, "Elapsed [s]": new_elapsed}, random_data, generated_payload["timestamp"])
 
     return jsonify({"status": "success", "message": "Random data generated"})
 
 @app.route("/save_session_csv", methods=["POST"])
 def save_session_csv():
     """Save current session data to a proper CSV file"""
-    global history
-
-    if not history.get("Elapsed [s]") or len(history["Elapsed [s]"]) == 0:
+    if history.appended == 0:
         return jsonify({"status": "error", "message": "No data to save"}), 400
 
     try:
@@ -324,11 +467,15 @@ def save_session_csv():
         filename = f"sensor_data_{timestamp}.csv"
         filepath = os.path.join(LOG_DIR, filename)
 
-        # Move any existing files to archive
+        # Move any existing files (and their binary logs) to archive
         import glob
         import shutil
         for file in glob.glob(os.path.join(LOG_DIR, "sensor_data_*.csv")):
             shutil.move(file, ARCHIVE_DIR)
+            missions.move(file, os.path.join(ARCHIVE_DIR, os.path.basename(file)))
+            for sidecar in sidecar_paths(file):
+                if os.path.isfile(sidecar):
+                    shutil.move(sidecar, ARCHIVE_DIR)
 
         # Write CSV with proper comma-delimited format
         headers = ["MET [s]"] + [
@@ -337,26 +484,31 @@ def save_session_csv():
             "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"
         ]
 
+        # Whole session: rows spilled out of the ring plus the live window, rounded to the
+        # CSV's 3 decimals so the .tlog (which mission loading prefers) holds the same values
+        session = {key: np.round(values, 3) for key, values in history.columns(include_spill=True).items()}
+        columns = [HistoryStore.to_list(session[key]) for key in headers[1:]]
+        num_rows = len(columns[0])
+
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(",".join(headers) + "\n")
 
-            num_rows = len(history.get("Elapsed [s]", []))
-            for i in range(num_rows):
-                row = []
+            for values in zip(*columns):
                 # MET timestamp (use elapsed time as MET)
-                elapsed = history.get("Elapsed [s]", [0])[i] if i < len(history.get("Elapsed [s]", [])) else 0
-                row.append(f"{elapsed:.3f}")
+                elapsed = values[0] if values[0] is not None else 0
+                row = [f"{elapsed:.3f}"]
 
                 # Add all other columns
-                for key in headers[1:]:
-                    values = history.get(key, [])
-                    if i < len(values) and values[i] is not None:
-                        row.append(f"{values[i]:.3f}" if isinstance(values[i], (int, float)) else str(values[i]))
-                    else:
-                        row.append("")
+                row.extend(f"{v:.3f}" if v is not None else "" for v in values)
 
                 f.write(",".join(row) + "\n")
 
+        # Binary copy of the same columns for fast mission loading
+        write_mission_log(binary_path(filepath),
+                          {"MET [s]": np.nan_to_num(session["Elapsed [s]"]), **session},
+                          source=filename)
+        missions.update(filepath)
+
         return jsonify({
             "status": "success",
             "message": f"Saved {num_rows} rows to {filename}",
@@ -370,24 +522,21 @@ def save_session_csv():
 
 @app.route("/clear_test_data", methods=["POST"])
 def clear_test_data():
-    global latest_data, history
+    global latest_data
     
     # Clear all data
     latest_data = {"timestamp": "", "data": {}}
-    history = {"Elapsed [s]": []}  # Reset to empty arrays
-    for key in [
-        "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
-        "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-        "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
-        "Temp_MPU [°C]"
-    ]:
-        history[key] = []
+    with history.lock:
+        history.clear()
+        history_stats.clear()
+    history_lod.clear()
     
     return jsonify({"status": "success", "message": "Test data cleared"})
 
 @app.route('/download/latest')
 def download_latest():
-    files = sorted([f for f in os.listdir(LOG_DIR) if f.startswith("sensor_data_")], reverse=True)
+    files = sorted([f for f in os.listdir(LOG_DIR)
+                    if f.startswith("sensor_data_") and f.endswith(".csv")], reverse=True)
     if files:
         return send_from_directory(LOG_DIR, files[0], as_attachment=True)
     return "No log files found", 404
@@ -396,22 +545,12 @@ def download_latest():
 def list_logs():
     """List all downloadable files from archive and recordings directories"""
     files = []
-
-    # Get archived logs
-    try:
-        for f in sorted(os.listdir(ARCHIVE_DIR)):
-            if f.endswith(".csv"):
-                files.append({"filename": f, "path": "archive", "display": f"[Archive] {f}"})
-    except Exception as e:
-        print(f"[WARN] Error listing archive: {e}")
-
-    # Get recordings
-    try:
-        for f in sorted(os.listdir(RECORDINGS_DIR)):
-            if f.endswith(".csv"):
-                files.append({"filename": f, "path": "recording", "display": f"[Recording] {f}"})
-    except Exception as e:
-        print(f"[WARN] Error listing recordings: {e}")
+    for entry in missions.entries("logs/previous_data", "logs/recordings"):
+        f = entry["filename"]
+        if entry["dir"] == "logs/previous_data":
+            files.append({"filename": f, "path": "archive", "display": f"[Archive] {f}"})
+        else:
+            files.append({"filename": f, "path": "recording", "display": f"[Recording] {f}"})
 
     # Sort by filename (which includes timestamp)
     files.sort(key=lambda x: x["filename"], reverse=True)
@@ -438,22 +577,38 @@ def download_archive(filename):
 
 # ==================== Recording API Endpoints ====================
 
-def write_recording_header(filepath):
-    """Write CSV header to recording file"""
-    headers = ["Timestamp", "Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
-               "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-               "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
-    with open(filepath, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
+RECORDING_HEADERS = ["Timestamp", "Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
+                     "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+                     "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
+
+
+def open_recording_writer(filepath):
+    """Create the recording file with its header and start its writer thread"""
+    fsync = load_config().get("recording_fsync", DEFAULT_CONFIG["recording_fsync"])
+    if fsync not in FSYNC_POLICIES:
+        fsync = DEFAULT_CONFIG["recording_fsync"]
+    mirror = MissionLogWriter(binary_path(filepath), RECORDING_HEADERS, time_label="Timestamp",
+                              source=os.path.basename(filepath))
+    return RecordingWriter(filepath, header=RECORDING_HEADERS, fsync=fsync, mirror=mirror)
+
+
+def close_recording_writer():
+    """Flush and close the active recording file (also runs at exit)"""
+    global recording_writer
+
+    with recording_lock:
+        writer = recording_writer
+        recording_writer = None
+    if writer is not None:
+        writer.close()
 
 
 def append_recording_data(data_dict, timestamp):
-    """Append a data point to the active recording file"""
+    """Queue a data point for the active recording file (never blocks on disk)"""
     global recording_state
 
     with recording_lock:
-        if not recording_state["is_recording"] or not recording_state["filepath"]:
+        if not recording_state["is_recording"] or recording_writer is None:
             return
 
         try:
@@ -472,9 +627,7 @@ def append_recording_data(data_dict, timestamp):
                 data_dict.get("Gyro z [°/s]", ""),
                 data_dict.get("Temp_MPU [°C]", "")
             ]
-            with open(recording_state["filepath"], 'a', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+            recording_writer.write(row)
             recording_state["point_count"] += 1
         except Exception as e:
             print(f"[RECORDING] Error appending data: {e}")
@@ -483,7 +636,7 @@ def append_recording_data(data_dict, timestamp):
 @app.route('/recording/start', methods=['POST'])
 def start_recording():
     """Start a new recording session"""
-    global recording_state
+    global recording_state, recording_writer
 
     with recording_lock:
         if recording_state["is_recording"]:
@@ -498,8 +651,8 @@ def start_recording():
         filename = f"recording_{timestamp}.csv"
         filepath = os.path.join(RECORDINGS_DIR, filename)
 
-        # Write header
-        write_recording_header(filepath)
+        # Write header and start the writer thread
+        recording_writer = open_recording_writer(filepath)
 
         # Update state
         recording_state["is_recording"] = True
@@ -507,15 +660,18 @@ def start_recording():
         recording_state["filepath"] = filepath
         recording_state["start_time"] = datetime.now().isoformat()
         recording_state["point_count"] = 0
+        missions.update(filepath)
 
         print(f"[RECORDING] Started recording to {filename}")
-
-        return jsonify({
+        response = {
             "status": "success",
             "message": "Recording started",
             "filename": filename,
             "start_time": recording_state["start_time"]
-        })
+        }
+
+    events.publish("recording", get_recording_snapshot())
+    return jsonify(response)
 
 
 @app.route('/recording/stop', methods=['POST'])
@@ -531,6 +687,7 @@ def stop_recording():
             }), 400
 
         filename = recording_state["filename"]
+        filepath = recording_state["filepath"]
         point_count = recording_state["point_count"]
         start_time = recording_state["start_time"]
 
@@ -542,51 +699,43 @@ def stop_recording():
         recording_state["point_count"] = 0
 
         print(f"[RECORDING] Stopped recording. Saved {point_count} points to {filename}")
-
-        return jsonify({
+        response = {
             "status": "success",
             "message": "Recording stopped",
             "filename": filename,
             "point_count": point_count,
             "start_time": start_time,
             "end_time": datetime.now().isoformat()
-        })
+        }
+
+    # Write out everything still queued before reporting the file as complete
+    close_recording_writer()
+    missions.update(filepath)
+    events.publish("recording", get_recording_snapshot())
+    return jsonify(response)
 
 
 @app.route('/recording/status', methods=['GET'])
 def get_recording_status():
     """Get current recording status"""
-    with recording_lock:
-        return jsonify({
-            "is_recording": recording_state["is_recording"],
-            "filename": recording_state["filename"],
-            "start_time": recording_state["start_time"],
-            "point_count": recording_state["point_count"]
-        })
+    return jsonify(get_recording_snapshot())
 
 
 @app.route('/recordings/list', methods=['GET'])
 def list_recordings():
     """List all saved recordings"""
+    active = get_recording_snapshot()
     recordings = []
-    try:
-        for f in os.listdir(RECORDINGS_DIR):
-            if f.endswith('.csv'):
-                filepath = os.path.join(RECORDINGS_DIR, f)
-                stat = os.stat(filepath)
-
-                # Count rows (subtract 1 for header)
-                with open(filepath, 'r', encoding='utf-8') as file:
-                    row_count = sum(1 for _ in file) - 1
-
-                recordings.append({
-                    'filename': f,
-                    'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'point_count': max(0, row_count)
-                })
-    except Exception as e:
-        print(f"[WARN] Error listing recordings: {e}")
+    for entry in missions.entries("logs/recordings"):
+        point_count = entry["rows"]
+        if active["is_recording"] and entry["filename"] == active["filename"]:
+            point_count = active["point_count"]
+        recordings.append({
+            'filename': entry["filename"],
+            'size': entry["size"],
+            'modified': datetime.fromtimestamp(entry["mtime"]).strftime('%Y-%m-%d %H:%M:%S'),
+            'point_count': point_count
+        })
 
     # Sort by modified date (newest first)
     recordings.sort(key=lambda x: x['modified'], reverse=True)
@@ -621,6 +770,10 @@ def delete_recording(filename):
 
     try:
         os.remove(filepath)
+        missions.remove(filepath)
+        for sidecar in sidecar_paths(filepath):
+            if os.path.isfile(sidecar):
+                os.remove(sidecar)
         return jsonify({"status": "success", "message": f"Deleted {safe_filename}"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -628,67 +781,39 @@ def delete_recording(filename):
 
 @app.route('/api/missions/list', methods=['GET'])
 def list_missions():
-    """List all available mission CSV files from logs/ and logs/previous_data/"""
-    missions = []
-
-    # Get files from main logs directory
-    try:
-        for f in os.listdir(LOG_DIR):
-            if f.endswith('.csv'):
-                filepath = os.path.join(LOG_DIR, f)
-                stat = os.stat(filepath)
-                missions.append({
-                    'filename': f,
-                    'path': 'logs',
-                    'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-    except Exception as e:
-        print(f"[WARN] Error reading logs directory: {e}")
-
-    # Get files from archive directory
-    try:
-        for f in os.listdir(ARCHIVE_DIR):
-            if f.endswith('.csv'):
-                filepath = os.path.join(ARCHIVE_DIR, f)
-                stat = os.stat(filepath)
-                missions.append({
-                    'filename': f,
-                    'path': 'logs/previous_data',
-                    'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-    except Exception as e:
-        print(f"[WARN] Error reading archive directory: {e}")
-
-    # Get files from recordings directory
-    try:
-        for f in os.listdir(RECORDINGS_DIR):
-            if f.endswith('.csv'):
-                filepath = os.path.join(RECORDINGS_DIR, f)
-                stat = os.stat(filepath)
-                missions.append({
-                    'filename': f,
-                    'path': 'logs/recordings',
-                    'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'is_recording': True
-                })
-    except Exception as e:
-        print(f"[WARN] Error reading recordings directory: {e}")
+    """List all available mission CSV files from logs/, logs/previous_data/ and logs/recordings/"""
+    missions_list = []
+    for entry in missions.entries():
+        mission = {
+            'filename': entry["filename"],
+            'path': entry["dir"],
+            'size': entry["size"],
+            'modified': datetime.fromtimestamp(entry["mtime"]).strftime('%Y-%m-%d %H:%M:%S'),
+            'rows': entry["rows"],
+            'time_span': entry["time_span"],
+            'columns': entry["columns"],
+            'stats': entry["stats"]
+        }
+        if entry["dir"] == "logs/recordings":
+            mission['is_recording'] = True
+        missions_list.append(mission)
 
     # Sort by modified date (newest first)
-    missions.sort(key=lambda x: x['modified'], reverse=True)
+    missions_list.sort(key=lambda x: x['modified'], reverse=True)
 
-    return jsonify(missions)
+    return jsonify(missions_list)
 
 
 @app.route('/api/missions/load/<path:filepath>', methods=['GET'])
 def load_mission(filepath):
-    """Load and parse a mission CSV file, returning data as JSON"""
-    import csv
-    import re
-
+    """
+    Load a mission file, returning data as JSON.
+
+    Optional query parameters: `columns` (comma-separated headers; the x axis
+    is always included), `start`/`end` (seconds, on Elapsed [s]) and
+    `max_points` + `method` for downsampling. Only the requested range of the
+    file is decoded (see mission_loader.py).
+    """
     # Security: only allow files from logs/, logs/previous_data/, or logs/recordings/
     if filepath.startswith('logs/recordings/'):
         full_path = os.path.join(RECORDINGS_DIR, os.path.basename(filepath))
@@ -702,118 +827,42 @@ def load_mission(filepath):
     if not os.path.isfile(full_path):
         return jsonify({'error': 'File not found'}), 404
 
-    try:
-        data = {}
-        # Try different encodings
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        file_content = None
-
-        for encoding in encodings:
-            try:
-                with open(full_path, 'r', encoding=encoding) as f:
-                    file_content = f.read()
-                break
-            except UnicodeDecodeError:
-                continue
+    columns = request.args.get('columns')
+    columns = [c.strip() for c in columns.split(',') if c.strip()] if columns else None
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
 
-        if file_content is None:
-            return jsonify({'error': 'Could not decode file with any supported encoding'}), 500
+    # Optional server-side downsampling for chart rendering
+    max_points = request.args.get('max_points', type=int)
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({'error': f"Invalid method. Use one of: {', '.join(DOWNSAMPLE_METHODS)}"}), 400
+    if max_points:
+        max_points = max(max_points, 2)
 
-        lines = file_content.strip().split('\n')
-        if not lines:
+    try:
+        if not os.path.getsize(full_path):
             return jsonify({'error': 'Empty file'}), 400
 
-        first_line = lines[0]
-
-        # Detect format: comma-delimited, semicolon-delimited, or fixed-width
-        is_semicolon_csv = ';' in first_line and first_line.count(';') >= 5
-        is_comma_csv = ',' in first_line and first_line.count(',') >= 5
-
-        if is_semicolon_csv:
-            # Semicolon-delimited CSV (common in European Excel)
-            import io
-            reader = csv.DictReader(io.StringIO(file_content), delimiter=';')
-            headers = reader.fieldnames
-
-            for header in headers:
-                data[header] = []
-
-            for row in reader:
-                for header in headers:
-                    try:
-                        value = float(row[header])
-                    except (ValueError, TypeError):
-                        value = row[header]
-                    data[header].append(value)
-        elif is_comma_csv:
-            # Standard comma-delimited CSV
-            import io
-            reader = csv.DictReader(io.StringIO(file_content), delimiter=',')
-            headers = reader.fieldnames
-
-            for header in headers:
-                data[header] = []
-
-            for row in reader:
-                for header in headers:
-                    try:
-                        value = float(row[header])
-                    except (ValueError, TypeError):
-                        value = row[header]
-                    data[header].append(value)
-        else:
-            # Fixed-width format from legacy lorareceivertest.py
-            # The header has known column names - use them to define expected structure
-            expected_headers = [
-                "Timestamp (MET)", "Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]",
-                "Press [hPa]", "Alt [m]", "Acc x [m/s²]", "Acc y [m/s²]",
-                "Acc z [m/s²]", "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
-                "Temp_MPU [°C]"
-            ]
-
-            # Check if this looks like our legacy format
-            if "Timestamp (MET)" in first_line or "Elapsed [s]" in first_line:
-                headers = expected_headers
-            else:
-                # Fallback to splitting by multiple spaces
-                header_parts = re.split(r'\s{2,}', first_line.strip())
-                headers = [h.strip() for h in header_parts if h.strip()]
-
-            for header in headers:
-                data[header] = []
-
-            # Parse data rows - split by multiple whitespace
-            for line in lines[1:]:
-                if not line.strip():
-                    continue
-                # Skip MIN/MAX summary lines at the end
-                if line.strip().startswith('MIN,') or line.strip().startswith('MAX,'):
-                    continue
-
-                # Split by multiple spaces (2+ spaces)
-                values = re.split(r'\s{2,}', line.strip())
-                values = [v.strip() for v in values if v.strip()]
-
-                # Match values to headers
-                for i, header in enumerate(headers):
-                    if i < len(values):
-                        try:
-                            value = float(values[i])
-                        except (ValueError, TypeError):
-                            value = values[i]
-                        data[header].append(value)
+        headers, data, source_rows = load_mission_data(full_path, columns, start, end, max_points, method)
 
         # Get file info
         stat = os.stat(full_path)
 
-        return jsonify({
+        response = {
             'filename': os.path.basename(full_path),
             'headers': headers,
             'data': data,
             'rowCount': len(data.get(headers[0], [])) if headers else 0,
             'fileSize': stat.st_size,
             'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-        })
+        }
+        if start is not None or end is not None:
+            response['range'] = {'start': start, 'end': end}
+        if max_points:
+            response['sourceRowCount'] = source_rows
+            response['downsampled'] = {'method': method, 'max_points': max_points}
+        return jsonify(response)
 
     except Exception as e:
         return jsonify({'error': f'Failed to parse CSV: {str(e)}'}), 500
@@ -869,10 +918,19 @@ def update_config():
         # Update top-level values
         if 'sea_level_pressure' in new_config:
             current_config['sea_level_pressure'] = float(new_config['sea_level_pressure'])
+        if 'bme280_profile' in new_config:
+            if new_config['bme280_profile'] not in BME280_PROFILES:
+                return jsonify({"error": f"Invalid bme280_profile. Use one of: {', '.join(BME280_PROFILES)}"}), 400
+            current_config['bme280_profile'] = new_config['bme280_profile']
         if 'update_frequency' in new_config:
             current_config['update_frequency'] = float(new_config['update_frequency'])
         if 'history_length' in new_config:
             current_config['history_length'] = int(new_config['history_length'])
+            history.resize(current_config['history_length'])
+        if 'recording_fsync' in new_config:
+            if new_config['recording_fsync'] not in FSYNC_POLICIES:
+                return jsonify({"error": f"Invalid recording_fsync. Use one of: {', '.join(FSYNC_POLICIES)}"}), 400
+            current_config['recording_fsync'] = new_config['recording_fsync']
 
         # Update transmission thresholds
         if 'transmission_thresholds' in new_config:
@@ -881,6 +939,8 @@ def update_config():
                     current_config['transmission_thresholds'][key] = float(value)
 
         save_config(current_config)
+        if 'transmission_thresholds' in new_config or any(key in new_config for key in SENSOR_SETTINGS):
+            request_thresholds_push()
         return jsonify({"status": "success", "config": current_config})
 
     except Exception as e:
@@ -892,6 +952,8 @@ def reset_config():
     """Reset configuration to defaults"""
     try:
         save_config(DEFAULT_CONFIG.copy())
+        history.resize(DEFAULT_CONFIG["history_length"])
+        request_thresholds_push()
         return jsonify({"status": "success", "config": DEFAULT_CONFIG})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -975,6 +1037,9 @@ def apply_profile(name):
             profile = json.load(f)
 
         save_config(profile)
+        if 'history_length' in profile:
+            history.resize(int(profile['history_length']))
+        request_thresholds_push()
         return jsonify({"status": "success", "config": profile})
 
     except ValueError as e:
@@ -985,94 +1050,59 @@ def apply_profile(name):
 
 # ==================== Export API Endpoints ====================
 
-def filter_history_by_time(hist, start=None, end=None):
-    """Filter history data by time range (in seconds)"""
-    if not hist.get("Elapsed [s]"):
-        return hist
+def filter_history_matrix(hist, start=None, end=None):
+    """Whole session history as a (labels x rows) array, filtered by time range (in seconds)"""
+    if start is None and end is None:
+        return hist.matrix(include_spill=True)
+    # Binary search on Elapsed [s]; only the matching spilled rows are read
+    return hist.query(start, end, include_spill=True)
 
-    elapsed = hist["Elapsed [s]"]
-    if not elapsed:
-        return hist
 
-    # Determine indices within the time range
-    indices = []
-    for i, t in enumerate(elapsed):
-        if t is None:
-            continue
-        if start is not None and t < start:
-            continue
-        if end is not None and t > end:
-            continue
-        indices.append(i)
+def session_statistics(start=None, end=None):
+    """
+    Statistics of the history in a time range (in seconds) from history_stats:
+    merged block summaries, so only the rows at the range edges are read
+    """
+    if start is None and end is None:
+        return history_stats.summary()
+    return history_stats.range(start, end, history.rows)
 
-    # Build filtered history
-    filtered = {}
-    for key, values in hist.items():
-        filtered[key] = [values[i] for i in indices if i < len(values)]
 
-    return filtered
+def filter_history_by_time(hist, start=None, end=None):
+    """Filter the whole session history by time range (in seconds)"""
+    matrix = filter_history_matrix(hist, start, end)
+    return {key: HistoryStore.to_list(matrix[i]) for i, key in enumerate(hist.labels)}
 
 
 @app.route('/export/json', methods=['GET'])
 def export_json():
-    """Export current session data as JSON with metadata"""
+    """Export current session data as JSON with metadata (streamed; ?mode=pretty|compact|ndjson)"""
     global history
 
     start = request.args.get('start', type=float)
     end = request.args.get('end', type=float)
+    mode = request.args.get('mode', 'pretty')
+    if mode not in EXPORT_MODES:
+        return jsonify({"error": f"mode must be one of {', '.join(EXPORT_MODES)}"}), 400
 
     # Filter data by time range if specified
-    export_data = filter_history_by_time(history, start, end)
-
-    # Build metadata
-    elapsed = export_data.get("Elapsed [s]", [])
-    metadata = {
-        "export_timestamp": datetime.now().isoformat(),
-        "project": "TRITON",
-        "description": "Autonomous submarine sensor data",
-        "point_count": len(elapsed),
-        "time_range": {
-            "start": min(elapsed) if elapsed else None,
-            "end": max(elapsed) if elapsed else None,
-            "filter_applied": {
-                "start": start,
-                "end": end
-            } if start is not None or end is not None else None
-        },
-        "sensors": {
-            "BME280": ["Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]"],
-            "MPU6050": ["Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-                       "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
-        }
-    }
+    matrix = filter_history_matrix(history, start, end)
 
-    # Compute basic statistics for each sensor
-    statistics = {}
-    for key, values in export_data.items():
-        if key == "Elapsed [s]":
-            continue
-        numeric_values = [v for v in values if v is not None and isinstance(v, (int, float))]
-        if numeric_values:
-            statistics[key] = {
-                "min": min(numeric_values),
-                "max": max(numeric_values),
-                "avg": sum(numeric_values) / len(numeric_values),
-                "count": len(numeric_values)
-            }
-
-    output = {
-        "metadata": metadata,
-        "statistics": statistics,
-        "data": export_data
-    }
+    # Basic statistics for each sensor from the running accumulator
+    statistics = as_column_statistics(session_statistics(start, end))
+    elapsed = statistics.pop("Elapsed [s]", None)
+
+    metadata = export_metadata(matrix.shape[1], elapsed, start, end)
 
     # Generate filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"triton_export_{timestamp}.json"
+    extension = "ndjson" if mode == "ndjson" else "json"
+    filename = f"triton_export_{timestamp}.{extension}"
 
+    # Sent in chunks, the document is never built in memory as a whole
     response = Response(
-        json.dumps(output, indent=2),
-        mimetype='application/json',
+        stream_export(history.labels, matrix, metadata, statistics, mode),
+        mimetype='application/x-ndjson' if mode == "ndjson" else 'application/json',
         headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
     return response
@@ -1085,8 +1115,6 @@ def export_excel():
 
     try:
         import openpyxl
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-        from openpyxl.utils import get_column_letter
     except ImportError:
         return jsonify({"error": "openpyxl not installed. Run: pip install openpyxl"}), 500
 
@@ -1094,157 +1122,18 @@ def export_excel():
     end = request.args.get('end', type=float)
 
     # Filter data by time range if specified
-    export_data = filter_history_by_time(history, start, end)
-
-    # Create workbook
-    wb = openpyxl.Workbook()
-
-    # Define styles
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    matrix = filter_history_matrix(history, start, end)
+    statistics = as_column_statistics(session_statistics(start, end))
+    meta_data = metadata_rows(matrix.shape[1], statistics.get("Elapsed [s]"), start, end)
 
-    # Sheet 1: All Data
-    ws_data = wb.active
-    ws_data.title = "Sensor Data"
-
-    # Headers
-    headers = ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
-               "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-               "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
-
-    for col, header in enumerate(headers, 1):
-        cell = ws_data.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-
-    # Data rows
-    num_rows = len(export_data.get("Elapsed [s]", []))
-    for row_idx in range(num_rows):
-        for col_idx, header in enumerate(headers, 1):
-            values = export_data.get(header, [])
-            value = values[row_idx] if row_idx < len(values) else None
-            cell = ws_data.cell(row=row_idx + 2, column=col_idx, value=value)
-            cell.border = thin_border
-            if isinstance(value, float):
-                cell.number_format = '0.000'
-
-    # Auto-width columns
-    for col_idx, header in enumerate(headers, 1):
-        ws_data.column_dimensions[get_column_letter(col_idx)].width = max(len(header) + 2, 12)
-
-    # Sheet 2: BME280 Data
-    ws_bme = wb.create_sheet("BME280")
-    bme_headers = ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]"]
-    for col, header in enumerate(bme_headers, 1):
-        cell = ws_bme.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-
-    for row_idx in range(num_rows):
-        for col_idx, header in enumerate(bme_headers, 1):
-            values = export_data.get(header, [])
-            value = values[row_idx] if row_idx < len(values) else None
-            cell = ws_bme.cell(row=row_idx + 2, column=col_idx, value=value)
-            cell.border = thin_border
-            if isinstance(value, float):
-                cell.number_format = '0.000'
-
-    for col_idx, header in enumerate(bme_headers, 1):
-        ws_bme.column_dimensions[get_column_letter(col_idx)].width = max(len(header) + 2, 12)
-
-    # Sheet 3: MPU6050 Data
-    ws_mpu = wb.create_sheet("MPU6050")
-    mpu_headers = ["Elapsed [s]", "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-                   "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
-    for col, header in enumerate(mpu_headers, 1):
-        cell = ws_mpu.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-
-    for row_idx in range(num_rows):
-        for col_idx, header in enumerate(mpu_headers, 1):
-            values = export_data.get(header, [])
-            value = values[row_idx] if row_idx < len(values) else None
-            cell = ws_mpu.cell(row=row_idx + 2, column=col_idx, value=value)
-            cell.border = thin_border
-            if isinstance(value, float):
-                cell.number_format = '0.000'
-
-    for col_idx, header in enumerate(mpu_headers, 1):
-        ws_mpu.column_dimensions[get_column_letter(col_idx)].width = max(len(header) + 2, 12)
-
-    # Sheet 4: Statistics
-    ws_stats = wb.create_sheet("Statistics")
-    stats_headers = ["Metric", "Min", "Max", "Average", "Count"]
-    for col, header in enumerate(stats_headers, 1):
-        cell = ws_stats.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
-
-    row = 2
-    for key in headers[1:]:  # Skip Elapsed
-        values = export_data.get(key, [])
-        numeric_values = [v for v in values if v is not None and isinstance(v, (int, float))]
-        if numeric_values:
-            ws_stats.cell(row=row, column=1, value=key).border = thin_border
-            ws_stats.cell(row=row, column=2, value=min(numeric_values)).border = thin_border
-            ws_stats.cell(row=row, column=3, value=max(numeric_values)).border = thin_border
-            ws_stats.cell(row=row, column=4, value=sum(numeric_values) / len(numeric_values)).border = thin_border
-            ws_stats.cell(row=row, column=5, value=len(numeric_values)).border = thin_border
-            for c in range(2, 5):
-                ws_stats.cell(row=row, column=c).number_format = '0.000'
-            row += 1
-
-    for col_idx, header in enumerate(stats_headers, 1):
-        ws_stats.column_dimensions[get_column_letter(col_idx)].width = max(len(header) + 2, 18)
-
-    # Sheet 5: Metadata
-    ws_meta = wb.create_sheet("Metadata")
-    meta_data = [
-        ("Project", "TRITON"),
-        ("Description", "Autonomous submarine sensor data"),
-        ("Export Time", datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-        ("Data Points", num_rows),
-        ("Time Range Start", min(export_data.get("Elapsed [s]", [0])) if export_data.get("Elapsed [s]") else "N/A"),
-        ("Time Range End", max(export_data.get("Elapsed [s]", [0])) if export_data.get("Elapsed [s]") else "N/A"),
-        ("Filter Start", start if start is not None else "None"),
-        ("Filter End", end if end is not None else "None"),
-    ]
-
-    for row_idx, (label, value) in enumerate(meta_data, 1):
-        cell_label = ws_meta.cell(row=row_idx, column=1, value=label)
-        cell_label.font = Font(bold=True)
-        cell_label.border = thin_border
-        cell_value = ws_meta.cell(row=row_idx, column=2, value=value)
-        cell_value.border = thin_border
-
-    ws_meta.column_dimensions['A'].width = 20
-    ws_meta.column_dimensions['B'].width = 30
-
-    # Save to bytes buffer
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    # Written row by row (write-only workbook) to a temp file, then streamed from it
+    workbook = export_to_tempfile(history.labels, matrix, statistics, meta_data)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"triton_export_{timestamp}.xlsx"
 
     return Response(
-        buffer.getvalue(),
+        stream_file(workbook),
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
@@ -1256,12 +1145,7 @@ def export_pdf():
     global history
 
     try:
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter, landscape
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
+        import reportlab
     except ImportError:
         return jsonify({"error": "reportlab not installed. Run: pip install reportlab"}), 500
 
@@ -1269,174 +1153,11 @@ def export_pdf():
     end = request.args.get('end', type=float)
 
     # Filter data by time range if specified
-    export_data = filter_history_by_time(history, start, end)
+    matrix = filter_history_matrix(history, start, end)
 
-    # Create PDF buffer
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter),
-                           leftMargin=0.5*inch, rightMargin=0.5*inch,
-                           topMargin=0.5*inch, bottomMargin=0.5*inch)
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Title'],
-        fontSize=24,
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    heading_style = ParagraphStyle(
-        'Heading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor('#0066CC')
-    )
-    normal_style = styles['Normal']
-
-    elements = []
-
-    # Title
-    elements.append(Paragraph("TRITON Sensor Data Report", title_style))
-    elements.append(Spacer(1, 0.2*inch))
-
-    # Metadata section
-    elements.append(Paragraph("Report Information", heading_style))
-    elapsed = export_data.get("Elapsed [s]", [])
-    meta_data = [
-        ["Project:", "TRITON - Autonomous Submarine Navigation System"],
-        ["Export Date:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-        ["Data Points:", str(len(elapsed))],
-        ["Time Range:", f"{min(elapsed):.2f}s - {max(elapsed):.2f}s" if elapsed else "No data"],
-    ]
-    if start is not None or end is not None:
-        meta_data.append(["Filter Applied:", f"Start: {start if start else 'N/A'}, End: {end if end else 'N/A'}"])
-
-    meta_table = Table(meta_data, colWidths=[1.5*inch, 5*inch])
-    meta_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-    ]))
-    elements.append(meta_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # Statistics section
-    elements.append(Paragraph("Sensor Statistics", heading_style))
-
-    headers = ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
-               "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
-               "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
-
-    stats_data = [["Metric", "Min", "Max", "Average", "Std Dev"]]
-    for key in headers[1:]:  # Skip Elapsed
-        values = export_data.get(key, [])
-        numeric_values = [v for v in values if v is not None and isinstance(v, (int, float))]
-        if numeric_values:
-            avg = sum(numeric_values) / len(numeric_values)
-            variance = sum((x - avg) ** 2 for x in numeric_values) / len(numeric_values)
-            std_dev = variance ** 0.5
-            stats_data.append([
-                key,
-                f"{min(numeric_values):.3f}",
-                f"{max(numeric_values):.3f}",
-                f"{avg:.3f}",
-                f"{std_dev:.3f}"
-            ])
-
-    stats_table = Table(stats_data, colWidths=[2.5*inch, 1.3*inch, 1.3*inch, 1.3*inch, 1.3*inch])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-    ]))
-    elements.append(stats_table)
-    elements.append(Spacer(1, 0.3*inch))
-
-    # BME280 Data Table (first 50 rows as sample)
-    elements.append(PageBreak())
-    elements.append(Paragraph("BME280 Environmental Data (Sample)", heading_style))
-
-    bme_headers = ["Elapsed [s]", "Temp [C]", "Humidity [%]", "Pressure [hPa]", "Altitude [m]"]
-    bme_data = [bme_headers]
-    num_rows = min(50, len(export_data.get("Elapsed [s]", [])))
-    for i in range(num_rows):
-        row = [
-            f"{export_data.get('Elapsed [s]', [])[i]:.2f}" if i < len(export_data.get('Elapsed [s]', [])) else "",
-            f"{export_data.get('Temp_BME280 [°C]', [])[i]:.2f}" if i < len(export_data.get('Temp_BME280 [°C]', [])) and export_data.get('Temp_BME280 [°C]', [])[i] is not None else "",
-            f"{export_data.get('Hum [%]', [])[i]:.1f}" if i < len(export_data.get('Hum [%]', [])) and export_data.get('Hum [%]', [])[i] is not None else "",
-            f"{export_data.get('Press [hPa]', [])[i]:.1f}" if i < len(export_data.get('Press [hPa]', [])) and export_data.get('Press [hPa]', [])[i] is not None else "",
-            f"{export_data.get('Alt [m]', [])[i]:.1f}" if i < len(export_data.get('Alt [m]', [])) and export_data.get('Alt [m]', [])[i] is not None else "",
-        ]
-        bme_data.append(row)
-
-    bme_table = Table(bme_data, colWidths=[1.2*inch, 1.2*inch, 1.2*inch, 1.4*inch, 1.2*inch])
-    bme_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-    ]))
-    elements.append(bme_table)
-
-    if len(export_data.get("Elapsed [s]", [])) > 50:
-        elements.append(Spacer(1, 0.1*inch))
-        elements.append(Paragraph(f"<i>Showing first 50 of {len(export_data.get('Elapsed [s]', []))} data points. Use Excel or JSON export for complete data.</i>", normal_style))
-
-    # MPU6050 Data Table (first 50 rows as sample)
-    elements.append(PageBreak())
-    elements.append(Paragraph("MPU6050 Inertial Data (Sample)", heading_style))
-
-    mpu_headers = ["Time [s]", "Acc X", "Acc Y", "Acc Z", "Gyro X", "Gyro Y", "Gyro Z", "Temp [C]"]
-    mpu_data = [mpu_headers]
-    for i in range(num_rows):
-        row = [
-            f"{export_data.get('Elapsed [s]', [])[i]:.2f}" if i < len(export_data.get('Elapsed [s]', [])) else "",
-            f"{export_data.get('Acc x [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc x [m/s²]', [])) and export_data.get('Acc x [m/s²]', [])[i] is not None else "",
-            f"{export_data.get('Acc y [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc y [m/s²]', [])) and export_data.get('Acc y [m/s²]', [])[i] is not None else "",
-            f"{export_data.get('Acc z [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc z [m/s²]', [])) and export_data.get('Acc z [m/s²]', [])[i] is not None else "",
-            f"{export_data.get('Gyro x [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro x [°/s]', [])) and export_data.get('Gyro x [°/s]', [])[i] is not None else "",
-            f"{export_data.get('Gyro y [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro y [°/s]', [])) and export_data.get('Gyro y [°/s]', [])[i] is not None else "",
-            f"{export_data.get('Gyro z [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro z [°/s]', [])) and export_data.get('Gyro z [°/s]', [])[i] is not None else "",
-            f"{export_data.get('Temp_MPU [°C]', [])[i]:.1f}" if i < len(export_data.get('Temp_MPU [°C]', [])) and export_data.get('Temp_MPU [°C]', [])[i] is not None else "",
-        ]
-        mpu_data.append(row)
-
-    mpu_table = Table(mpu_data, colWidths=[0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch])
-    mpu_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-    ]))
-    elements.append(mpu_table)
-
-    if len(export_data.get("Elapsed [s]", [])) > 50:
-        elements.append(Spacer(1, 0.1*inch))
-        elements.append(Paragraph(f"<i>Showing first 50 of {len(export_data.get('Elapsed [s]', []))} data points. Use Excel or JSON export for complete data.</i>", normal_style))
-
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
+    write_pdf_report(buffer, history.labels, matrix, start, end,
+                     statistics=as_column_statistics(session_statistics(start, end), std=True))
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"triton_report_{timestamp}.pdf"
@@ -1448,6 +1169,120 @@ def export_pdf():
     )
 
 
+def history_version(start=None, end=None):
+    """Identifies the rows in a time range: changes when rows are added to it or the data is cleared"""
+    if start is None and end is None:
+        return (history.epoch, history.appended)
+    spill_rows, ring_rows = history.time_range(start, end, include_spill=True)
+    return (history.epoch, range_length(spill_rows) + range_length(ring_rows))
+
+
+def export_job_view(job):
+    """Job dict as returned by the API (without the server-side path)"""
+    view = {key: value for key, value in job.items() if key != "path"}
+    view["url"] = f"/export/jobs/{job['id']}"
+    return view
+
+
+@app.route('/export/jobs', methods=['POST'])
+def create_export_job():
+    """
+    Start a background export: {"format": "json|ndjson|excel|pdf", "start": s, "end": s}
+
+    Returns the job (202). An identical request for unchanged data returns the
+    finished file's job right away ("cached": true).
+    """
+    params = request.get_json(silent=True) or request.args
+    fmt = params.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        start = float(params['start']) if params.get('start') not in (None, '') else None
+        end = float(params['end']) if params.get('end') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "start and end must be numbers"}), 400
+
+    # Same statistics as the synchronous /export/* endpoints: the running ones (history_stats)
+    job = exports.submit(fmt, history.labels, lambda: filter_history_matrix(history, start, end),
+                         start, end, version=history_version(start, end),
+                         statistics=lambda: as_column_statistics(session_statistics(start, end), std=(fmt == "pdf")))
+    return jsonify(export_job_view(job)), 202
+
+
+@app.route('/export/jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    """Job progress while it runs, then the file itself (?status=1 always returns the job)"""
+    job = exports.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired export job"}), 404
+    if job["status"] == "error":
+        return jsonify(export_job_view(job)), 500
+    if job["status"] != "done":
+        return jsonify(export_job_view(job)), 202
+    if request.args.get('status'):
+        return jsonify(export_job_view(job))
+
+    extension, mimetype = EXPORT_FORMATS[job["format"]]
+    prefix = "triton_report" if job["format"] == "pdf" else "triton_export"
+    timestamp = datetime.fromtimestamp(job["created"]).strftime("%Y%m%d_%H%M%S")
+    return send_from_directory(EXPORT_DIR, os.path.basename(job["path"]), as_attachment=True,
+                               download_name=f"{prefix}_{timestamp}{extension}", mimetype=mimetype)
+
+
+# ==================== Statistics API Endpoint ====================
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Statistics of the history in a time range (in seconds).
+
+    Per column: count, min, max, mean, std and slope (regression over the
+    range, per second). ?window=<s> adds the same per time window.
+
+    ?method=running (default for the whole session) answers from the block
+    summaries kept at ingest: percentiles (p25, median, p75, p95) are t-digest
+    estimates and only given for the whole session, there is no rate.
+    ?method=exact sorts the rows with NumPy: exact percentiles everywhere plus
+    rate (slope of the last 5 rows). ?scope=live (always exact) limits the
+    rows to the ones /data serves, as shown by the dashboard panel.
+    """
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+    window = request.args.get('window', type=float)
+    scope = request.args.get('scope', 'session')
+    if scope not in ("session", "live"):
+        return jsonify({"error": "scope must be session or live"}), 400
+    method = request.args.get('method', 'running' if scope == "session" else 'exact')
+    if method not in ("running", "exact") or (method == "running" and scope == "live"):
+        return jsonify({"error": "method must be running (scope=session only) or exact"}), 400
+
+    try:
+        if method == "running":
+            statistics = session_statistics(start, end)
+            windows = history_stats.windows(window, history.rows, start, end) if window is not None else None
+        else:
+            matrix = history.query(start, end, include_spill=(scope == "session"), copy=False)
+            statistics = describe(history.labels, matrix)
+            windows = window_statistics(history.labels, matrix, window) if window is not None else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    elapsed = statistics.get("Elapsed [s]")
+    result = {
+        "method": method,
+        "rows": elapsed["count"] if elapsed else 0,
+        "time_range": {
+            "start": elapsed["min"] if elapsed else None,
+            "end": elapsed["max"] if elapsed else None,
+            "filter_applied": {"start": start, "end": end} if start is not None or end is not None else None
+        },
+        "statistics": statistics
+    }
+    if windows is not None:
+        result["windows"] = windows
+    return jsonify(result)
+
+
 # ==================== Motor Control API Endpoints ====================
 
 import serial
@@ -1463,130 +1298,208 @@ motor_state = {
     "last_ack_time": None
 }
 motor_lock = threading.Lock()
+motor_ack = threading.Condition(motor_lock)  # Notified on every throttle ACK
 
-# LoRa serial connection for commands (shared with receiver)
-lora_serial = None
-lora_lock = threading.Lock()
 
-# Continuous transmission thread
+def publish_motor_status():
+    """Push the current motor state to live dashboards"""
+    with motor_lock:
+        snapshot = dict(motor_state)
+    events.publish("motor", snapshot)
+
+
+def mark_lora_connected():
+    """Flag the link as connected once the first sensor line arrives"""
+    with motor_lock:
+        changed = motor_state["status"] == "disconnected"
+        if changed:
+            motor_state["status"] = "connected"
+    if changed:
+        publish_motor_status()
+
+# Text lines (ACKs, CSV) and binary telemetry frames share the port
+telemetry_codec = TelemetryCodec()
+telemetry_decoder = DeltaDecoder(telemetry_codec)
+
+# The Pi's delta telemetry uses the config's transmission_thresholds; they are
+# sent (CMD:THRESHOLDS, with the BME280's sea_level_pressure and profile) at
+# startup, on config changes and after a Pi restart, and repeated until the Pi
+# acknowledges them
+THRESHOLDS_RESEND_INTERVAL = 5.0
+threshold_push = {"pending": True, "sent_at": 0.0, "acked_at": None, "pi_elapsed": None}
+
+# Continuous transmission thread (schedules commands, the link writes them)
 motor_tx_thread = None
 motor_tx_running = False
+motor_tx_wakeup = threading.Event()
 
 LORA_COM_PORT = 'COM8'
 LORA_BAUD_RATE = 9600
-MOTOR_TX_INTERVAL_FAST = 0.15  # When actively changing throttle
-MOTOR_TX_INTERVAL_SLOW = 2.0   # When throttle is stable (allow sensor data through)
-MOTOR_ACTIVE_DURATION = 3.0    # Stay in fast mode for 3 seconds after throttle change
+MOTOR_HEARTBEAT_INTERVAL = 2.0  # Repeat a confirmed throttle this often (Pi failsafe)
+MOTOR_ACK_TIMEOUT = 1.0         # Retry a throttle command without ACK after this long (> one superframe)
+MOTOR_MAX_RETRIES = 10          # Then only the heartbeat repeats it
 
+# Sequence numbers of everything sent (CMD:...:<seq>, echoed in the ACK),
+# the in-flight table and the round-trip time histogram
+command_tracker = CommandTracker(MOTOR_ACK_TIMEOUT, MOTOR_MAX_RETRIES)
+throttle_policy = {"ack_timeout": MOTOR_ACK_TIMEOUT, "max_retries": MOTOR_MAX_RETRIES}
 
-def init_lora_serial():
-    """Initialize LoRa serial connection for sending commands."""
-    global lora_serial
-    import sys
-    try:
-        if lora_serial is None or not lora_serial.is_open:
-            lora_serial = serial.Serial(LORA_COM_PORT, LORA_BAUD_RATE, timeout=0.1)
-            print(f"[INFO] LoRa serial initialized on {LORA_COM_PORT}", flush=True)
-            return True
-        else:
-            return True  # Already open
-    except Exception as e:
-        print(f"[WARN] Could not initialize LoRa serial: {e}", flush=True)
-        lora_serial = None  # Reset to ensure retry
-        return False
+# Airtime is split into superframes (airtime.py): beacon, downlink slot for
+# our commands, uplink slot for the Pi's ACKs and telemetry
+slot_planner = SlotPlanner()
+lora_slots = {"plan": None, "pi_backlog": 0.0, "backlog_at": None}
+
+
+def open_lora_port():
+    """Open the LoRa serial port (called by the link's reader thread, also to reconnect)."""
+    return serial.Serial(LORA_COM_PORT, LORA_BAUD_RATE, timeout=0.1)
+
+
+def handle_lora_message(kind, message):
+    """Dispatch one line or frame from the LoRa link (runs on its reader thread)."""
+    if kind == "frame":
+        try:
+            frame_type, seq, payload = unpack_frame(message)
+        except FrameError as e:
+            link_metrics.parse_error(e.reason)
+            print(f"[LORA-RX] Dropped frame: {e}")
+            return
+        if frame_type not in (TYPE_TELEMETRY, TYPE_DELTA):
+            backlog = backlog_of(message)
+            if backlog is not None:
+                lora_slots["pi_backlog"] = backlog
+                lora_slots["backlog_at"] = time.time()
+        # A duplicate would break the delta chain; only new frames are decoded
+        elif link_metrics.sequence(seq, keyframe_elapsed(frame_type, payload)) and process_sensor_frame(message):
+            mark_lora_connected()
+        return
+
+    line = message.strip()
+    if not line:
+        return
+    print(f"[LORA-RX] {line}", flush=True)
+
+    # Check if it's an acknowledgment
+    if line.startswith("ACK:"):
+        process_ack(line)
+
+    # Check if it's sensor data (starts with timestamp)
+    elif "," in line and not line.startswith("CMD:"):
+        if process_sensor_data(line):
+            mark_lora_connected()
+
+
+# One I/O engine owns the port: blocking reader thread, prioritized TX queue;
+# throughput and link quality go into link_metrics (/lora/metrics, /metrics)
+link_metrics = LinkMetrics()
+lora_link = SerialLink(open_lora_port, handle_lora_message, name="LORA", metrics=link_metrics)
+
+
+def request_thresholds_push():
+    """Send the configured transmission_thresholds to the Pi with the next command cycle."""
+    threshold_push["pending"] = True
+    threshold_push["sent_at"] = 0.0
+    motor_tx_wakeup.set()
+
+
+def pending_thresholds_command():
+    """CMD:THRESHOLDS line if a push is pending and due, else None."""
+    if not threshold_push["pending"] or time.time() - threshold_push["sent_at"] < THRESHOLDS_RESEND_INTERVAL:
+        return None
+    config = load_config()
+    thresholds = config.get("transmission_thresholds", DEFAULT_CONFIG["transmission_thresholds"])
+    settings = {key: config.get(key, DEFAULT_CONFIG[key]) for key in SENSOR_SETTINGS}
+    threshold_push["sent_at"] = time.time()
+    # Resent by the pending flag above, not by the tracker's retries
+    command = command_tracker.send("THRESHOLDS", len(thresholds), key="thresholds",
+                                   ack_timeout=THRESHOLDS_RESEND_INTERVAL, max_retries=0)
+    return with_sequence(threshold_command(thresholds, settings), command.seq) + "\n"
+
+
+def thresholds_acknowledged(ok):
+    """ACK:THRESHOLDS from the Pi; a FAIL is retried."""
+    if ok:
+        threshold_push["pending"] = False
+        threshold_push["acked_at"] = datetime.now().isoformat()
+    print(f"[LORA-RX] Thresholds {'acknowledged' if ok else 'rejected'} by Pi", flush=True)
 
 
 def motor_transmit_loop():
-    """Background thread that transmits throttle and receives sensor data."""
-    global motor_state, motor_tx_running, lora_serial
+    """
+    Background thread that runs the LoRa superframes: each one starts with a
+    beacon, followed by the commands due (the downlink slot); the rest of the
+    superframe belongs to the Pi.
+    """
+    global motor_tx_running
 
     print("[MOTOR-TX] Transmission thread started", flush=True)
 
-    last_throttle_change = 0
     last_target = 0
+    last_sent = 0
+
+    def throttle_command(target, attempt):
+        command = command_tracker.send("THROTTLE", target, key="throttle", attempt=attempt, **throttle_policy)
+        return with_sequence(f"CMD:THROTTLE:{target}", command.seq) + "\n"
 
     while motor_tx_running:
         try:
-            if init_lora_serial():
+            expired = [c for c in command_tracker.expired() if c.key == "throttle"]
+            with motor_lock:
+                target = motor_state["target_throttle"]
+                confirmed = motor_state["confirmed_throttle"]
+            now = time.time()
+
+            # New target at once, a retry when its ACK timed out, heartbeat otherwise
+            attempt = None
+            if target != last_target:
+                attempt = 1
+            elif expired and target != confirmed:
+                if expired[0].retries_left:
+                    attempt = expired[0].attempt + 1
+                else:
+                    print(f"[MOTOR-TX] THROTTLE:{target} unacknowledged after {expired[0].attempt} attempts",
+                          flush=True)
+            if attempt is None and command_tracker.in_flight("throttle") is None \
+                    and now - last_sent >= MOTOR_HEARTBEAT_INTERVAL:
+                attempt = 1
+
+            commands = []
+            if attempt is not None:
+                priority = PRIORITY_URGENT if target == 0 else PRIORITY_COMMAND
+                commands.append((throttle_command(target, attempt), priority, "throttle"))
+                last_target, last_sent = target, now
+            thresholds = pending_thresholds_command()
+            if thresholds:
+                commands.append((thresholds, PRIORITY_CONFIG, "thresholds"))
+
+            plan = slot_planner.next_plan([len(data) for data, _, _ in commands], lora_slots["pi_backlog"])
+            lora_slots["plan"] = plan
+            lora_link.send(plan.beacon(), PRIORITY_URGENT, key="beacon")
+            for data, priority, key in commands:
+                lora_link.send(data, priority, key=key)
+
+            # Sit out the Pi's slot; only a stop is sent without waiting for the next beacon
+            deadline = now + plan.superframe
+            while motor_tx_running and motor_tx_wakeup.wait(max(0.0, deadline - time.time())):
+                motor_tx_wakeup.clear()
                 with motor_lock:
-                    target = motor_state["target_throttle"]
-                    last_change_time = motor_state.get("last_command_time")
-
-                # Detect throttle changes
-                if target != last_target:
-                    last_throttle_change = time.time()
-                    last_target = target
-
-                # Determine if we're in active mode (recent throttle change)
-                time_since_change = time.time() - last_throttle_change
-                is_active = time_since_change < MOTOR_ACTIVE_DURATION
-
-                with lora_lock:
-                    # Only send command if in active mode OR as periodic heartbeat
-                    if is_active or time_since_change % MOTOR_TX_INTERVAL_SLOW < 0.2:
-                        command = f"CMD:THROTTLE:{target}\n"
-                        lora_serial.write(command.encode())
-                        lora_serial.flush()
-
-                    # Listen for incoming data (sensor data + ACKs)
-                    # Longer listen window when not actively sending
-                    listen_time = 0.1 if is_active else 0.5
-                    listen_end = time.time() + listen_time
-
-                    while time.time() < listen_end:
-                        if lora_serial.in_waiting:
-                            line = lora_serial.readline().decode(errors='ignore').strip()
-                            if not line:
-                                continue
-
-                            print(f"[LORA-RAW] {line}", flush=True)
-
-                            if line.startswith("ACK:"):
-                                # Process motor acknowledgment
-                                parts = line.split(":")
-                                if len(parts) >= 4:
-                                    try:
-                                        actual = int(parts[2])
-                                        with motor_lock:
-                                            motor_state["confirmed_throttle"] = actual
-                                            motor_state["throttle"] = actual
-                                            motor_state["last_ack_time"] = datetime.now().isoformat()
-                                            motor_state["status"] = "running" if actual > 0 else "stopped"
-                                    except ValueError:
-                                        pass
-                            elif "," in line and not line.startswith("CMD:"):
-                                # Process sensor data
-                                print(f"[LORA-RX] Sensor data received", flush=True)
-                                process_sensor_data(line)
-                                with motor_lock:
-                                    if motor_state["status"] == "disconnected":
-                                        motor_state["status"] = "connected"
-                        else:
-                            time.sleep(0.02)  # Brief sleep if no data
-
-                # Sleep interval depends on mode
-                sleep_time = MOTOR_TX_INTERVAL_FAST if is_active else MOTOR_TX_INTERVAL_SLOW
-                time.sleep(sleep_time)
+                    stopping = motor_state["target_throttle"] == 0 and last_target != 0
+                if stopping:
+                    lora_link.send(throttle_command(0, 1), PRIORITY_URGENT, key="throttle")
+                    last_target, last_sent = 0, time.time()
 
         except Exception as e:
             print(f"[MOTOR-TX] Error: {e}")
-            # Reset serial connection on error
-            with lora_lock:
-                try:
-                    if lora_serial:
-                        lora_serial.close()
-                except:
-                    pass
-                lora_serial = None
             time.sleep(0.5)
 
     print("[MOTOR-TX] Continuous transmission thread stopped")
 
 
 def start_motor_tx_thread():
-    """Start the continuous motor command transmission thread."""
+    """Start the continuous motor command transmission thread (and the LoRa link)."""
     global motor_tx_thread, motor_tx_running
 
+    lora_link.start()
     if motor_tx_thread and motor_tx_thread.is_alive():
         return
 
@@ -1599,6 +1512,7 @@ def stop_motor_tx_thread():
     """Stop the continuous motor command transmission thread."""
     global motor_tx_running
     motor_tx_running = False
+    motor_tx_wakeup.set()
 
 
 def set_target_throttle(value):
@@ -1610,21 +1524,46 @@ def set_target_throttle(value):
     with motor_lock:
         motor_state["target_throttle"] = value
         motor_state["last_command_time"] = datetime.now().isoformat()
+    publish_motor_status()
+    motor_tx_wakeup.set()
 
     print(f"[MOTOR] Target throttle set to {value}%")
     return True
 
 
-# Legacy function for compatibility
-def send_motor_command(command_type, value=0, wait_for_ack=True, max_retries=10, ack_timeout=2.0):
-    """Send motor command - now uses continuous transmission approach."""
+def send_motor_command(command_type, value=0, wait_for_ack=False, max_retries=MOTOR_MAX_RETRIES,
+                       ack_timeout=MOTOR_ACK_TIMEOUT):
+    """
+    Send motor command - sets the target, which the transmit loop sends
+    (sequence-numbered, retried every `ack_timeout` up to `max_retries`
+    times) until the Pi confirms it.
+
+    With `wait_for_ack`, blocks until the Pi confirmed the value or the
+    retries are used up.
+    """
     if command_type == "THROTTLE":
-        set_target_throttle(value)
-        return True, "Target set"
+        message = "Target set"
     elif command_type in ["STOP", "ESTOP"]:
-        set_target_throttle(0)
-        return True, "Stop commanded"
-    return False, "Unknown command"
+        value, message = 0, "Stop commanded"
+    else:
+        return False, "Unknown command"
+
+    throttle_policy.update(ack_timeout=ack_timeout, max_retries=max_retries)
+    set_target_throttle(value)
+    if not wait_for_ack:
+        return True, message
+
+    value = max(0, min(100, value))
+    with motor_ack:
+        confirmed = motor_ack.wait_for(
+            lambda: motor_state["confirmed_throttle"] == value or motor_state["target_throttle"] != value,
+            ack_timeout * (max_retries + 1))
+        superseded = motor_state["target_throttle"] != value
+    if superseded:
+        return False, "Superseded by a newer command"
+    if not confirmed:
+        return False, f"No ACK after {max_retries + 1} attempts"
+    return True, "Confirmed"
 
 
 # Start continuous transmission on module load
@@ -1635,7 +1574,9 @@ start_motor_tx_thread()
 def get_motor_status():
     """Get current motor status."""
     with motor_lock:
-        return jsonify(motor_state)
+        status = dict(motor_state)
+    status["commands"] = command_tracker.snapshot()
+    return jsonify(status)
 
 
 @app.route('/motor/throttle', methods=['POST'])
@@ -1707,20 +1648,56 @@ LABELS = [
 ]
 MIN_COLUMNS = len(LABELS) + 1
 
-lora_receiver_running = False
-lora_receiver_thread = None
-
 
 def process_sensor_data(line):
-    """Process incoming sensor data from Pi."""
-    global latest_data, history
-
+    """Process an incoming CSV sensor line from Pi (text telemetry)."""
     fields = line.split(",")
     if len(fields) < MIN_COLUMNS:
+        link_metrics.parse_error("short_line")
+        return False
+    try:
+        link_metrics.arrival(float(fields[1]))
+    except ValueError:
+        link_metrics.arrival(None)
+    return store_sensor_values(fields[0], fields[1:])
+
+
+def keyframe_elapsed(frame_type, payload):
+    """Elapsed of a full telemetry frame (how link_metrics notices a Pi restart), None for deltas."""
+    if frame_type != TYPE_TELEMETRY:
+        return None
+    try:
+        _, packed = telemetry_codec.unpack(payload)
+    except FrameError:
+        return None
+    return telemetry_codec.unscale(packed)[0]
+
+
+def process_sensor_frame(frame):
+    """Process an incoming binary telemetry frame from Pi (see lora_frame.py)."""
+    try:
+        telemetry = telemetry_decoder.decode(frame)
+    except FrameError as e:
+        link_metrics.parse_error(e.reason)
+        print(f"[LORA-RX] Dropped frame: {e}")
         return False
 
-    timestamp_str = fields[0]
-    values = fields[1:]
+    # Elapsed going backwards: the Pi restarted with its default thresholds
+    elapsed = telemetry.values[0]
+    link_metrics.arrival(elapsed)
+    if elapsed is not None:
+        if threshold_push["pi_elapsed"] is not None and elapsed < threshold_push["pi_elapsed"]:
+            request_thresholds_push()
+        threshold_push["pi_elapsed"] = elapsed
+
+    # Missing readings arrive as None; show them like the Pi's "Error" text
+    values = ["Error" if value is None else value for value in telemetry.values]
+    return store_sensor_values(telemetry.timestamp, values)
+
+
+def store_sensor_values(timestamp_str, values):
+    """Update latest_data and the history with one sample (values in LABELS order)."""
+    global latest_data
 
     try:
         # Update latest_data
@@ -1737,21 +1714,7 @@ def process_sensor_data(line):
 
         # Update history for charts
         elapsed = float(values[0]) if values else 0
-        history["Elapsed [s]"].append(elapsed)
-
-        for key in history:
-            if key != "Elapsed [s]":
-                try:
-                    idx = LABELS.index(key)
-                    if idx < len(values):
-                        history[key].append(float(values[idx]))
-                    else:
-                        history[key].append(None)
-                except (ValueError, IndexError):
-                    history[key].append(None)
-
-        # Write to recording if active
-        append_recording_data(data_dict, timestamp_str)
+        ingest_row([elapsed] + values[1:len(LABELS)], data_dict, timestamp_str)
 
         return True
 
@@ -1764,105 +1727,109 @@ def process_ack(line):
     """Process acknowledgment from Pi motor controller."""
     global motor_state
 
-    # Format: ACK:<type>:<value>:<status>
+    # Format: ACK:<type>:<value>:<status>[:<seq>]
+    line, seq = split_sequence(line)
+    if seq is not None:
+        command, rtt = command_tracker.ack(seq)
+        if command is not None:
+            print(f"[LORA-RX] ACK #{seq} ({command.command_type}, attempt {command.attempt}) "
+                  f"RTT {rtt * 1000:.0f} ms", flush=True)
     parts = line.split(":")
     if len(parts) >= 4:
         cmd_type = parts[1]
         value = parts[2]
         status = parts[3]
 
+        if cmd_type == "THRESHOLDS":
+            thresholds_acknowledged(status == "OK")
+            return
+
         with motor_lock:
             motor_state["last_ack_time"] = datetime.now().isoformat()
+            try:
+                actual = int(value)
+                motor_state["confirmed_throttle"] = actual
+                motor_state["throttle"] = actual
+                motor_state["status"] = "running" if actual > 0 else "stopped"
+                motor_ack.notify_all()
+            except ValueError:
+                pass
 
             if status == "OK":
                 print(f"[LORA-RX] ACK received: {cmd_type}={value} OK")
             else:
                 print(f"[LORA-RX] ACK received: {cmd_type}={value} FAILED")
 
-
-def lora_receiver_loop():
-    """Background thread that receives data from LoRa."""
-    global lora_receiver_running, motor_state, lora_serial
-
-    print("[LORA-RX] Receiver thread started")
-
-    while lora_receiver_running:
-        try:
-            if not init_lora_serial():
-                time.sleep(2)
-                continue
-
-            with lora_lock:
-                if lora_serial and lora_serial.is_open and lora_serial.in_waiting:
-                    line = lora_serial.readline().decode(errors='ignore').strip()
-                else:
-                    line = None
-
-            if line:
-                print(f"[LORA-RX] {line}")
-
-                # Check if it's an acknowledgment
-                if line.startswith("ACK:"):
-                    process_ack(line)
-
-                # Check if it's sensor data (starts with timestamp)
-                elif "," in line and not line.startswith("CMD:"):
-                    if process_sensor_data(line):
-                        with motor_lock:
-                            if motor_state["status"] == "disconnected":
-                                motor_state["status"] = "connected"
-
-            time.sleep(0.05)  # Small delay to prevent CPU hogging
-
-        except Exception as e:
-            print(f"[LORA-RX] Error: {e}")
-            # Reset serial connection on error
-            with lora_lock:
-                try:
-                    if lora_serial:
-                        lora_serial.close()
-                except:
-                    pass
-                lora_serial = None
-            time.sleep(1)
-
-    print("[LORA-RX] Receiver thread stopped")
+        publish_motor_status()
 
 
 def start_lora_receiver():
-    """Start the LoRa receiver background thread."""
-    global lora_receiver_running, lora_receiver_thread
-
-    if lora_receiver_thread and lora_receiver_thread.is_alive():
+    """Start the LoRa link (reader and writer threads)."""
+    if lora_link.running:
         print("[LORA-RX] Receiver already running")
         return
-
-    lora_receiver_running = True
-    lora_receiver_thread = threading.Thread(target=lora_receiver_loop, daemon=True)
-    lora_receiver_thread.start()
-    print("[LORA-RX] Started LoRa receiver thread")
+    lora_link.start()
 
 
 def stop_lora_receiver():
-    """Stop the LoRa receiver background thread."""
-    global lora_receiver_running
-
-    lora_receiver_running = False
+    """Stop the LoRa link and close the port."""
     print("[LORA-RX] Stopping receiver thread...")
+    lora_link.stop()
 
 
 @app.route('/lora/status', methods=['GET'])
 def get_lora_status():
     """Get LoRa connection status."""
-    connected = lora_serial is not None and lora_serial.is_open
     return jsonify({
-        "connected": connected,
+        "connected": lora_link.connected,
         "port": LORA_COM_PORT,
         "baud": LORA_BAUD_RATE,
-        "receiver_running": lora_receiver_running
+        "receiver_running": lora_link.running,
+        "link": lora_link.stats(),
+        "thresholds_pending": threshold_push["pending"],
+        "thresholds_acked_at": threshold_push["acked_at"],
+        "commands": command_tracker.snapshot(),
+        "slots": {
+            "plan": lora_slots["plan"].as_dict() if lora_slots["plan"] else None,
+            "pi_backlog_s": lora_slots["pi_backlog"],
+            "pi_backlog_at": lora_slots["backlog_at"]
+        }
     })
 
 
+def lora_gauges(commands):
+    """Queue depths and link state for the metrics endpoints."""
+    link = lora_link.stats()
+    plan = lora_slots["plan"]
+    return {"connected": int(link["connected"]),
+            "tx_queue_depth": link["queued"],
+            "commands_in_flight": len(commands["in_flight"]),
+            "pi_backlog_seconds": lora_slots["pi_backlog"],
+            "superframe_seconds": round(plan.superframe, 4) if plan else 0.0}
+
+
+@app.route('/lora/metrics', methods=['GET'])
+def get_lora_metrics():
+    """
+    LoRa throughput and link quality (link_metrics.py) as JSON, or in the
+    Prometheus text format with ?format=prometheus (also served at /metrics).
+    """
+    if request.args.get('format') == 'prometheus':
+        return get_prometheus_metrics()
+    commands = command_tracker.snapshot()
+    result = link_metrics.snapshot(lora_gauges(commands))
+    result["command_rtt"] = commands["rtt"]
+    return jsonify(result)
+
+
+@app.route('/metrics', methods=['GET'])
+def get_prometheus_metrics():
+    """Prometheus scrape endpoint for the LoRa link metrics."""
+    commands = command_tracker.snapshot()
+    text = link_metrics.prometheus(lora_gauges(commands), {"command_rtt_ms": commands["rtt"]})
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/lora/start', methods=['POST'])
 def start_lora():
     """Start LoRa receiver."""
@@ -1878,18 +1845,14 @@ def stop_lora():
 
 
 def cleanup():
-    global lora_serial
+    # Final flush of an active recording
+    close_recording_writer()
 
-    # Stop LoRa receiver thread
-    stop_lora_receiver()
+    # Stop export workers
+    exports.shutdown()
 
-    # Close LoRa serial if open
-    try:
-        if lora_serial and lora_serial.is_open:
-            lora_serial.close()
-            print("[INFO] LoRa serial closed")
-    except Exception as e:
-        print(f"[WARN] Error closing LoRa serial: {e}")
+    # Stop the LoRa link (closes the serial port)
+    stop_lora_receiver()
 
     try:
         if platform.system() == "Windows":
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+TRITON BME280 - Forced-mode reader with cached compensation
+
+test.py read the BME280 through adafruit_bme280 as four properties:
+temperature, humidity, pressure and altitude. Each one reads its own
+registers and runs its own compensation, and humidity, pressure and
+altitude read and compensate the temperature again (t_fine). That is seven
+I2C reads per row, and the values come from different conversions of the
+free-running sensor. Here one call does one conversion:
+
+- read() writes ctrl_meas with forced mode (one conversion, then sleep),
+  waits the typical measurement time of the profile, polls the status
+  register until it's done and burst-reads the 8 data registers
+  (0xF7..0xFE) in one transaction: 3 transactions instead of 7. With
+  `pipelined=True` the next conversion starts right after each read, so
+  at 10 Hz a read never waits (the values are one read interval old)
+- the calibration words are read once and folded into precomputed
+  floating-point coefficients (the datasheet's double-precision formulas
+  with their constant divisions taken out), so a conversion is a handful of
+  multiplies
+- temperature, humidity and pressure belong to the same conversion. The
+  altitude comes from that same pressure and `sea_level_pressure`, which
+  the ground station pushes from its config
+- PROFILES trade latency against noise: oversampling per channel and the
+  IIR filter. On the simulated bus "fast" takes 9 ms per read with about
+  55 cm altitude noise and "low_noise" 41 ms with 3 cm, but its filter
+  needs some 36 reads to follow a step. set_profile() takes effect at the
+  next read(), so it can be called from another thread than the one reading
+- SimulatedBus is a fake bus for benchmarks and tests: calibration
+  registers, raw values that drift with noise shrinking by oversampling,
+  the chip's IIR filter, the measuring flag and a cost per transaction
+
+Values: °C, %, hPa and m, in test.py's SENSOR_COLUMNS order.
+
+Usage (benchmark):
+    # Property-style reads vs. one forced conversion, then noise and step response per profile
+    python3 bme280_driver.py [--reads 300]
+"""
+
+import math
+import random
+import struct
+import time
+
+ADDRESS = 0x76
+CHIP_ID = 0x60
+DEFAULT_SEA_LEVEL_PRESSURE = 1013.25    # hPa, until the ground station sends its config
+
+# Registers
+CALIB_TP = 0x88             # 0x88..0xA1: dig_T1..dig_P9, dig_H1
+REG_CHIP_ID = 0xD0
+REG_RESET = 0xE0
+CALIB_H = 0xE1              # 0xE1..0xE7: dig_H2..dig_H6
+CTRL_HUM = 0xF2
+STATUS = 0xF3
+CTRL_MEAS = 0xF4
+REG_CONFIG = 0xF5
+DATA = 0xF7                 # press_msb..hum_lsb, 8 bytes
+
+SOFT_RESET = 0xB6
+MODE_FORCED = 0x01
+STATUS_MEASURING = 0x08
+
+OVERSAMPLING = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}    # x -> osrs code (0: channel skipped)
+IIR_FILTER = {0: 0, 2: 1, 4: 2, 8: 3, 16: 4}            # coefficient -> filter code
+
+# Oversampling of temperature, pressure and humidity, IIR coefficient
+PROFILES = {
+    "fast": {"temperature": 1, "pressure": 1, "humidity": 1, "iir": 0},         # Datasheet "weather monitoring"
+    "balanced": {"temperature": 2, "pressure": 4, "humidity": 1, "iir": 4},
+    "low_noise": {"temperature": 2, "pressure": 16, "humidity": 1, "iir": 16},  # Datasheet "indoor navigation"
+}
+DEFAULT_PROFILE = "balanced"
+
+_CALIB_TP = struct.Struct("<HhhHhhhhhhhhxB")   # dig_T1..T3, dig_P1..P9, (0xA0), dig_H1
+_CALIB_H = struct.Struct("<hBbBbb")            # dig_H2, dig_H3, 0xE4..0xE7 (dig_H4/H5 share 0xE5)
+
+
+def measurement_time(profile, maximum=False):
+    """Seconds a forced conversion takes with `profile` (datasheet appendix B)."""
+    t, p, h = profile["temperature"], profile["pressure"], profile["humidity"]
+    if maximum:
+        ms = 1.25 + 2.3 * t + (2.3 * p + 0.575 if p else 0) + (2.3 * h + 0.575 if h else 0)
+    else:
+        ms = 1.0 + 2.0 * t + (2.0 * p + 0.5 if p else 0) + (2.0 * h + 0.5 if h else 0)
+    return ms / 1000.0
+
+
+def altitude(pressure, sea_level_pressure):
+    """Barometric altitude (m) of `pressure` (hPa), same formula as adafruit_bme280."""
+    return 44330.0 * (1.0 - math.pow(pressure / sea_level_pressure, 0.1903))
+
+
+# ==================== Compensation ====================
+
+class Calibration:
+    """The chip's trimming words, folded into the coefficients the formulas use."""
+
+    def __init__(self, tp_block, h_block):
+        (t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9, h1) = _CALIB_TP.unpack(bytes(tp_block))
+        h2, h3, e4, e5, e6, h6 = _CALIB_H.unpack(bytes(h_block))
+        h4 = (e4 << 4) | (e5 & 0x0F)
+        h5 = (e6 << 4) | (e5 >> 4)
+
+        self.t1 = t1 / 1024.0
+        self.t1b = t1 / 8192.0
+        self.t2 = float(t2)
+        self.t3 = float(t3)
+        self.p1 = float(p1)
+        self.p2 = float(p2)
+        self.p3 = p3 / 524288.0
+        self.p4 = p4 * 65536.0
+        self.p5 = p5 * 2.0
+        self.p6 = p6 / 32768.0
+        self.p7 = float(p7)
+        self.p8 = p8 / 32768.0
+        self.p9 = p9 / 2147483648.0
+        self.h1 = h1 / 524288.0
+        self.h2 = h2 / 65536.0
+        self.h3 = h3 / 67108864.0
+        self.h4 = h4 * 64.0
+        self.h5 = h5 / 16384.0
+        self.h6 = h6 / 67108864.0
+
+    def compensate(self, adc_t, adc_p, adc_h):
+        """(°C, hPa, %) of one conversion's raw values."""
+        v1 = (adc_t / 16384.0 - self.t1) * self.t2
+        v2 = adc_t / 131072.0 - self.t1b
+        t_fine = v1 + v2 * v2 * self.t3
+        temperature = t_fine / 5120.0
+
+        v1 = t_fine / 2.0 - 64000.0
+        v2 = v1 * v1 * self.p6 + v1 * self.p5
+        v2 = v2 / 4.0 + self.p4
+        v1 = (self.p3 * v1 * v1 + self.p2 * v1) / 524288.0
+        v1 = (1.0 + v1 / 32768.0) * self.p1
+        if v1 == 0.0:
+            pressure = 0.0
+        else:
+            p = (1048576.0 - adc_p - v2 / 4096.0) * 6250.0 / v1
+            pressure = (p + (self.p9 * p * p + p * self.p8 + self.p7) / 16.0) / 100.0
+
+        h = t_fine - 76800.0
+        h = (adc_h - (self.h4 + self.h5 * h)) * (self.h2 * (1.0 + self.h6 * h * (1.0 + self.h3 * h)))
+        humidity = min(100.0, max(0.0, h * (1.0 - self.h1 * h)))
+        return temperature, pressure, humidity
+
+
+# ==================== Driver ====================
+
+class BME280:
+    """One BME280 on an SMBus-like `bus`, read in forced mode (see module docstring)."""
+
+    def __init__(self, bus, address=ADDRESS, profile=DEFAULT_PROFILE, sea_level_pressure=DEFAULT_SEA_LEVEL_PRESSURE,
+                 pipelined=False, sleep=time.sleep, clock=time.perf_counter):
+        self.bus = bus
+        self.address = address
+        self.pipelined = pipelined
+        self.sea_level_pressure = float(sea_level_pressure)
+        self.sleep = sleep
+        self.clock = clock
+        self.reads = 0
+        self.timeouts = 0
+
+        chip_id = bus.read_byte_data(address, REG_CHIP_ID)
+        if chip_id != CHIP_ID:
+            raise OSError(f"BME280 not found at 0x{address:02x} (chip id 0x{chip_id:02x})")
+        bus.write_byte_data(address, REG_RESET, SOFT_RESET)
+        sleep(0.005)
+        self.calibration = Calibration(bus.read_i2c_block_data(address, CALIB_TP, _CALIB_TP.size),
+                                       bus.read_i2c_block_data(address, CALIB_H, _CALIB_H.size))
+        self.profile = None
+        self._pending_profile = None
+        self._triggered_at = None       # clock() of the conversion in progress
+        self._configure(profile)
+
+    def set_profile(self, name):
+        """Use PROFILES[name] from the next read() on."""
+        if name not in PROFILES:
+            raise ValueError(f"Unknown BME280 profile: {name}")
+        self._pending_profile = name
+
+    def _configure(self, name):
+        settings = PROFILES[name]
+        # ctrl_hum only takes effect with the next ctrl_meas write, which read() does
+        self.bus.write_byte_data(self.address, CTRL_HUM, OVERSAMPLING[settings["humidity"]])
+        self.bus.write_byte_data(self.address, REG_CONFIG, IIR_FILTER[settings["iir"]] << 2)
+        self._ctrl_meas = (OVERSAMPLING[settings["temperature"]] << 5 | OVERSAMPLING[settings["pressure"]] << 2
+                           | MODE_FORCED)
+        self._wait = measurement_time(settings)
+        self._timeout = measurement_time(settings, maximum=True) * 2
+        self.profile = name
+
+    # ==================== Reading ====================
+
+    def read_raw(self):
+        """
+        (adc_T, adc_P, adc_H) of one forced conversion.
+
+        Pipelined, the next conversion is triggered right after the fetch, so
+        a caller reading less often than the conversion time never waits;
+        the values are then as old as the interval between reads.
+        """
+        if self._triggered_at is None:
+            self._trigger()
+        raw = self._fetch()
+        if self.pipelined:
+            self._trigger()
+        return raw
+
+    def _trigger(self):
+        # Profile changes go in while the chip sleeps between conversions
+        if self._pending_profile is not None:
+            name, self._pending_profile = self._pending_profile, None
+            self._configure(name)
+        self.bus.write_byte_data(self.address, CTRL_MEAS, self._ctrl_meas)
+        self._triggered_at = self.clock()
+
+    def _fetch(self):
+        bus, address = self.bus, self.address
+        remaining = self._triggered_at + self._wait - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        while bus.read_byte_data(address, STATUS) & STATUS_MEASURING:
+            if self.clock() - self._triggered_at > self._timeout:
+                self.timeouts += 1
+                self._triggered_at = None
+                raise OSError("BME280 conversion timed out")
+            self.sleep(0.0005)
+        self._triggered_at = None
+        d = bus.read_i2c_block_data(address, DATA, 8)
+        self.reads += 1
+        return ((d[3] << 12) | (d[4] << 4) | (d[5] >> 4),
+                (d[0] << 12) | (d[1] << 4) | (d[2] >> 4),
+                (d[6] << 8) | d[7])
+
+    def read(self):
+        """(temperature °C, humidity %, pressure hPa, altitude m), all from one conversion."""
+        temperature, pressure, humidity = self.calibration.compensate(*self.read_raw())
+        return temperature, humidity, pressure, altitude(pressure, self.sea_level_pressure)
+
+
+# ==================== Simulated Bus ====================
+
+# Calibration of a real sensor
+_SIM_CALIB_TP = _CALIB_TP.pack(28036, 26458, 50, 37794, -10632, 3024, 6755, -79, -7, 9900, -10230, 4285, 75)
+_SIM_CALIB_H = _CALIB_H.pack(367, 0, 19, 0x2A, 3, 30)
+_SIM_RAW = {"temperature": 520000.0, "pressure": 340000.0, "humidity": 28000.0}    # ~21 °C, ~1000 hPa, ~45 %
+_SIM_NOISE = {"temperature": 6.0, "pressure": 40.0, "humidity": 20.0}               # LSB rms at x1
+
+
+class SimulatedBus:
+    """
+    smbus stand-in with one BME280 behind it.
+
+    Time is virtual unless a `clock` is given: transactions advance it by
+    their modelled cost, advance() (pass it to BME280 as `sleep`) by the
+    waits. Raw values are `raw` (settable, for steps) plus noise that
+    shrinks with the square root of the oversampling, then the IIR filter.
+    """
+
+    def __init__(self, address=ADDRESS, clock=None, i2c_hz=400_000, overhead=60e-6, seed=0):
+        self.address = address
+        self.i2c_hz = i2c_hz
+        self.overhead = overhead
+        self.transactions = 0
+        self.bus_time = 0.0
+        self.raw = dict(_SIM_RAW)
+        self._clock = clock
+        self._virtual = 0.0
+        self._rng = random.Random(seed)
+        self._registers = bytearray(256)
+        self._filtered = None
+        self._ready_at = 0.0
+        self._reset()
+
+    def now(self):
+        return self._clock() if self._clock else self._virtual
+
+    def advance(self, seconds):
+        self._virtual += seconds
+
+    # ---- SMBus interface ----
+
+    def write_byte_data(self, address, register, value):
+        self._transaction(address, 3)
+        value &= 0xFF
+        if register == REG_RESET and value == SOFT_RESET:
+            self._reset()
+        elif register == CTRL_MEAS and value & 0x03:
+            self._registers[register] = value
+            self._convert(value)
+        else:
+            self._registers[register] = value
+
+    def read_byte_data(self, address, register):
+        return self.read_i2c_block_data(address, register, 1)[0]
+
+    def read_i2c_block_data(self, address, register, length):
+        if length > 32:
+            raise OSError(22, "Invalid argument")
+        self._transaction(address, 3 + length)
+        if self.now() >= self._ready_at:
+            self._registers[STATUS] = 0
+            self._registers[CTRL_MEAS] &= ~0x03     # Back to sleep
+        return list(self._registers[register:register + length])
+
+    # ---- Chip model ----
+
+    def _transaction(self, address, nbytes):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+        cost = self.overhead + (9 * nbytes + 3) / self.i2c_hz
+        self.transactions += 1
+        self.bus_time += cost
+        self._virtual += cost
+
+    def _reset(self):
+        self._registers[:] = bytes(256)
+        self._registers[REG_CHIP_ID] = CHIP_ID
+        self._registers[CALIB_TP:CALIB_TP + len(_SIM_CALIB_TP)] = _SIM_CALIB_TP
+        self._registers[CALIB_H:CALIB_H + len(_SIM_CALIB_H)] = _SIM_CALIB_H
+        self._registers[DATA:DATA + 8] = bytes([0x80, 0, 0, 0x80, 0, 0, 0x80, 0])  # "Skipped" until a conversion
+        self._filtered = None
+
+    def _convert(self, ctrl_meas):
+        codes = {"temperature": ctrl_meas >> 5, "pressure": (ctrl_meas >> 2) & 0x07,
+                 "humidity": self._registers[CTRL_HUM] & 0x07}
+        factors = {code: x for x, code in OVERSAMPLING.items()}
+        oversampling = {channel: factors[min(code, 5)] for channel, code in codes.items()}
+        iir = {code: c for c, code in IIR_FILTER.items()}[(self._registers[REG_CONFIG] >> 2) & 0x07]
+
+        sample = {channel: self.raw[channel] + self._rng.gauss(0, _SIM_NOISE[channel] / math.sqrt(x or 1))
+                  for channel, x in oversampling.items()}
+        if self._filtered is None or not iir:
+            self._filtered = sample
+        else:
+            # Temperature and pressure go through the filter, humidity doesn't
+            for channel in ("temperature", "pressure"):
+                self._filtered[channel] += (sample[channel] - self._filtered[channel]) / iir
+            self._filtered["humidity"] = sample["humidity"]
+
+        t, p, h = (int(self._filtered[c]) for c in ("temperature", "pressure", "humidity"))
+        self._registers[DATA:DATA + 8] = bytes([p >> 12, (p >> 4) & 0xFF, (p & 0x0F) << 4,
+                                                t >> 12, (t >> 4) & 0xFF, (t & 0x0F) << 4,
+                                                h >> 8, h & 0xFF])
+        self._registers[STATUS] = STATUS_MEASURING
+        self._ready_at = self.now() + measurement_time(
+            {"temperature": oversampling["temperature"], "pressure": oversampling["pressure"],
+             "humidity": oversampling["humidity"]})
+
+
+# ==================== Benchmark ====================
+
+def _property_read(bus, calibration, sea_level_pressure, address=ADDRESS):
+    """What the adafruit properties amount to: temperature read again for every value."""
+    def raw20(register):
+        d = bus.read_i2c_block_data(address, register, 3)
+        return (d[0] << 12) | (d[1] << 4) | (d[2] >> 4)
+
+    def humidity_raw():
+        d = bus.read_i2c_block_data(address, 0xFD, 2)
+        return (d[0] << 8) | d[1]
+
+    temperature = calibration.compensate(raw20(0xFA), 0, 0)[0]
+    humidity = calibration.compensate(raw20(0xFA), 0, humidity_raw())[2]
+    pressure = calibration.compensate(raw20(0xFA), raw20(0xF7), 0)[1]
+    alt = altitude(calibration.compensate(raw20(0xFA), raw20(0xF7), 0)[1], sea_level_pressure)
+    return temperature, humidity, pressure, alt
+
+
+def benchmark(reads=300):
+    import statistics
+
+    bus = SimulatedBus()
+    bme = BME280(bus, profile="fast", sleep=bus.advance, clock=bus.now)
+    bus.write_byte_data(ADDRESS, CTRL_MEAS, 0x27)           # Let property reads see fresh data
+    bus.transactions, bus.bus_time = 0, 0.0
+    started = time.perf_counter()
+    for _ in range(reads):
+        _property_read(bus, bme.calibration, bme.sea_level_pressure)
+    cpu = (time.perf_counter() - started) / reads
+    print("[BENCH] Simulated BME280 at 400 kHz I2C, 60 us overhead per transaction")
+    print(f"[BENCH] adafruit-style properties: {bus.transactions / reads:4.1f} transactions  "
+          f"bus {bus.bus_time / reads * 1e6:6.1f} us  python {cpu * 1e6:6.1f} us per row "
+          "(4 compensations, values from different conversions)")
+
+    bus.transactions, bus.bus_time = 0, 0.0
+    started = time.perf_counter()
+    for _ in range(reads):
+        bme.read()
+    cpu = (time.perf_counter() - started) / reads
+    print(f"[BENCH] forced read()            : {bus.transactions / reads:4.1f} transactions  "
+          f"bus {bus.bus_time / reads * 1e6:6.1f} us  python {cpu * 1e6:6.1f} us per row "
+          "(1 compensation, one conversion)")
+
+    # Latency vs. noise: altitude scatter at rest, then reads until 90 % of a 1 hPa step
+    for name in PROFILES:
+        bus = SimulatedBus()
+        bme = BME280(bus, profile=name, sleep=bus.advance, clock=bus.now)
+        t0 = bus.now()
+        rest = [bme.read()[3] for _ in range(reads)]
+        latency = (bus.now() - t0) / reads
+        before = statistics.mean(rest[reads // 2:])
+        bus.raw["pressure"] -= 400.0                       # ~ +1 hPa
+        after = [bme.read()[3] for _ in range(reads)]
+        target = statistics.mean(after[reads // 2:])
+        settle = next(i + 1 for i, a in enumerate(after) if abs(a - before) >= 0.9 * abs(target - before))
+
+        # Pipelined at 10 Hz: time spent inside read()
+        bme.pipelined = True
+        blocked = []
+        for _ in range(20):
+            bus.advance(0.1)
+            t0 = bus.now()
+            bme.read()
+            blocked.append(bus.now() - t0)
+        print(f"[BENCH] profile {name:<10}: {latency * 1e3:5.1f} ms per read (max conversion "
+              f"{measurement_time(PROFILES[name], maximum=True) * 1e3:4.1f} ms)  altitude noise "
+              f"{statistics.stdev(rest[reads // 2:]) * 100:5.1f} cm  step {abs(target - before):.1f} m "
+              f"settled in {settle} reads, pipelined at 10 Hz {max(blocked[1:]) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BME280 driver benchmark on the simulated bus")
+    parser.add_argument("--reads", type=int, default=300)
+    args = parser.parse_args()
+
+    benchmark(args.reads)
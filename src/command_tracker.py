@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+TRITON Command Tracker - Sequence numbers, in-flight table and RTT histogram
+
+Commands to the Pi used to be `CMD:THROTTLE:<n>` lines without an id, and
+an ACK only set `confirmed_throttle`: there was no telling which command it
+answered or how long the round trip took. Every transmission now carries a
+sequence number and the Pi echoes it:
+
+    CMD:<type>:<value>:<seq>
+    ACK:<type>:<value>:<status>:<seq>
+
+- each transmission gets its own sequence number (a retry too), so an ACK
+  always belongs to exactly one transmission and its RTT is unambiguous
+- the in-flight table holds what was sent and is not acknowledged yet;
+  expired() hands out entries older than their `ack_timeout`, and the
+  caller retries them with `attempt + 1` until `max_retries`
+- RTTs go into an RttHistogram: fixed millisecond buckets (counts are
+  cumulative, Prometheus style) plus the most recent RTTs for percentiles
+
+A line without a sequence number (an older Pi) still works, it just isn't
+tracked.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+
+RTT_BUCKETS_MS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000)
+RECENT_RTTS = 256
+DEFAULT_ACK_TIMEOUT = 1.0
+DEFAULT_MAX_RETRIES = 10
+
+
+def split_sequence(line):
+    """(line without the sequence field, seq or None) of a CMD:/ACK: line."""
+    head, sep, tail = line.rpartition(":")
+    if sep and tail.isdigit() and head.count(":") >= 2:
+        return head, int(tail)
+    return line, None
+
+
+def with_sequence(line, seq):
+    """`line` with `seq` appended as its last field."""
+    return f"{line}:{seq}"
+
+
+# ==================== RTT Histogram ====================
+
+class RttHistogram:
+    """Round-trip times: bucket counts plus a window of the most recent values."""
+
+    def __init__(self, buckets_ms=RTT_BUCKETS_MS, recent=RECENT_RTTS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)   # Last one: above the largest bucket
+        self._recent = deque(maxlen=recent)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+        self._recent.append(ms)
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self):
+        cumulative, buckets = 0, []
+        for bound, count in zip(self.buckets_ms + (None,), self._counts):
+            cumulative += count
+            buckets.append({"le_ms": bound if bound is not None else "+Inf", "count": cumulative})
+        recent = sorted(self._recent)
+
+        def pct(q):
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else None
+
+        return {"count": self.count, "sum_ms": round(self.sum_ms, 1),
+                "mean_ms": round(self.sum_ms / self.count, 1) if self.count else None,
+                "max_ms": round(self.max_ms, 1),
+                "last_ms": round(self._recent[-1], 1) if recent else None,
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "buckets": buckets}
+
+
+# ==================== In-flight Table ====================
+
+class Command:
+    """One transmission waiting for its ACK."""
+
+    __slots__ = ("seq", "command_type", "value", "key", "attempt", "sent_at", "ack_timeout", "max_retries")
+
+    def __init__(self, seq, command_type, value, key, attempt, sent_at, ack_timeout, max_retries):
+        self.seq = seq
+        self.command_type = command_type
+        self.value = value
+        self.key = key
+        self.attempt = attempt
+        self.sent_at = sent_at
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+
+    @property
+    def retries_left(self):
+        return self.attempt <= self.max_retries
+
+    def as_dict(self, now):
+        return {"seq": self.seq, "type": self.command_type, "value": self.value, "attempt": self.attempt,
+                "age_ms": round((now - self.sent_at) * 1000.0, 1)}
+
+
+class CommandTracker:
+    """
+    Sequence numbers and the in-flight table of the ground station.
+
+    `key` groups transmissions of the same thing ("throttle", "thresholds"):
+    a newer one supersedes those still in flight, whose late ACKs are
+    still measured but counted as superseded.
+    """
+
+    def __init__(self, ack_timeout=DEFAULT_ACK_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, clock=time.monotonic):
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.clock = clock
+        self.rtt = RttHistogram()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._in_flight = {}        # seq -> Command
+        self._latest = {}           # key -> seq of its newest transmission
+        self.sent = 0
+        self.retries = 0
+        self.acked = 0
+        self.superseded = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.unmatched = 0
+
+    def send(self, command_type, value, key=None, attempt=1, ack_timeout=None, max_retries=None):
+        """Register a transmission; returns its Command (`seq` goes on the wire)."""
+        with self._lock:
+            self._seq = self._seq % 0xFFFF + 1      # 1..65535, 0 is never used
+            command = Command(self._seq, command_type, value, key, attempt, self.clock(),
+                              self.ack_timeout if ack_timeout is None else ack_timeout,
+                              self.max_retries if max_retries is None else max_retries)
+            self._in_flight[command.seq] = command
+            if key is not None:
+                self._latest[key] = command.seq
+            self.sent += 1
+            if attempt > 1:
+                self.retries += 1
+        return command
+
+    def ack(self, seq):
+        """The ACK carrying `seq` arrived; returns (Command, rtt seconds) or (None, None)."""
+        with self._lock:
+            command = self._in_flight.pop(seq, None)
+            if command is None:
+                self.unmatched += 1
+                return None, None
+            rtt = self.clock() - command.sent_at
+            self.rtt.observe(rtt)
+            if command.key is not None and self._latest.get(command.key) != seq:
+                self.superseded += 1
+            else:
+                self.acked += 1
+                self._latest.pop(command.key, None)
+        return command, rtt
+
+    def in_flight(self, key):
+        """Newest unacknowledged transmission of `key`, or None."""
+        with self._lock:
+            return self._in_flight.get(self._latest.get(key))
+
+    def expired(self):
+        """Remove and return the newest transmissions (per key) whose ACK timed out."""
+        now = self.clock()
+        out = []
+        with self._lock:
+            for seq, command in list(self._in_flight.items()):
+                if now - command.sent_at < command.ack_timeout:
+                    continue
+                del self._in_flight[seq]
+                self.timeouts += 1
+                if command.key is not None and self._latest.get(command.key) != seq:
+                    continue            # Superseded while in flight, nothing to retry
+                self._latest.pop(command.key, None)
+                if not command.retries_left:
+                    self.failed += 1
+                out.append(command)
+        return out
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            in_flight = [command.as_dict(now) for command in self._in_flight.values()]
+            return {"sent": self.sent, "retries": self.retries, "acked": self.acked,
+                    "superseded": self.superseded, "timeouts": self.timeouts, "failed": self.failed,
+                    "unmatched": self.unmatched, "in_flight": in_flight, "rtt": self.rtt.snapshot()}
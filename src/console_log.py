@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+TRITON Console Log - Queued logging and a rate-limited status line on the Pi
+
+test.py printed every logged row (about 30 a second) and every event
+straight from its main loop. print() returns only once the terminal has
+taken the bytes: over a 115200 baud serial console a 140-character row
+takes 12 ms, over a slow SSH link longer, and that time came out of the loop
+that drains the samples, answers the PC's commands and keeps the uplink
+slots. Here the main loop does no terminal or disk I/O:
+
+- CollectorLog puts a logging.handlers.QueueHandler on the "triton" logger:
+  a log call only formats the message and puts the record on a bounded
+  queue. A QueueListener thread writes it to the console and the log file
+  (`logs/collector_<timestamp>.log`). If the queue is full the record is
+  dropped and counted rather than waited for
+- levels: ERROR for failures, WARNING for degraded operation (no sensor,
+  unknown command), INFO for events (commands, settings, status), DEBUG for
+  every logged row (file only, when LOG_FILE_LEVEL is "DEBUG"). The level
+  comes from the formatter: the console puts "WARNING:"/"ERROR:" in front
+  of those records, the file has it on every line
+- rows go to the console as one status line, redrawn at most every
+  `status_interval` (1 Hz) by StatusConsole's own thread. set_status() only
+  swaps a reference; the text is formatted when it is drawn. On a terminal
+  the line is redrawn in place and log messages scroll above it; otherwise
+  (pipe, systemd journal) it is printed as a normal line when it changed
+- acquisition.LoopTimer measures the busy time of each pass of the main
+  loop; test.py prints it with the [ACQ] line
+
+Usage (benchmark):
+    # Main loop with a print() per row vs. queued logging and the status line
+    python3 console_log.py [--seconds 5] [--baud 115200]
+"""
+
+import logging
+import queue
+import shutil
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = "triton"
+QUEUE_SIZE = 10000          # Records waiting for the listener thread
+STATUS_INTERVAL = 1.0       # Seconds between status line redraws
+
+CONSOLE_FORMAT = "%(message)s"
+FILE_FORMAT = "%(asctime)s.%(msecs)03d %(levelname)-7s %(message)s"
+FILE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ConsoleFormatter(logging.Formatter):
+    """INFO and below as the bare message; WARNING and above with the level in front."""
+
+    def formatMessage(self, record):
+        text = super().formatMessage(record)
+        return text if record.levelno < logging.WARNING else f"{record.levelname}: {text}"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: a record that doesn't fit is dropped and counted."""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StatusConsole(logging.StreamHandler):
+    """Console handler that keeps a status line below the log messages (see module docstring)."""
+
+    def __init__(self, stream=None, interval=STATUS_INTERVAL, tty=None):
+        super().__init__(stream or sys.stdout)
+        self.interval = float(interval)
+        self.tty = _isatty(self.stream) if tty is None else tty
+        self.redraws = 0
+
+        self._status = None         # (render, args), swapped as a whole
+        self._rendered = None       # The _status that is on the console
+        self._line = ""             # Its text (terminal: currently drawn)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_status(self, render, *args):
+        """Show render(*args) at the next redraw; the caller keeps no lock and does no formatting."""
+        self._status = (render, args)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="status-console", daemon=True)
+            self._thread.start()
+
+    def refresh(self):
+        """Draw the newest status if it changed (the refresh thread calls this every `interval`)."""
+        status = self._status
+        if status is None or status is self._rendered:
+            return
+        render, args = status
+        try:
+            text = render(*args)
+        except Exception:
+            text = "(status unavailable)"
+        self.acquire()
+        try:
+            self._rendered = status
+            if self.tty:
+                # A line wider than the terminal wraps and "\r" can't take it back
+                self._line = text[:max(20, shutil.get_terminal_size((120, 24)).columns - 1)]
+                self.stream.write("\r\033[K" + self._line)
+            else:
+                self._line = text
+                self.stream.write(text + self.terminator)
+            self.flush()
+            self.redraws += 1
+        except Exception:
+            pass
+        finally:
+            self.release()
+
+    def emit(self, record):
+        # Called by handle() with the lock held, so refresh() can't draw in between
+        if self.tty and self._line:
+            self.stream.write("\r\033[K")
+        super().emit(record)
+        if self.tty and self._line:
+            self.stream.write(self._line)
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.refresh()
+        if self.tty and self._line:
+            # Leave the last status on the screen, the shell prompt goes below it
+            self.acquire()
+            try:
+                self.stream.write(self.terminator)
+                self.flush()
+                self._line = ""
+            finally:
+                self.release()
+        super().close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+class CollectorLog:
+    """
+    The Pi collector's log pipeline: the "triton" logger -> queue -> listener
+    thread -> StatusConsole (+ a log file). start() before the first record
+    that should appear, close() last: it writes out whatever is queued.
+    """
+
+    def __init__(self, log_path=None, console_level="INFO", file_level="INFO",
+                 status_interval=STATUS_INTERVAL, stream=None, queue_size=QUEUE_SIZE, tty=None):
+        self.console = StatusConsole(stream, status_interval, tty)
+        self.console.setLevel(console_level)
+        self.console.setFormatter(ConsoleFormatter(CONSOLE_FORMAT))
+        handlers = [self.console]
+
+        self.file = None
+        if log_path:
+            # Opened here so a bad path fails in the caller, not in the listener thread
+            self.file = logging.FileHandler(log_path, encoding="utf-8")
+            self.file.setLevel(file_level)
+            self.file.setFormatter(logging.Formatter(FILE_FORMAT, FILE_DATE_FORMAT))
+            handlers.append(self.file)
+
+        self.queue = queue.Queue(queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+
+        # Records below every handler's level are dropped by the logger, before anything is formatted
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(min(handler.level for handler in handlers))
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+        self._started = False
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+    def set_status(self, render, *args):
+        self.console.set_status(render, *args)
+
+    def start(self):
+        if not self._started:
+            self.listener.start()
+            self.console.start()
+            self._started = True
+
+    def close(self):
+        """Detach from the logger, write out the queue, close console and file; safe to call more than once."""
+        self.logger.removeHandler(self.handler)
+        if self._started:
+            self.listener.stop()
+            self._started = False
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except Exception:
+        return False
+
+
+# ==================== Benchmark ====================
+
+class _SerialConsole:
+    """Text stream that takes as long as a serial console of `baud` to accept each write."""
+
+    def __init__(self, baud):
+        self.char_time = 10.0 / baud        # 8N1: 10 bits per character
+        self.chars = 0
+
+    def write(self, text):
+        time.sleep(len(text) * self.char_time)
+        self.chars += len(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return True
+
+
+def benchmark(seconds=5.0, baud=115200):
+    import random
+
+    from acquisition import AcquisitionScheduler, LoopTimer, SensorTask
+
+    rng = random.Random(0)
+
+    def read(count):
+        time.sleep(0.0005)                  # I2C transfer
+        return [round(rng.uniform(-10.0, 1000.0), 1) for _ in range(count)]
+
+    def format_row(now_str, row):
+        return f"{now_str:<22}" + ", ".join(f"{str(x):>8}" for x in row)
+
+    def run(mode):
+        console = _SerialConsole(baud)
+        collector = CollectorLog(stream=console) if mode == "queue" else None
+        log = logging.getLogger(LOGGER_NAME + ".bench")
+        if collector:
+            collector.start()
+        scheduler = AcquisitionScheduler([SensorTask("bme280", 10.0, lambda: read(4)),
+                                          SensorTask("mpu6050", 20.0, lambda: read(7))])
+        timer = LoopTimer()
+        row = [0.0] * 12
+        rows = 0
+        scheduler.start()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            timer.start()
+            for sample in scheduler.drain():
+                row[1:5] = sample.values if sample.task == "bme280" else row[1:5]
+                row[5:12] = sample.values if sample.task == "mpu6050" else row[5:12]
+                row[0] = round(sample.actual, 3)
+                now_str = time.strftime("%Y-%m-%d %H:%M:%S")
+                rows += 1
+                if mode == "print":
+                    print(format_row(now_str, row), file=console)
+                else:
+                    collector.set_status(format_row, now_str, list(row))
+                if rows % 40 == 0:
+                    # A throttle command from the PC every 1-2 s
+                    if mode == "print":
+                        print("[LORA-RX] CMD:THROTTLE:30:17", file=console)
+                        print("[MOTOR] Throttle: 30% | PWM: 1650us", file=console)
+                    else:
+                        log.info("[LORA-RX] %s", "CMD:THROTTLE:30:17")
+                        log.info("[MOTOR] Throttle: %s%% | PWM: %sus", 30, 1650)
+            timer.stop()
+            time.sleep(0.05)                # service_lora()
+        scheduler.stop()
+        if collector:
+            collector.close()
+        stats = scheduler.stats()
+        return rows, timer.stats()["busy_ms"], stats["tasks"]["mpu6050"]["lateness_ms"], stats, console
+
+    print(f"[BENCH] {seconds:g} s each, rows at 30/s (10 Hz + 20 Hz), console at {baud} baud, "
+          f"a command + motor line every 40 rows")
+    for mode, label in (("print", "print() per row"), ("queue", "queue + 1 Hz status")):
+        rows, busy, late, stats, console = run(mode)
+        print(f"[BENCH] {label:<20}: {rows:5d} rows  loop busy mean {busy['mean']:7.2f} ms  "
+              f"p95 {busy['p95']:7.2f} ms  max {busy['max']:7.2f} ms  |  mpu6050 late p95 {late['p95']:.2f} ms  "
+              f"max {late['max']:.2f} ms  |  queue dropped {stats['queue_dropped']}  "
+              f"console {console.chars / seconds:,.0f} chars/s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Collector logging benchmark")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--baud", type=int, default=115200, help="simulated serial console speed")
+    args = parser.parse_args()
+
+    benchmark(args.seconds, args.baud)
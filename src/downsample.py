@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+TRITON Downsampling - Reduce sensor series before they reach Chart.js
+
+All methods keep the columns aligned (one shared row set for every sensor), so
+responses keep the usual {label: [values]} shape the dashboard already reads:
+
+- lttb:   Largest-Triangle-Three-Buckets on all series at once. Each bucket
+          keeps the row whose triangle area, summed over the range-normalized
+          series, is largest. Rows are real samples.
+- minmax: Two rows per bucket, the per-column minimum and maximum. Keeps the
+          visual envelope and exact extremes (spikes never disappear).
+- avg:    One row per bucket holding the per-column mean.
+
+LodTiers keeps pre-aggregated min/max/sum/count buckets of the live history
+at several resolutions, so a zoomed-out view of a long session is answered
+from a few thousand buckets instead of every raw row.
+
+Usage (benchmark):
+    python3 downsample.py [--rows 1000000] [--max-points 1000]
+"""
+
+import threading
+import warnings
+
+import numpy as np
+
+METHODS = ("lttb", "minmax", "avg")
+
+
+# ==================== Core Methods ====================
+
+def _bucket_edges(n, n_buckets):
+    """Start index of each of `n_buckets` near-equal buckets over n rows."""
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+
+
+def _normalize(values):
+    """Scale each row of a (series x rows) array to 0..1, NaN -> 0."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN series
+        lo = np.nanmin(values, axis=1, keepdims=True)
+        span = np.nanmax(values, axis=1, keepdims=True) - lo
+    span[~(span > 0)] = 1.0
+    return np.nan_to_num((values - lo) / span)
+
+
+def lttb_indices(x, values, n_out):
+    """
+    Row indices selected by multi-series LTTB.
+
+    `x` has shape (rows,), `values` (series x rows). Bucket selection is
+    sequential by definition (each bucket depends on the previous pick), but
+    every bucket is scored with one vectorized pass over all its rows and series.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 0)]
+
+    x = np.nan_to_num(x.astype(np.float64))
+    y = _normalize(values) if len(values) else np.zeros((1, n))
+
+    # Bucket i spans rows edges[i]..edges[i+1]; first and last rows are fixed
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo = hi
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[:, nlo:nhi].mean(axis=1, keepdims=True)
+
+        ax, ay = x[a], y[:, a:a + 1]
+        area = np.abs((ax - avg_x) * (y[:, lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y - ay)).sum(axis=0)
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_reduce(values, n_buckets):
+    """
+    Per-bucket min and max of a (columns x rows) array, NaN-aware.
+
+    Returns (out, rows): `out` interleaves each bucket's min row and max row
+    (2 * n_buckets rows), `rows` holds the source row each output row stands
+    for (bucket start for the min row, bucket end for the max row).
+    """
+    n = values.shape[1]
+    starts = _bucket_edges(n, n_buckets)
+    ends = np.append(starts[1:], n) - 1
+
+    with np.errstate(invalid='ignore'):
+        mins = np.fmin.reduceat(values, starts, axis=1)
+        maxs = np.fmax.reduceat(values, starts, axis=1)
+
+    out = np.empty((values.shape[0], 2 * n_buckets), dtype=np.float64)
+    out[:, 0::2] = mins
+    out[:, 1::2] = maxs
+    rows = np.empty(2 * n_buckets, dtype=np.int64)
+    rows[0::2] = starts
+    rows[1::2] = ends
+    return out, rows
+
+
+def average_reduce(values, n_buckets):
+    """Per-bucket NaN-aware mean of a (columns x rows) array. Returns (out, rows)."""
+    n = values.shape[1]
+    starts = _bucket_edges(n, n_buckets)
+    valid = ~np.isnan(values)
+
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1)
+    counts = np.add.reduceat(valid, starts, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return out, starts
+
+
+def downsample(columns, x_label, max_points, method="lttb"):
+    """
+    Reduce aligned numeric columns to at most `max_points` rows.
+
+    `columns` maps label -> float array (same length, NaN for missing values).
+    Returns (reduced, rows) where `rows` are the source row indices the output
+    rows stand for, so callers can carry along non-numeric columns.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}' (use {', '.join(METHODS)})")
+
+    labels = list(columns)
+    n = len(columns[x_label]) if labels else 0
+    if max_points is None or n <= max_points:
+        return dict(columns), np.arange(n)
+    max_points = max(int(max_points), 2)
+
+    values = np.vstack([np.asarray(columns[label], dtype=np.float64) for label in labels])
+
+    if method == "lttb":
+        series = [i for i, label in enumerate(labels) if label != x_label]
+        rows = lttb_indices(values[labels.index(x_label)], values[series], max_points)
+        out = values[:, rows]
+    elif method == "minmax":
+        out, rows = minmax_reduce(values, max_points // 2)
+    else:
+        out, rows = average_reduce(values, max_points)
+
+    return {label: out[i] for i, label in enumerate(labels)}, rows
+
+
+# ==================== Level-of-Detail Tiers ====================
+
+class LodTiers:
+    """
+    Multi-resolution min/max/sum/count buckets maintained at ingest time.
+
+    Level 0 buckets aggregate `factor` raw rows, level k aggregates `factor`
+    level k-1 buckets. Every level is a ring of `capacity` buckets, so memory is
+    fixed no matter how long the session runs; coarse levels still cover the
+    whole session long after the fine ones have wrapped.
+    """
+
+    def __init__(self, labels, x_label="Elapsed [s]", factor=8, levels=6, capacity=4096):
+        self.labels = list(labels)
+        self.x_index = self.labels.index(x_label)
+        self.factor = factor
+        self.levels = levels
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        with self.lock:
+            self._reset()
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+
+    def _reset(self):
+        cols = len(self.labels)
+        shape = (self.levels, cols, self.capacity)
+        self._min = np.full(shape, np.nan)
+        self._max = np.full(shape, np.nan)
+        self._sum = np.zeros(shape)
+        self._cnt = np.zeros(shape, dtype=np.int64)
+        self._head = [0] * self.levels
+        self._count = [0] * self.levels
+        self._evicted = [False] * self.levels
+
+        # Open (not yet complete) bucket per level
+        self._acc_min = np.full((self.levels, cols), np.nan)
+        self._acc_max = np.full((self.levels, cols), np.nan)
+        self._acc_sum = np.zeros((self.levels, cols))
+        self._acc_cnt = np.zeros((self.levels, cols), dtype=np.int64)
+        self._acc_n = [0] * self.levels
+
+    def _accumulate(self, level, mn, mx, sm, cnt):
+        with np.errstate(invalid='ignore'):
+            np.fmin(self._acc_min[level], mn, out=self._acc_min[level])
+            np.fmax(self._acc_max[level], mx, out=self._acc_max[level])
+        self._acc_sum[level] += sm
+        self._acc_cnt[level] += cnt
+        self._acc_n[level] += 1
+
+        if self._acc_n[level] == self.factor:
+            self._close(level)
+
+    def _close(self, level):
+        """Move the open bucket of `level` into its ring and feed the next level."""
+        head = self._head[level]
+        mn, mx = self._acc_min[level].copy(), self._acc_max[level].copy()
+        sm, cnt = self._acc_sum[level].copy(), self._acc_cnt[level].copy()
+
+        self._min[level, :, head] = mn
+        self._max[level, :, head] = mx
+        self._sum[level, :, head] = sm
+        self._cnt[level, :, head] = cnt
+        self._head[level] = (head + 1) % self.capacity
+        if self._count[level] == self.capacity:
+            self._evicted[level] = True
+        else:
+            self._count[level] += 1
+
+        self._acc_min[level].fill(np.nan)
+        self._acc_max[level].fill(np.nan)
+        self._acc_sum[level].fill(0.0)
+        self._acc_cnt[level].fill(0)
+        self._acc_n[level] = 0
+
+        if level + 1 < self.levels:
+            self._accumulate(level + 1, mn, mx, sm, cnt)
+
+    def add(self, row):
+        """Add one raw row (float array in label order, NaN for missing)."""
+        valid = ~np.isnan(row)
+        with self.lock:
+            self._accumulate(0, row, row, np.where(valid, row, 0.0), valid)
+
+    def _buckets(self, level):
+        """Ordered (min, max, sum, count) arrays of one level, open bucket included."""
+        count, head = self._count[level], self._head[level]
+        order = (np.arange(head - count, head) % self.capacity)
+        parts = [self._min[level][:, order], self._max[level][:, order],
+                 self._sum[level][:, order], self._cnt[level][:, order]]
+        if self._acc_n[level]:
+            acc = [self._acc_min, self._acc_max, self._acc_sum, self._acc_cnt]
+            parts = [np.hstack([p, a[level][:, None]]) for p, a in zip(parts, acc)]
+        return parts
+
+    def query(self, max_points, method="lttb", start=None, end=None):
+        """
+        Downsampled columns for the whole session (or [start, end]).
+
+        Picks the finest level that still covers the requested range with few
+        enough buckets, so the cost is O(buckets) regardless of session length.
+        Returns label -> float array, or None if nothing has been added yet.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}' (use {', '.join(METHODS)})")
+
+        budget = max(max_points // 2, 1) if method == "minmax" else max_points
+        with self.lock:
+            levels = [self._buckets(level) for level in range(self.levels)]
+            evicted = list(self._evicted)
+
+        chosen = None
+        for level, (mn, mx, sm, cnt) in enumerate(levels):
+            if not mn.shape[1]:
+                continue
+            x_lo, x_hi = mn[self.x_index], mx[self.x_index]
+            # Older rows were overwritten: this level no longer covers the range
+            # start (the coarsest level is still used if nothing covers it)
+            if (evicted[level] and level + 1 < self.levels
+                    and (start is None or start < np.nanmin(x_lo))):
+                continue
+
+            mask = np.ones(len(x_lo), dtype=bool)
+            if start is not None:
+                mask &= ~(x_hi < start)
+            if end is not None:
+                mask &= ~(x_lo > end)
+            chosen = (mn[:, mask], mx[:, mask], sm[:, mask], cnt[:, mask])
+            # Finest level within `factor` of the budget; reduced exactly below
+            if mask.sum() <= budget * self.factor:
+                break
+
+        if chosen is None:
+            return None
+
+        mn, mx, sm, cnt = chosen
+        if method == "minmax":
+            values = np.empty((len(self.labels), 2 * mn.shape[1]))
+            values[:, 0::2] = mn
+            values[:, 1::2] = mx
+            if mn.shape[1] > budget:
+                values, _ = minmax_reduce(values, budget)
+        else:
+            if method == "avg" and sm.shape[1] > budget:
+                starts = _bucket_edges(sm.shape[1], budget)
+                sm = np.add.reduceat(sm, starts, axis=1)
+                cnt = np.add.reduceat(cnt, starts, axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                values = np.where(cnt > 0, sm / np.maximum(cnt, 1), np.nan)
+
+        columns = {label: values[i] for i, label in enumerate(self.labels)}
+        if method == "lttb":
+            columns, _ = downsample(columns, self.labels[self.x_index], max_points, method)
+        return columns
+
+
+# ==================== Benchmark ====================
+
+def benchmark(rows=1_000_000, max_points=1000):
+    import time
+
+    rng = np.random.default_rng(0)
+    x = np.arange(rows) / 20.0
+    columns = {"Elapsed [s]": x}
+    for i in range(11):
+        columns[f"s{i}"] = np.cumsum(rng.normal(size=rows))
+
+    print(f"[BENCH] {rows:,} rows x {len(columns)} columns -> {max_points} points")
+    for method in METHODS:
+        t0 = time.perf_counter()
+        out, _ = downsample(columns, "Elapsed [s]", max_points, method)
+        dt = time.perf_counter() - t0
+        print(f"[BENCH] raw {method:<7} {dt * 1e3:9.1f} ms  ({len(out['Elapsed [s]'])} rows)")
+
+    lod = LodTiers(list(columns))
+    table = np.vstack(list(columns.values())).T
+    t0 = time.perf_counter()
+    for row in table:
+        lod.add(row)
+    dt = time.perf_counter() - t0
+    print(f"[BENCH] lod ingest {dt / rows * 1e6:8.2f} us/row")
+
+    for method in METHODS:
+        t0 = time.perf_counter()
+        out = lod.query(max_points, method)
+        dt = time.perf_counter() - t0
+        print(f"[BENCH] lod {method:<7} {dt * 1e3:9.1f} ms  ({len(out['Elapsed [s]'])} rows)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Downsampling benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-points", type=int, default=1000)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.max_points)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+TRITON Event Stream - Server-Sent Events push channel
+
+Lets app.py push live telemetry, motor ACKs and recording state changes to
+browsers instead of having every dashboard poll /data, /motor/status and
+/recording/status.
+
+Each connected client gets its own bounded queue. When a client falls behind
+(slow tab, throttled background tab) the oldest events are dropped, so publish()
+never blocks the ingest threads. Clients detect drops through gaps in the row
+sequence numbers and resync over /data.
+
+Wire format (text/event-stream):
+    event: <name>
+    data: <json>
+    <blank line>
+"""
+
+import json
+import threading
+from collections import deque
+
+# Per-client queue length before events are dropped (oldest first)
+DEFAULT_QUEUE_SIZE = 256
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+# Reconnect delay suggested to the browser (milliseconds)
+RETRY_MS = 2000
+
+
+def format_event(event, data):
+    """Serialize one event in SSE wire format."""
+    payload = json.dumps(data, separators=(',', ':'))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """Bounded, drop-oldest event queue for one client."""
+
+    def __init__(self, maxlen=DEFAULT_QUEUE_SIZE):
+        self.queue = deque(maxlen=maxlen)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, message):
+        with self.cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(message)
+            self.cond.notify()
+
+    def get_all(self, timeout):
+        """Wait up to `timeout` seconds and return every queued message (may be empty)."""
+        with self.cond:
+            if not self.queue and not self.closed:
+                self.cond.wait(timeout)
+            messages = list(self.queue)
+            self.queue.clear()
+        return messages
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+
+class EventBroker:
+    """Fan-out of published events to all subscribed clients."""
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        sub = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+        sub.close()
+
+    @property
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Queue an event for every client. Never blocks on slow clients."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        message = format_event(event, data)
+        for sub in subscribers:
+            sub.put(message)
+
+    def stream(self, sub, heartbeat=HEARTBEAT_INTERVAL):
+        """Generator for a streaming HTTP response; unsubscribes when the client goes away."""
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while not sub.closed:
+                messages = sub.get_all(heartbeat)
+                if messages:
+                    yield "".join(messages)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
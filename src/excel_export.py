@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+TRITON Excel Export - Write-only .xlsx export with constant memory
+
+/export/excel used to build a regular openpyxl Workbook with a styled cell
+object (font, border, number format) for every value, so a long session
+allocated millions of cells and took minutes. Here the workbook is written in
+openpyxl's write_only mode:
+
+- rows go straight from the history matrix to the sheet XML, a chunk at a
+  time; no cell objects are kept
+- data styles (number format, width) are set per column, only the header
+  row is styled cell by cell
+- the workbook is saved to a temp file and streamed from there
+
+Sheets are unchanged: Sensor Data, BME280, MPU6050, Statistics, Metadata.
+
+Usage (benchmark):
+    # Old Workbook export vs. write_only, time and peak RSS per size
+    python3 excel_export.py [--rows 10000 100000 500000] [--legacy-max-rows 100000]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+DATA_LABELS = ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
+               "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+               "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
+SHEETS = [
+    ("Sensor Data", DATA_LABELS),
+    ("BME280", ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]"]),
+    ("MPU6050", ["Elapsed [s]", "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+                 "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]),
+]
+NUMBER_FORMAT = '0.000'
+CHUNK_ROWS = 4096
+STREAM_CHUNK = 64 * 1024
+
+
+def _styles():
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    header = {"font": Font(bold=True, color="FFFFFF"),
+              "fill": PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid"),
+              "alignment": Alignment(horizontal='center'),
+              "border": border}
+    return header, border, Font(bold=True)
+
+
+def _styled(ws, value, **style):
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value=value)
+    for name, attr in style.items():
+        setattr(cell, name, attr)
+    return cell
+
+
+def _header_row(ws, headers, header_style, min_width, number_format=NUMBER_FORMAT):
+    """Styled header cells plus column-level width and number format."""
+    from openpyxl.utils import get_column_letter
+
+    for col_idx, header in enumerate(headers, 1):
+        column = ws.column_dimensions[get_column_letter(col_idx)]
+        column.width = max(len(header) + 2, min_width)
+        if number_format:
+            column.number_format = number_format
+    ws.append([_styled(ws, header, **header_style) for header in headers])
+
+
+def _data_rows(matrix, picks, chunk_rows=CHUNK_ROWS):
+    """Rows of the selected matrix rows as lists (NaN -> None), one chunk at a time."""
+    for start in range(0, matrix.shape[1], chunk_rows):
+        for row in matrix[picks, start:start + chunk_rows].T.tolist():
+            yield [None if v != v else v for v in row]
+
+
+def metadata_rows(point_count, elapsed=None, start=None, end=None):
+    """Rows of the Metadata sheet; `elapsed` is the Elapsed [s] entry of column_statistics()."""
+    return [
+        ("Project", "TRITON"),
+        ("Description", "Autonomous submarine sensor data"),
+        ("Export Time", datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        ("Data Points", point_count),
+        ("Time Range Start", elapsed["min"] if elapsed else "N/A"),
+        ("Time Range End", elapsed["max"] if elapsed else "N/A"),
+        ("Filter Start", start if start is not None else "None"),
+        ("Filter End", end if end is not None else "None"),
+    ]
+
+
+def write_workbook(target, labels, matrix, statistics, metadata, progress=None):
+    """
+    Write the export workbook to `target` (path or binary file object).
+
+    `matrix` is (labels x rows), `statistics` maps label -> {"min", "max",
+    "avg", "count"} and `metadata` is a list of (label, value) pairs.
+    `progress`, if given, is called with the fraction (0..1) of rows written.
+    """
+    import openpyxl
+
+    header_style, border, bold = _styles()
+    index = {label: i for i, label in enumerate(labels)}
+    wb = openpyxl.Workbook(write_only=True)
+
+    total = max(1, matrix.shape[1] * len(SHEETS))
+    for sheet, (title, headers) in enumerate(SHEETS):
+        ws = wb.create_sheet(title)
+        _header_row(ws, headers, header_style, 12)
+        present = [index[h] for h in headers if h in index]
+        if len(present) == len(headers):
+            for n, row in enumerate(_data_rows(matrix, present)):
+                ws.append(row)
+                if progress is not None and n % CHUNK_ROWS == 0:
+                    progress((sheet * matrix.shape[1] + n) / total)
+        else:
+            # Labels missing from the store are left empty
+            positions = [headers.index(labels[i]) for i in present]
+            for values in _data_rows(matrix, present):
+                row = [None] * len(headers)
+                for pos, value in zip(positions, values):
+                    row[pos] = value
+                ws.append(row)
+
+    ws = wb.create_sheet("Statistics")
+    _header_row(ws, ["Metric", "Min", "Max", "Average", "Count"], header_style, 18, number_format=None)
+    for key in DATA_LABELS[1:]:  # Skip Elapsed
+        stats = statistics.get(key)
+        if stats:
+            ws.append([_styled(ws, key, border=border)] +
+                      [_styled(ws, stats[k], border=border, number_format=NUMBER_FORMAT)
+                       for k in ("min", "max", "avg")] +
+                      [_styled(ws, stats["count"], border=border)])
+
+    ws = wb.create_sheet("Metadata")
+    ws.column_dimensions['A'].width = 20
+    ws.column_dimensions['B'].width = 30
+    for label, value in metadata:
+        ws.append([_styled(ws, label, font=bold, border=border),
+                   _styled(ws, value, border=border)])
+
+    wb.save(target)
+
+
+def stream_file(f, chunk_size=STREAM_CHUNK):
+    """Yield a file's contents in chunks from the start, then close it."""
+    try:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
+def export_to_tempfile(labels, matrix, statistics, metadata):
+    """Write the workbook to an anonymous temp file (removed once closed)."""
+    f = tempfile.TemporaryFile(suffix=".xlsx")
+    try:
+        write_workbook(f, labels, matrix, statistics, metadata)
+    except Exception:
+        f.close()
+        raise
+    return f
+
+
+# ==================== Benchmark ====================
+
+def _legacy_workbook(target, labels, matrix):
+    """The old export_excel(): a regular Workbook with a styled cell per value."""
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    header_style, border, _ = _styles()
+    export_data = {label: [None if v != v else v for v in matrix[i].tolist()]
+                   for i, label in enumerate(labels)}
+    num_rows = matrix.shape[1]
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, headers in SHEETS:
+        ws = wb.create_sheet(title)
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=1, column=col, value=header)
+            for name, attr in header_style.items():
+                setattr(cell, name, attr)
+        for row_idx in range(num_rows):
+            for col_idx, header in enumerate(headers, 1):
+                values = export_data.get(header, [])
+                value = values[row_idx] if row_idx < len(values) else None
+                cell = ws.cell(row=row_idx + 2, column=col_idx, value=value)
+                cell.border = border
+                if isinstance(value, float):
+                    cell.number_format = NUMBER_FORMAT
+        for col_idx, header in enumerate(headers, 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = max(len(header) + 2, 12)
+    wb.save(target)
+
+
+def _bench_matrix(rows):
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(len(DATA_LABELS), rows))
+    matrix[0] = np.arange(rows) / 20.0
+    return matrix
+
+
+def _bench_one(variant, rows):
+    """Run one export in this process and print 'peak_mb baseline_mb bytes seconds'."""
+    import resource
+
+    from stats_engine import column_statistics
+
+    matrix = _bench_matrix(rows)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    t0 = time.perf_counter()
+    if variant == "legacy":
+        with tempfile.TemporaryFile() as f:
+            _legacy_workbook(f, DATA_LABELS, matrix)
+            size = f.tell()
+    else:
+        statistics = column_statistics(DATA_LABELS, matrix)
+        f = export_to_tempfile(DATA_LABELS, matrix, statistics, [("Data Points", rows)])
+        size = sum(len(chunk) for chunk in stream_file(f))
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{peak:.1f} {baseline:.1f} {size} {elapsed:.3f}")
+
+
+def benchmark(sizes=(10_000, 100_000, 500_000), legacy_max_rows=100_000):
+    """Time and peak RSS of both exports, each run in a fresh process."""
+    print(f"[BENCH] /export/excel, {len(DATA_LABELS)} columns")
+    print(f"[BENCH] {'rows':>8} {'variant':<11} {'time [s]':>9} {'peak RSS [MB]':>14} "
+          f"{'export [MB]':>12} {'xlsx [MB]':>10}")
+    for rows in sizes:
+        for variant in ("legacy", "write_only"):
+            if variant == "legacy" and rows > legacy_max_rows:
+                print(f"[BENCH] {rows:>8} {variant:<11} {'skipped (--legacy-max-rows)':>48}")
+                continue
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", variant,
+                                  "--rows", str(rows)],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            peak, baseline, size, elapsed = float(out[0]), float(out[1]), int(out[2]), float(out[3])
+            print(f"[BENCH] {rows:>8} {variant:<11} {elapsed:>9.2f} {peak:>14.1f} "
+                  f"{peak - baseline:>12.1f} {size / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Excel export benchmark")
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000,
+                        help="skip the old export above this size (it needs GBs of RAM)")
+    parser.add_argument("--run", choices=("legacy", "write_only"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        _bench_one(args.run, args.rows[0])
+    else:
+        benchmark(args.rows, args.legacy_max_rows)
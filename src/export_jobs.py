@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+TRITON Export Jobs - Background exports in worker processes
+
+The /export/json, /export/excel and /export/pdf endpoints build the file in
+the request thread, so a large export competes with the live telemetry for
+the same process. Export jobs move that work to worker processes:
+
+- submit() snapshots the selected rows to an .npy file in the export
+  directory and queues the build; the worker memory-maps the snapshot
+- each build is a `python3 export_worker.py` process, at most `workers` at
+  a time. export_worker.py imports only this module and the export writers,
+  never app.py (which binds the port and opens the serial link on import)
+- the job goes to the worker pickled on stdin; the worker reports progress
+  on stdout, a runner thread in the server applies it to the job table
+- finished files are cached by (format, time range, data version);
+  the data version changes whenever the rows in that range change, so asking
+  for the same range again returns the existing file without a new job
+- the newest `max_artifacts` files are kept, older ones are deleted
+- statistics in the files are the caller's (app.py passes the same running
+  statistics the synchronous /export/* endpoints use); only without them
+  does the worker compute exact ones from the rows
+- a worker that dies fails only its own job. shutdown() terminates the
+  workers this instance started
+- the export directory may be shared with another server: only snapshots
+  and partial files (job id names) are removed, on the first submit()
+
+Usage (benchmark):
+    # Request latency while exports run in the pool vs. in-process
+    python3 export_jobs.py [--rows 200000] [--format excel]
+"""
+
+import os
+import pickle
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+FORMATS = {
+    "json": (".json", "application/json"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+    "excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": (".pdf", "application/pdf"),
+}
+DEFAULT_WORKERS = 1
+DEFAULT_MAX_ARTIFACTS = 16
+PROGRESS_STEP = 0.01
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export_worker.py")
+
+# Snapshot and partial file of a job (12 hex digit job id); finished files are left alone
+_LEFTOVER_RE = re.compile(r"[0-9a-f]{12}(\.npy|(%s)\.part)" % "|".join(re.escape(ext) for ext, _ in FORMATS.values()))
+
+
+# ==================== Worker Side ====================
+
+
+def build_export(fmt, target, labels, matrix, start=None, end=None, progress=None, statistics=None):
+    """
+    Write one export file for a (labels x rows) matrix to the `target` path.
+
+    `statistics` (stats_engine.column_statistics() layout, "std" for pdf)
+    is what goes into the file; None computes exact ones from `matrix`.
+    """
+    from export_stream import export_metadata, stream_export
+    from stats_engine import column_statistics
+
+    if statistics is not None:
+        statistics = dict(statistics)
+    if fmt in ("json", "ndjson"):
+        if statistics is None:
+            statistics = column_statistics(labels, matrix)
+        metadata = export_metadata(matrix.shape[1], statistics.pop("Elapsed [s]", None), start, end)
+        mode = "ndjson" if fmt == "ndjson" else "pretty"
+        with open(target, "w", encoding="utf-8") as f:
+            for chunk in stream_export(labels, matrix, metadata, statistics, mode, progress=progress):
+                f.write(chunk)
+    elif fmt == "excel":
+        from excel_export import metadata_rows, write_workbook
+
+        if statistics is None:
+            statistics = column_statistics(labels, matrix)
+        metadata = metadata_rows(matrix.shape[1], statistics.get("Elapsed [s]"), start, end)
+        write_workbook(target, labels, matrix, statistics, metadata, progress)
+    elif fmt == "pdf":
+        from pdf_report import write_pdf_report
+
+        write_pdf_report(target, labels, matrix, start, end, progress, statistics)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}' (use {', '.join(FORMATS)})")
+
+
+def run_job(job_id, fmt, snapshot, labels, target, start, end, statistics=None, progress=None):
+    """Build `target` from the snapshot (in export_worker.py), then delete the snapshot."""
+    try:
+        matrix = np.load(snapshot, mmap_mode="r")
+        partial = target + ".part"
+        build_export(fmt, partial, labels, matrix, start, end, progress, statistics)
+        del matrix
+        os.replace(partial, target)
+        return os.path.getsize(target)
+    finally:
+        try:
+            os.remove(snapshot)
+        except OSError:
+            pass
+
+
+# ==================== Server Side ====================
+
+class ExportJobs:
+    """Job table, artifact cache and worker processes for background exports."""
+
+    def __init__(self, directory, workers=DEFAULT_WORKERS, max_artifacts=DEFAULT_MAX_ARTIFACTS):
+        self.directory = directory
+        self.workers = max(1, int(workers))
+        self.max_artifacts = max(1, int(max_artifacts))
+        self.lock = threading.Lock()
+        self._jobs = {}                     # job id -> job dict
+        self._artifacts = OrderedDict()     # cache key -> job id, oldest first
+        self._pending = {}                  # cache key -> job id of a queued/running build
+        self._processes = {}                # job id -> worker Popen while it runs
+        self._queue = None                  # Builds waiting for a runner thread
+        self._cleaned = False
+        os.makedirs(directory, exist_ok=True)
+
+    def _start_runners(self):
+        if self._queue is not None:
+            return
+        self._queue = queue.Queue()
+        for i in range(self.workers):
+            threading.Thread(target=self._run, args=(self._queue,), name=f"export-runner-{i}", daemon=True).start()
+
+    def _remove_leftovers(self):
+        """Snapshots and partial files of builds that never finished (a crashed or killed server)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if _LEFTOVER_RE.fullmatch(name):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _remove_job_files(self, job_id):
+        """The snapshot and partial file of one job (run_job removes them itself unless killed)."""
+        job = self.get(job_id)
+        for path in [os.path.join(self.directory, job_id + ".npy")] + ([job["path"] + ".part"] if job else []):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ==================== Workers ====================
+
+    def _run(self, builds):
+        """Runner thread: one worker process per build, `workers` runners at a time."""
+        while True:
+            item = builds.get()
+            if item is None:
+                return
+            job_id, key, args = item
+            with self.lock:
+                job = self._jobs.get(job_id)
+                process = None
+                if job is not None and job["status"] == "queued":
+                    # Started under the lock, so shutdown() either sees it or has already failed the job
+                    process = subprocess.Popen([sys.executable, WORKER_SCRIPT],
+                                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                    self._processes[job_id] = process
+                    job["status"] = "running"
+            if process is None:
+                self._remove_job_files(job_id)
+            else:
+                self._watch(job_id, key, process, args)
+
+    def _watch(self, job_id, key, process, args):
+        error = None
+        try:
+            process.stdin.write(pickle.dumps(args))
+            process.stdin.close()
+            for line in process.stdout:
+                kind, _, value = line.decode("utf-8", "replace").strip().partition(" ")
+                if kind == "progress":
+                    self._progress(job_id, float(value))
+                elif kind == "error":
+                    error = value
+        except (OSError, ValueError) as e:
+            error = error or e
+        finally:
+            process.stdout.close()
+        returncode = process.wait()
+        with self.lock:
+            self._processes.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            path = job["path"] if job else None
+        if returncode == 0 and error is None and path and os.path.isfile(path):
+            self._finish(job_id, key, os.path.getsize(path))
+            return
+        self._remove_job_files(job_id)
+        self._fail(job_id, key, error or f"Export worker stopped unexpectedly (exit status {returncode})")
+
+    def _progress(self, job_id, fraction):
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job and job["status"] in ("queued", "running"):
+                job["status"] = "running"
+                job["progress"] = max(job["progress"], min(fraction, 0.99))
+
+    # ==================== Jobs ====================
+
+    def submit(self, fmt, labels, matrix, start=None, end=None, version=None, statistics=None):
+        """
+        Queue an export (or return the cached / already running one).
+
+        `matrix` may be a callable returning the (labels x rows) array; it is
+        only called when the file has to be built. `statistics` (see
+        build_export) may be a callable too, called right after it.
+        `version` identifies the data in the range (None disables caching).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}' (use {', '.join(FORMATS)})")
+        key = (fmt, start, end, version) if version is not None else None
+
+        with self.lock:
+            if not self._cleaned:
+                self._remove_leftovers()
+                self._cleaned = True
+            for table in (self._artifacts, self._pending):
+                job_id = table.get(key) if key else None
+                if job_id is not None and self._usable(self._jobs[job_id]):
+                    if table is self._artifacts:
+                        self._artifacts.move_to_end(key)
+                    return dict(self._jobs[job_id], cached=True)
+
+            job_id = uuid.uuid4().hex[:12]
+            extension, _ = FORMATS[fmt]
+            job = {
+                "id": job_id, "format": fmt, "status": "queued", "progress": 0.0,
+                "range": {"start": start, "end": end}, "created": time.time(),
+                "finished": None, "size": None, "error": None,
+                "path": os.path.join(self.directory, job_id + extension)
+            }
+            self._jobs[job_id] = job
+            if key:
+                self._pending[key] = job_id
+
+        try:
+            data = matrix() if callable(matrix) else matrix
+            stats = statistics() if callable(statistics) else statistics
+            job["rows"] = int(data.shape[1])
+            snapshot = os.path.join(self.directory, job_id + ".npy")
+            np.save(snapshot, np.ascontiguousarray(data))
+            del data
+
+            args = (job_id, fmt, snapshot, list(labels), job["path"], start, end, stats)
+            with self.lock:
+                self._start_runners()
+                self._queue.put((job_id, key, args))
+        except Exception as e:
+            self._remove_job_files(job_id)
+            self._fail(job_id, key, e)
+        return self.get(job_id)
+
+    def _usable(self, job):
+        if job["status"] == "done":
+            return os.path.isfile(job["path"])
+        return job["status"] in ("queued", "running")
+
+    def _finish(self, job_id, key, size):
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] == "error":
+                return
+            job.update(status="done", progress=1.0, size=size, finished=time.time())
+            if key:
+                self._pending.pop(key, None)
+                self._artifacts[key] = job_id
+                self._artifacts.move_to_end(key)
+                self._evict()
+
+    def _fail(self, job_id, key, error):
+        with self.lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] == "error":
+                return
+            print(f"[EXPORT] Job {job_id} failed: {error}")
+            job.update(status="error", error=str(error), finished=time.time())
+            if key:
+                self._pending.pop(key, None)
+
+    def _evict(self):
+        while len(self._artifacts) > self.max_artifacts:
+            _, job_id = self._artifacts.popitem(last=False)
+            job = self._jobs.pop(job_id, None)
+            if job:
+                try:
+                    os.remove(job["path"])
+                except OSError:
+                    pass
+
+    def get(self, job_id):
+        """Snapshot of a job dict, or None if unknown (or evicted)."""
+        with self.lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self):
+        """Fail the queued and running jobs and terminate their workers; a later submit() starts over."""
+        with self.lock:
+            builds, processes = self._queue, list(self._processes.values())
+            self._queue = None
+            for job in self._jobs.values():
+                if job["status"] in ("queued", "running"):
+                    job.update(status="error", error="Export workers stopped", finished=time.time())
+            self._pending.clear()
+        if builds is not None:
+            for _ in range(self.workers):
+                builds.put(None)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+# ==================== Benchmark ====================
+
+def _bench_matrix(rows):
+    from excel_export import DATA_LABELS
+
+    matrix = np.random.default_rng(0).normal(size=(len(DATA_LABELS), rows))
+    matrix[0] = np.arange(rows) / 20.0
+    return DATA_LABELS, matrix
+
+
+def _probe_latency(stop, samples, period=0.02):
+    """Stand-in for a /data request every 20 ms; records how late each one finished."""
+    data = np.random.default_rng(1).normal(size=(12, 300))
+    due = time.perf_counter() + period
+    while not stop.is_set():
+        time.sleep(max(0.0, due - time.perf_counter()))
+        [float(v) for v in data.mean(axis=1)]
+        {str(i): data[i].tolist() for i in range(len(data))}
+        samples.append(time.perf_counter() - due)
+        due += period
+
+
+def benchmark(rows=200_000, fmt="excel"):
+    import tempfile
+
+    labels, matrix = _bench_matrix(rows)
+    print(f"[BENCH] {fmt} export of {rows:,} rows, probe = delay of a simulated /data request every 20 ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in ("in-process", "worker"):
+            samples, stop = [], threading.Event()
+            probe = threading.Thread(target=_probe_latency, args=(stop, samples))
+            probe.start()
+            t0 = time.perf_counter()
+            if variant == "in-process":
+                build_export(fmt, os.path.join(tmp, "inline" + FORMATS[fmt][0]), labels, matrix)
+            else:
+                jobs = ExportJobs(os.path.join(tmp, "jobs"))
+                job = jobs.submit(fmt, labels, matrix, version=1)
+                while jobs.get(job["id"])["status"] in ("queued", "running"):
+                    time.sleep(0.05)
+                cached = jobs.submit(fmt, labels, matrix, version=1)
+                jobs.shutdown()
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            probe.join()
+
+            lat = np.array(samples) * 1e3
+            print(f"[BENCH] {variant:<10} export {elapsed:6.2f} s   probe p50 {np.percentile(lat, 50):6.2f} ms  "
+                  f"p99 {np.percentile(lat, 99):7.2f} ms  max {lat.max():7.2f} ms")
+        print(f"[BENCH] repeated request: cached={cached.get('cached', False)}, status={cached['status']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export job benchmark")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--format", choices=list(FORMATS), default="excel")
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.format)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+TRITON Export Stream - Chunked JSON export of the session history
+
+/export/json used to convert the whole history to Python lists, compute the
+statistics in pure Python and json.dumps(indent=2) the result in one go, so a
+long session was held in memory several times over (arrays, lists, string).
+Here the document is produced as a generator of text chunks instead:
+
+- statistics come from stats_engine.column_statistics(), one vectorized pass
+  over the (labels x rows) matrix in blocks of columns
+- the data section is serialized `chunk_rows` values at a time
+- modes:
+    "pretty"   same layout as the old json.dumps(indent=2) output
+    "compact"  same document without whitespace
+    "ndjson"   one header line ({"metadata", "statistics", "columns"}),
+               then one JSON array per row in column order
+
+Usage (benchmark):
+    # Peak RSS of the old export vs. the stream, each in a fresh process
+    python3 export_stream.py [--rows 1000000] [--mode pretty]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from history_store import HistoryStore
+from stats_engine import column_statistics
+
+MODES = ("pretty", "compact", "ndjson")
+CHUNK_ROWS = 8192
+
+_COMPACT = (",", ":")
+
+SENSORS = {
+    "BME280": ["Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]"],
+    "MPU6050": ["Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+                "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]", "Temp_MPU [°C]"]
+}
+
+
+# ==================== Metadata ====================
+
+def export_metadata(point_count, elapsed=None, start=None, end=None):
+    """The "metadata" section; `elapsed` is the Elapsed [s] entry of column_statistics()."""
+    return {
+        "export_timestamp": datetime.now().isoformat(),
+        "project": "TRITON",
+        "description": "Autonomous submarine sensor data",
+        "point_count": point_count,
+        "time_range": {
+            "start": elapsed["min"] if elapsed else None,
+            "end": elapsed["max"] if elapsed else None,
+            "filter_applied": {
+                "start": start,
+                "end": end
+            } if start is not None or end is not None else None
+        },
+        "sensors": SENSORS
+    }
+
+
+# ==================== Serialization ====================
+
+def _indent(text, prefix):
+    """Indent every line but the first (for nesting pretty-printed JSON)."""
+    return text.replace("\n", "\n" + prefix)
+
+
+def _values(values, separator):
+    """Serialize a float array as JSON list items (no brackets), NaN -> null."""
+    return json.dumps(HistoryStore.to_list(values), separators=(separator, ":"))[1:-1]
+
+
+def _stream_pretty(labels, matrix, metadata, statistics, chunk_rows, report):
+    yield ('{\n  "metadata": ' + _indent(json.dumps(metadata, indent=2), "  ") +
+           ',\n  "statistics": ' + _indent(json.dumps(statistics, indent=2), "  ") +
+           ',\n  "data": {')
+
+    item = ",\n      "
+    for i, label in enumerate(labels):
+        report(i / len(labels))
+        yield ("\n" if i == 0 else ",\n") + "    " + json.dumps(label) + ": ["
+        if not matrix.shape[1]:
+            yield "]"
+            continue
+        for start in range(0, matrix.shape[1], chunk_rows):
+            yield item[1:] if start == 0 else item
+            yield _values(matrix[i, start:start + chunk_rows], item)
+        yield "\n    ]"
+
+    yield "\n  }\n}" if labels else "}\n}"
+
+
+def _stream_compact(labels, matrix, metadata, statistics, chunk_rows, report):
+    yield ('{"metadata":' + json.dumps(metadata, separators=_COMPACT) +
+           ',"statistics":' + json.dumps(statistics, separators=_COMPACT) +
+           ',"data":{')
+
+    for i, label in enumerate(labels):
+        report(i / len(labels))
+        yield ("" if i == 0 else ",") + json.dumps(label) + ":["
+        for start in range(0, matrix.shape[1], chunk_rows):
+            if start:
+                yield ","
+            yield _values(matrix[i, start:start + chunk_rows], ",")
+        yield "]"
+
+    yield "}}"
+
+
+def _stream_ndjson(labels, matrix, metadata, statistics, chunk_rows, report):
+    yield json.dumps({"metadata": metadata, "statistics": statistics,
+                      "columns": list(labels)}, separators=_COMPACT) + "\n"
+
+    for start in range(0, matrix.shape[1], chunk_rows):
+        report(start / matrix.shape[1])
+        rows = [[None if v != v else v for v in row]
+                for row in matrix[:, start:start + chunk_rows].T.tolist()]
+        # Rows only contain numbers and null, so "],[" is always a row boundary
+        yield json.dumps(rows, separators=_COMPACT)[1:-1].replace("],[", "]\n[") + "\n"
+
+
+def stream_export(labels, matrix, metadata, statistics, mode="pretty", chunk_rows=CHUNK_ROWS,
+                  progress=None):
+    """
+    Yield the export document for a (labels x rows) matrix as text chunks.
+
+    `progress`, if given, is called with the fraction (0..1) already written.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown export mode '{mode}' (use {', '.join(MODES)})")
+    streams = {"pretty": _stream_pretty, "compact": _stream_compact, "ndjson": _stream_ndjson}
+    report = progress or (lambda fraction: None)
+    return streams[mode](list(labels), matrix, metadata, statistics, max(1, int(chunk_rows)), report)
+
+
+# ==================== Benchmark ====================
+
+def _bench_store(rows, tmp):
+    """Simulated session: 20 Hz, 300-row ring, everything else spilled to disk."""
+    from history_store import BENCH_LABELS
+
+    store = HistoryStore(BENCH_LABELS, capacity=300, spill_path=os.path.join(tmp, "bench.spill"))
+    noise = np.random.default_rng(0).normal(size=(4096, len(BENCH_LABELS) - 1))
+    for i in range(rows):
+        row = [i / 20.0]
+        row.extend(noise[i % len(noise)].tolist())
+        store.append(row)
+    return store
+
+
+def _legacy_export(store):
+    """The old export_json() body: lists, pure-Python stats, one json.dumps."""
+    export_data = store.to_dict(include_spill=True)
+    elapsed = export_data.get("Elapsed [s]", [])
+    metadata = {"point_count": len(elapsed),
+                "time_range": {"start": min(elapsed) if elapsed else None,
+                               "end": max(elapsed) if elapsed else None}}
+    statistics = {}
+    for key, values in export_data.items():
+        if key == "Elapsed [s]":
+            continue
+        numeric_values = [v for v in values if v is not None and isinstance(v, (int, float))]
+        if numeric_values:
+            statistics[key] = {"min": min(numeric_values), "max": max(numeric_values),
+                               "avg": sum(numeric_values) / len(numeric_values),
+                               "count": len(numeric_values)}
+    yield json.dumps({"metadata": metadata, "statistics": statistics, "data": export_data}, indent=2)
+
+
+def _streamed_export(store, mode):
+    matrix = store.matrix(include_spill=True)
+    statistics = column_statistics(store.labels, matrix)
+    elapsed = statistics.pop("Elapsed [s]", None)
+    metadata = {"point_count": matrix.shape[1],
+                "time_range": {"start": elapsed["min"] if elapsed else None,
+                               "end": elapsed["max"] if elapsed else None}}
+    return stream_export(store.labels, matrix, metadata, statistics, mode)
+
+
+def _bench_one(variant, rows, mode):
+    """Run one export in this process and print 'peak_mb baseline_mb bytes seconds'."""
+    import resource
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _bench_store(rows, tmp)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        t0 = time.perf_counter()
+        chunks = _legacy_export(store) if variant == "legacy" else _streamed_export(store, mode)
+        size = 0
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            for chunk in chunks:
+                size += len(chunk)
+                sink.write(chunk)
+        elapsed = time.perf_counter() - t0
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        store.close()
+    print(f"{peak:.1f} {baseline:.1f} {size} {elapsed:.3f}")
+
+
+def benchmark(rows=1_000_000, mode="pretty"):
+    """Peak RSS of each export variant, measured in a fresh process each."""
+    print(f"[BENCH] /export/json, {rows:,} rows, 12 columns")
+    print(f"[BENCH] {'variant':<16} {'peak RSS [MB]':>14} {'export [MB]':>12} {'bytes':>14} {'time [s]':>9}")
+    for variant, variant_mode in (("legacy", "pretty"), ("stream", mode)):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", variant,
+                              "--rows", str(rows), "--mode", variant_mode],
+                             capture_output=True, text=True, check=True).stdout.split()
+        peak, baseline, size, elapsed = float(out[0]), float(out[1]), int(out[2]), float(out[3])
+        name = f"{variant} ({variant_mode})"
+        print(f"[BENCH] {name:<16} {peak:>14.1f} {peak - baseline:>12.1f} {size:>14,} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSON export memory benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=MODES, default="pretty")
+    parser.add_argument("--run", choices=("legacy", "stream"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        _bench_one(args.run, args.rows, args.mode)
+    else:
+        benchmark(args.rows, args.mode)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+TRITON Export Worker - Process that builds one background export
+
+export_jobs.ExportJobs starts `python3 export_worker.py` for every export
+job. This script imports only export_jobs and the export writers, so a
+worker never runs app.py's import-time setup (port 5000, serial link,
+motor thread):
+
+- the job arrives pickled on stdin: run_job()'s arguments
+- progress goes to stdout as "progress <fraction>" lines, sent only when the
+  value moved by PROGRESS_STEP; anything else printed goes to stderr
+- exit status 0 means the file is in place. On failure the last stdout
+  line is "error <message>"
+
+Usage:
+    # Started by export_jobs.ExportJobs, not by hand
+    python3 export_worker.py < job.pickle
+"""
+
+import pickle
+import sys
+
+from export_jobs import PROGRESS_STEP, run_job
+
+
+def _reporter(channel):
+    """Progress callback that only sends when the value moved by PROGRESS_STEP."""
+    last = [-1.0]
+
+    def report(fraction):
+        if fraction - last[0] >= PROGRESS_STEP:
+            last[0] = fraction
+            channel.write(f"progress {float(fraction):.4f}\n")
+            channel.flush()
+    return report
+
+
+def main():
+    # stdout is the channel to the server; prints from the writers must not end up in it
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        args = pickle.load(sys.stdin.buffer)
+        run_job(*args, progress=_reporter(channel))
+    except Exception as e:
+        message = " ".join(f"{type(e).__name__}: {e}".split())
+        channel.write(f"error {message}\n")
+        channel.flush()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+TRITON History Store - Bounded columnar sensor history
+
+Replaces the old dict-of-lists `history` in app.py, which grew for as long as
+the server was running. Every sensor label gets a preallocated float64 column
+inside one fixed-capacity ring buffer:
+
+- append() is O(1) and never allocates
+- the newest `capacity` rows are always available as zero-copy NumPy views
+- rows pushed out of the ring can optionally be spilled to a binary file on
+  disk so exports still cover the whole session
+- missing / non-numeric values are stored as NaN and returned as None
+- every row gets a monotonically increasing sequence number, so readers can
+  ask for "everything after seq N" instead of the whole window
+- with a `time_label`, query(start, end) finds a time range by binary search
+  (see time_index.py) and reads only the matching spilled rows
+
+The ring is stored twice side by side ("mirrored"), so the live window is
+always one contiguous slice no matter where the write position is.
+
+Usage:
+    # Memory benchmark, simulated 24 h at 20 Hz
+    python3 history_store.py [--hours 24] [--rate 20] [--capacity 300]
+
+    # /data load test: full history vs. delta (since=<cursor>) per poll
+    python3 history_store.py --delta
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from time_index import TimeIndex, find_range, range_length
+
+
+class HistoryStore:
+    """Fixed-capacity columnar ring buffer for sensor history."""
+
+    def __init__(self, labels, capacity=300, spill_path=None, time_label=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.labels = list(labels)
+        self._index = {label: i for i, label in enumerate(self.labels)}
+        self.capacity = int(capacity)
+        self.spill_path = spill_path
+        self.time_label = time_label
+        self._time = TimeIndex()    # Run breaks of the time column, by row position since clear()
+        self.lock = threading.RLock()
+
+        self._spill_file = None
+        self._spilled = 0
+        self._seq = 0           # Sequence number of the next row, never reset
+        self.epoch = time.time_ns() // 1000  # Changes whenever sequence numbers become meaningless
+        self._allocate()
+        self._open_spill()
+
+    # ==================== Internal Helpers ====================
+
+    def _allocate(self):
+        """Allocate the mirrored ring buffer (one row per label)."""
+        self._buf = np.full((len(self.labels), 2 * self.capacity), np.nan, dtype=np.float64)
+        self._head = 0          # Ring slot the next row is written to
+        self._count = 0         # Number of valid rows in the ring
+        self._appended = 0      # Rows appended since the last clear()
+
+    def _open_spill(self):
+        """(Re)create the spill file, discarding previous contents."""
+        self._close_spill()
+        self._spilled = 0
+        if self.spill_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+            self._spill_file = open(self.spill_path, 'wb')
+
+    def _close_spill(self):
+        if self._spill_file is not None:
+            try:
+                self._spill_file.close()
+            except Exception as e:
+                print(f"[HISTORY] Error closing spill file: {e}")
+            self._spill_file = None
+
+    def _row_from(self, values):
+        """Convert a dict (label -> value) or a sequence to a float64 row."""
+        row = np.full(len(self.labels), np.nan, dtype=np.float64)
+        if isinstance(values, dict):
+            items = ((self._index.get(k), v) for k, v in values.items())
+        else:
+            items = enumerate(values)
+
+        for i, value in items:
+            if i is None or i >= len(row) or value is None:
+                continue
+            try:
+                row[i] = float(value)
+            except (ValueError, TypeError):
+                pass
+        return row
+
+    def _window_start(self):
+        return (self._head - self._count) % self.capacity
+
+    @staticmethod
+    def to_list(values):
+        """Convert a float array to a JSON-friendly list (NaN -> None)."""
+        return [None if v != v else v for v in values.tolist()]
+
+    # ==================== Writing ====================
+
+    def append(self, values):
+        """
+        Append one row. Accepts a dict keyed by label or a sequence in label order.
+
+        Returns (seq, row): the row's sequence number and the stored float values.
+        """
+        row = self._row_from(values)
+        with self.lock:
+            head = self._head
+            if self._count == self.capacity:
+                if self._spill_file is not None:
+                    self._spill_file.write(self._buf[:, head].tobytes())
+                    self._spilled += 1
+            else:
+                self._count += 1
+
+            self._buf[:, head] = row
+            self._buf[:, head + self.capacity] = row
+            self._head = (head + 1) % self.capacity
+            if self.time_label is not None:
+                self._time.append(row[self._index[self.time_label]])
+                if self._spill_file is None:
+                    self._time.forget(self._appended + 1 - self._count)
+            self._appended += 1
+            self._seq += 1
+            return self._seq - 1, row
+
+    def clear(self):
+        """Drop all rows, including anything spilled to disk."""
+        with self.lock:
+            self._buf.fill(np.nan)
+            self._head = 0
+            self._count = 0
+            self._appended = 0
+            self._time.clear()
+            self.epoch += 1
+            self._open_spill()
+
+    def resize(self, capacity):
+        """Change the ring capacity, keeping the newest rows."""
+        capacity = int(capacity)
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        with self.lock:
+            if capacity == self.capacity:
+                return
+            window = self.window().copy()
+            appended = self._appended
+
+            # Rows that no longer fit are spilled like any other evicted row
+            overflow = max(0, window.shape[1] - capacity)
+            if overflow and self._spill_file is not None:
+                self._spill_file.write(np.ascontiguousarray(window[:, :overflow].T).tobytes())
+                self._spilled += overflow
+            window = window[:, overflow:]
+
+            self.capacity = capacity
+            self._allocate()
+            n = window.shape[1]
+            self._buf[:, :n] = window
+            self._buf[:, capacity:capacity + n] = window
+            self._head = n % capacity
+            self._count = n
+            self._appended = appended
+
+    def close(self):
+        with self.lock:
+            self._close_spill()
+
+    # ==================== Reading ====================
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def appended(self):
+        """Total rows appended since the last clear (ring + spill)."""
+        return self._appended
+
+    @property
+    def seq(self):
+        """Sequence number the next appended row will get."""
+        return self._seq
+
+    @property
+    def spilled(self):
+        """Rows evicted from the ring into the spill file."""
+        return self._spilled
+
+    def window(self):
+        """Zero-copy (labels x rows) view of the rows currently in the ring."""
+        start = self._window_start()
+        return self._buf[:, start:start + self._count]
+
+    def column(self, label):
+        """Zero-copy view of one column, oldest row first."""
+        start = self._window_start()
+        return self._buf[self._index[label], start:start + self._count]
+
+    def since(self, seq, epoch=None):
+        """
+        Rows appended at or after sequence number `seq`.
+
+        Returns (cursor, epoch, reset, columns): `cursor` and `epoch` are the
+        values to pass back next time and `columns` maps label -> float array
+        (copied). `reset` is True when `seq` is unknown, already left the ring
+        or belongs to another `epoch`, in which case the whole ring is returned
+        and the caller should drop what it has.
+        """
+        with self.lock:
+            first = self._seq - self._count
+            reset = (seq is None or seq < first or seq > self._seq
+                     or (epoch is not None and epoch != self.epoch))
+            start = first if reset else seq
+            window = self.window()[:, start - first:].copy()
+            cursor, epoch = self._seq, self.epoch
+        return cursor, epoch, reset, {label: window[i] for i, label in enumerate(self.labels)}
+
+    def last(self, label, default=None):
+        """Most recent value for a label, or `default` if empty / missing."""
+        with self.lock:
+            if not self._count:
+                return default
+            value = self._buf[self._index[label], (self._head - 1) % self.capacity]
+        return default if np.isnan(value) else float(value)
+
+    def read_spill(self):
+        """Return the spilled rows as a (labels x rows) array (empty if none)."""
+        with self.lock:
+            if self._spill_file is None or not self._spilled:
+                return np.empty((len(self.labels), 0), dtype=np.float64)
+            self._spill_file.flush()
+            spilled = self._spilled
+
+        data = np.fromfile(self.spill_path, dtype=np.float64, count=spilled * len(self.labels))
+        return data.reshape(spilled, len(self.labels)).T
+
+    def matrix(self, include_spill=False):
+        """
+        (labels x rows) copy of the history, oldest row first.
+
+        With `include_spill` the spilled rows are prepended.
+        """
+        with self.lock:
+            window = self.window()
+            if include_spill and self._spilled:
+                return np.concatenate([self.read_spill(), window], axis=1)
+            return window.copy()
+
+    def columns(self, include_spill=False):
+        """Dict of label -> float array (rows of one matrix() copy)."""
+        window = self.matrix(include_spill)
+        return {label: window[i] for i, label in enumerate(self.labels)}
+
+    def time_range(self, start=None, end=None, include_spill=False):
+        """
+        Row positions with `start <= time_label <= end`, as (spill_rows, ring_rows).
+
+        Each part is a slice or an index array (see time_index.find_range);
+        spill_rows index the spill file, ring_rows the current window().
+        O(log n) per monotonic run of the time column.
+        """
+        if self.time_label is None:
+            raise ValueError("HistoryStore has no time_label")
+
+        with self.lock:
+            t = self._index[self.time_label]
+            first = self._appended - self._count
+            ring_rows = find_range(self.window()[t], start, end,
+                                   [b - first for b in self._time.breaks(first, self._appended)])
+            spill_rows = slice(0, 0)
+            if include_spill and self._spilled:
+                spill = self._spill_map()
+                spill_rows = find_range(spill[:, t], start, end, self._time.breaks(0, self._spilled))
+        return spill_rows, ring_rows
+
+    def query(self, start=None, end=None, include_spill=False, copy=True):
+        """
+        (labels x rows) array of the rows with `start <= time_label <= end`.
+
+        Only the matching spilled rows are read. With copy=False a range that
+        lies in the ring comes back as a view into it (valid until the next
+        append).
+        """
+        with self.lock:
+            spill_rows, ring_rows = self.time_range(start, end, include_spill)
+            ring = self.window()[:, ring_rows]
+            if range_length(spill_rows):
+                spilled = np.asarray(self._spill_map()[spill_rows]).T
+                return np.concatenate([spilled, ring], axis=1)
+            return ring.copy() if copy and isinstance(ring_rows, slice) else ring
+
+    def rows(self, lo, hi):
+        """
+        (labels x rows) copy of the rows at positions lo..hi-1, counted from
+        the last clear() (see running_stats.RunningStats). Rows that left the
+        ring without a spill file are no longer available and left out.
+        """
+        with self.lock:
+            first = self._appended - self._count
+            parts = []
+            if lo < min(hi, self._spilled):
+                parts.append(np.asarray(self._spill_map()[lo:min(hi, self._spilled)]).T)
+            a, b = max(lo, first), min(hi, self._appended)
+            parts.append(self.window()[:, a - first:max(a, b) - first])
+            return np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0].copy()
+
+    def _spill_map(self):
+        """Spilled rows as a read-only (rows x labels) memmap."""
+        self._spill_file.flush()
+        return np.memmap(self.spill_path, dtype=np.float64, mode='r',
+                         shape=(self._spilled, len(self.labels)))
+
+    def to_dict(self, include_spill=False):
+        """Dict of label -> list (NaN mapped to None), ready for jsonify."""
+        return {label: self.to_list(values)
+                for label, values in self.columns(include_spill).items()}
+
+
+# ==================== Benchmark ====================
+
+BENCH_LABELS = [
+    "Elapsed [s]",
+    "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
+    "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+    "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
+    "Temp_MPU [°C]"
+]
+
+
+def _current_rss_mb():
+    """Resident set size of this process in MB (Linux /proc, else peak RSS)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark(hours=24.0, rate=20.0, capacity=300, spill=True):
+    """Feed a simulated mission into the store and print RSS once per simulated hour."""
+    import tempfile
+
+    labels = BENCH_LABELS
+    total = int(hours * 3600 * rate)
+    per_hour = int(3600 * rate)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spill_path = os.path.join(tmp, "history.spill") if spill else None
+        store = HistoryStore(labels, capacity=capacity, spill_path=spill_path)
+        rng = np.random.default_rng(0)
+        noise = rng.normal(size=(per_hour, len(labels) - 1))
+
+        print(f"[BENCH] {total} rows ({hours} h @ {rate} Hz), capacity={capacity}, spill={spill}")
+        print(f"[BENCH] {'hour':>5} {'rows':>10} {'RSS [MB]':>10} {'append [us]':>12}")
+        print(f"[BENCH] {0:>5} {0:>10} {_current_rss_mb():>10.1f} {'':>12}")
+
+        t0 = time.perf_counter()
+        for hour in range(int(np.ceil(total / per_hour))):
+            n = min(per_hour, total - hour * per_hour)
+            t_hour = time.perf_counter()
+            for i in range(n):
+                row = [(hour * per_hour + i) / rate]
+                row.extend(noise[i].tolist())
+                store.append(row)
+            dt = time.perf_counter() - t_hour
+            print(f"[BENCH] {hour + 1:>5} {store.appended:>10} {_current_rss_mb():>10.1f} {dt / n * 1e6:>12.2f}")
+
+        elapsed = time.perf_counter() - t0
+        print(f"[BENCH] Done in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s), "
+              f"ring={len(store)} spilled={store.spilled}")
+        store.close()
+
+
+def _poll_payload(store, since=None, epoch=None):
+    """Serialize a /data response the same way app.get_data() does."""
+    import json
+
+    cursor, epoch, reset, columns = store.since(since, epoch)
+    return cursor, epoch, json.dumps({
+        "history": {label: HistoryStore.to_list(values) for label, values in columns.items()},
+        "cursor": cursor,
+        "epoch": epoch,
+        "reset": reset,
+        "capacity": store.capacity
+    })
+
+
+def benchmark_delta(sizes=(1_000, 100_000, 1_000_000), rate=20.0, polls=5):
+    """Compare bytes and server time per 1 s dashboard poll: full history vs. delta."""
+    rng = np.random.default_rng(0)
+    new_rows = int(rate)    # Rows arriving between two 1 s polls
+
+    print(f"[BENCH] /data per poll, {new_rows} new rows between polls")
+    print(f"[BENCH] {'points':>9} {'full [B]':>12} {'full [ms]':>10} {'delta [B]':>10} {'delta [ms]':>11}")
+
+    for size in sizes:
+        store = HistoryStore(BENCH_LABELS, capacity=size)
+        for i in range(size):
+            store.append([i / rate] + rng.normal(size=len(BENCH_LABELS) - 1).tolist())
+
+        full_bytes = full_time = delta_bytes = delta_time = 0
+        cursor, epoch, _ = _poll_payload(store)
+        for _ in range(polls):
+            for _ in range(new_rows):
+                store.append([store.seq / rate] + rng.normal(size=len(BENCH_LABELS) - 1).tolist())
+
+            t0 = time.perf_counter()
+            cursor, epoch, body = _poll_payload(store, cursor, epoch)
+            delta_time += time.perf_counter() - t0
+            delta_bytes += len(body)
+
+            t0 = time.perf_counter()
+            _, _, body = _poll_payload(store)
+            full_time += time.perf_counter() - t0
+            full_bytes += len(body)
+            del body
+
+        print(f"[BENCH] {size:>9} {full_bytes // polls:>12,} {full_time / polls * 1e3:>10.2f} "
+              f"{delta_bytes // polls:>10,} {delta_time / polls * 1e3:>11.3f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HistoryStore benchmarks")
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--capacity", type=int, default=300)
+    parser.add_argument("--no-spill", action="store_true")
+    parser.add_argument("--delta", action="store_true", help="run the /data delta load test")
+    args = parser.parse_args()
+
+    if args.delta:
+        benchmark_delta(rate=args.rate)
+    else:
+        benchmark(args.hours, args.rate, args.capacity, spill=not args.no_spill)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+TRITON Link Metrics - Throughput and link quality of the LoRa channel
+
+/lora/status only said whether the port was open, and telemetry that didn't
+make it (bad CRC, lost delta frames, CSV lines with too few fields) was
+dropped without a trace. LinkMetrics is fed by serial_link.SerialLink (bytes
+and messages in both directions) and by app.py's frame handling (parse
+failures, telemetry sequence numbers, arrival times):
+
+- counters are kept twice: as totals since start and in RollingCounters,
+  one bucket per second over the longest window, so the rates of the last
+  10 s / 60 s cost a fixed amount of memory however busy the link is
+- telemetry sequence numbers (16 bit, wrapping) give missing frames (gaps)
+  and duplicates; a jump of more than MAX_SEQ_GAP is taken as a Pi restart,
+  and so is a keyframe whose Elapsed went backwards: a restarted Pi counts
+  from 0 again, so the remembered numbers are forgotten before its frames
+  could be mistaken for duplicates
+- jitter is the RFC 3550 estimate: the smoothed change of the transit time
+  (arrival - the Pi's Elapsed), so the Pi's own sending pattern doesn't
+  count; inter-arrival gaps are reported per window as well
+- airtime utilization is the airtime (airtime.airtime) of what was sent and
+  received per second of the window; near 1.0 the half-duplex channel is full
+
+snapshot() is the JSON form, prometheus() the Prometheus text exposition
+format; queue depths and other gauges of the caller are passed in.
+
+Usage (demo):
+    # A lossy telemetry stream through the metrics, then both output formats
+    python3 link_metrics.py [--frames 600] [--loss 0.05]
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+
+from airtime import airtime
+
+WINDOWS = (10, 60)      # Seconds
+MAX_SEQ_GAP = 1024      # Larger sequence jumps are a restart, not lost frames
+MAX_TRANSIT_STEP = 10.0 # Seconds; larger transit time changes are a restart, not jitter
+RECENT_SEQS = 64        # Sequence numbers remembered for duplicate detection
+
+
+# ==================== Rolling Windows ====================
+
+class RollingCounter:
+    """Sum of the values added during the last `span` seconds, in 1 s buckets."""
+
+    def __init__(self, span=max(WINDOWS)):
+        self.span = span
+        self._sums = [0.0] * span
+        self._counts = [0] * span
+        self._maxima = [0.0] * span
+        self._seconds = [-1] * span     # Which second each bucket currently holds
+
+    def _bucket(self, now):
+        second = int(now)
+        i = second % self.span
+        if self._seconds[i] != second:
+            self._seconds[i] = second
+            self._sums[i] = 0.0
+            self._counts[i] = 0
+            self._maxima[i] = 0.0
+        return i
+
+    def add(self, value, now):
+        i = self._bucket(now)
+        self._sums[i] += value
+        self._counts[i] += 1
+        self._maxima[i] = max(self._maxima[i], value)
+
+    def window(self, seconds, now):
+        """(sum, count, max) over the last `seconds` seconds."""
+        first = int(now) - seconds
+        total = count = 0
+        peak = 0.0
+        for i, second in enumerate(self._seconds):
+            if second > first:
+                total += self._sums[i]
+                count += self._counts[i]
+                peak = max(peak, self._maxima[i])
+        return total, count, peak
+
+
+# ==================== Metrics ====================
+
+COUNTERS = {
+    # name: (help, name of its per-second rate in a window)
+    "rx_bytes": ("Bytes received from the LoRa module", "rx_bytes_per_s"),
+    "tx_bytes": ("Bytes written to the LoRa module", "tx_bytes_per_s"),
+    "rx_frames": ("Binary frames received", "rx_frames_per_s"),
+    "rx_lines": ("Text lines received", "rx_lines_per_s"),
+    "tx_messages": ("Messages written (lines and frames)", "tx_messages_per_s"),
+    "rx_airtime_seconds": ("Airtime of received messages", "rx_utilization"),
+    "tx_airtime_seconds": ("Airtime of sent messages", "tx_utilization"),
+    "telemetry_frames": ("Telemetry frames with a sequence number", "telemetry_frames_per_s"),
+    "telemetry_missing": ("Telemetry frames missing from the sequence", "telemetry_missing_per_s"),
+    "telemetry_duplicates": ("Telemetry frames received twice", "telemetry_duplicates_per_s"),
+}
+
+
+class LinkMetrics:
+    """Counters, rolling windows and jitter of one serial link (see module docstring)."""
+
+    def __init__(self, windows=WINDOWS, clock=time.monotonic):
+        self.windows = tuple(windows)
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self.totals = Counter()
+        self.errors = Counter()
+        self._rolling = {name: RollingCounter(max(self.windows)) for name in COUNTERS}
+        self._errors = RollingCounter(max(self.windows))
+        self._gaps = RollingCounter(max(self.windows))
+        self._last_seq = None
+        self._recent_seqs = []
+        self._last_key_elapsed = None
+        self.seq_resets = 0
+        self._last_arrival = None
+        self._last_transit = None
+        self.jitter = 0.0
+
+    def _count(self, name, value, now):
+        self.totals[name] += value
+        self._rolling[name].add(value, now)
+
+    # ==================== Feeds ====================
+
+    def received(self, kind, nbytes):
+        """One line or frame from the reader (`nbytes` as on the wire)."""
+        now = self.clock()
+        with self._lock:
+            self._count("rx_bytes", nbytes, now)
+            self._count("rx_frames" if kind == "frame" else "rx_lines", 1, now)
+            self._count("rx_airtime_seconds", airtime(nbytes), now)
+
+    def sent(self, nbytes):
+        now = self.clock()
+        with self._lock:
+            self._count("tx_bytes", nbytes, now)
+            self._count("tx_messages", 1, now)
+            self._count("tx_airtime_seconds", airtime(nbytes), now)
+
+    def parse_error(self, reason):
+        """A message that couldn't be used: "crc", "layout", "gap", "short_line", ..."""
+        with self._lock:
+            self.errors[reason] += 1
+            self._errors.add(1, self.clock())
+
+    def sequence(self, seq, elapsed=None):
+        """
+        Sequence number of a received telemetry frame; False for a duplicate.
+        `elapsed` is the Pi's Elapsed for keyframes (full telemetry frames).
+        """
+        now = self.clock()
+        with self._lock:
+            self._count("telemetry_frames", 1, now)
+            if elapsed is not None:
+                if self._last_key_elapsed is not None and elapsed < self._last_key_elapsed:
+                    # Pi restarted: its numbers start over, none of the remembered ones are duplicates
+                    self._recent_seqs.clear()
+                    self._last_seq = None
+                    self.seq_resets += 1
+                self._last_key_elapsed = elapsed
+            if seq in self._recent_seqs:
+                self._count("telemetry_duplicates", 1, now)
+                return False
+            self._recent_seqs.append(seq)
+            del self._recent_seqs[:-RECENT_SEQS]
+            if self._last_seq is not None:
+                step = (seq - self._last_seq) & 0xFFFF
+                if 1 < step <= MAX_SEQ_GAP:
+                    self._count("telemetry_missing", step - 1, now)
+                elif step > MAX_SEQ_GAP:
+                    self.seq_resets += 1
+            self._last_seq = seq
+        return True
+
+    def arrival(self, sender_seconds):
+        """A telemetry sample arrived; `sender_seconds` is its time on the Pi (Elapsed)."""
+        now = self.clock()
+        with self._lock:
+            if self._last_arrival is not None:
+                self._gaps.add(now - self._last_arrival, now)
+            self._last_arrival = now
+            if sender_seconds is None:
+                return
+            transit = now - sender_seconds
+            if self._last_transit is not None:
+                delta = abs(transit - self._last_transit)
+                if delta < MAX_TRANSIT_STEP:
+                    self.jitter += (delta - self.jitter) / 16
+            self._last_transit = transit
+
+    # ==================== Output ====================
+
+    def snapshot(self, gauges=None):
+        """JSON form: totals, per-window rates and quality figures, `gauges` as given."""
+        now = self.clock()
+        uptime = max(now - self.started, 1e-9)
+        with self._lock:
+            windows = {}
+            for seconds in self.windows:
+                span = min(seconds, uptime)
+                window = {}
+                for name, (_, rate) in COUNTERS.items():
+                    window[rate] = round(self._rolling[name].window(seconds, now)[0] / span, 4)
+                window["airtime_utilization"] = round(window["rx_utilization"] + window["tx_utilization"], 4)
+                frames = window["telemetry_frames_per_s"]
+                missing = window["telemetry_missing_per_s"]
+                window["telemetry_loss_ratio"] = round(missing / (frames + missing), 4) if frames + missing else 0.0
+                window["parse_errors_per_s"] = round(self._errors.window(seconds, now)[0] / span, 4)
+                gap_sum, gap_count, gap_max = self._gaps.window(seconds, now)
+                window["interarrival_mean_ms"] = round(gap_sum / gap_count * 1e3, 1) if gap_count else None
+                window["interarrival_max_ms"] = round(gap_max * 1e3, 1) if gap_count else None
+                windows[f"{seconds}s"] = window
+
+            return {"uptime_s": round(uptime, 1),
+                    "totals": {name: round(value, 3) for name, value in self.totals.items()},
+                    "parse_errors": dict(self.errors),
+                    "sequence_resets": self.seq_resets,
+                    "jitter_ms": round(self.jitter * 1e3, 2),
+                    "windows": windows,
+                    "gauges": dict(gauges or {})}
+
+    def prometheus(self, gauges=None, histograms=None, prefix="triton_lora"):
+        """
+        Prometheus text format (version 0.0.4).
+
+        `gauges` maps names to numbers, `histograms` names to
+        command_tracker.RttHistogram snapshots.
+        """
+        data = self.snapshot(gauges)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+                lines.append(f"{prefix}_{name}{label_text} {_number(value)}")
+
+        for name, (help_text, _) in COUNTERS.items():
+            metric(f"{name}_total", "counter", help_text, [({}, data["totals"].get(name, 0))])
+        metric("parse_errors_total", "counter", "Received messages that couldn't be used, by reason",
+               [({"reason": reason}, count) for reason, count in sorted(data["parse_errors"].items())])
+        metric("sequence_resets_total", "counter", "Telemetry sequence jumps (Pi restarts)",
+               [({}, data["sequence_resets"])])
+        metric("jitter_seconds", "gauge", "RFC 3550 interarrival jitter of telemetry",
+               [({}, data["jitter_ms"] / 1e3)])
+        for field, help_text in (("rx_bytes_per_s", "Receive rate, bytes/s"),
+                                 ("tx_bytes_per_s", "Transmit rate, bytes/s"),
+                                 ("airtime_utilization", "Share of the window the channel was busy"),
+                                 ("telemetry_loss_ratio", "Telemetry frames missing / expected"),
+                                 ("parse_errors_per_s", "Parse failures per second")):
+            metric(field, "gauge", help_text,
+                   [({"window": window}, values[field]) for window, values in data["windows"].items()])
+        for name, value in sorted(data["gauges"].items()):
+            metric(name, "gauge", name.replace("_", " ").capitalize(), [({}, value)])
+        for name, snapshot in sorted((histograms or {}).items()):
+            lines.append(f"# HELP {prefix}_{name} {name.replace('_', ' ').capitalize()}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bucket in snapshot["buckets"]:
+                lines.append(f'{prefix}_{name}_bucket{{le="{bucket["le_ms"]}"}} {bucket["count"]}')
+            lines.append(f"{prefix}_{name}_sum {_number(snapshot['sum_ms'])}")
+            lines.append(f"{prefix}_{name}_count {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ==================== Demo ====================
+
+def demo(frames=600, loss=0.05):
+    import random
+
+    from lora_frame import DeltaEncoder, FrameSplitter, TelemetryCodec, _bench_samples, column_thresholds
+    from lora_frame import DEFAULT_THRESHOLDS, unpack_frame
+
+    clock = [0.0]
+    metrics = LinkMetrics(clock=lambda: clock[0])
+    rng = random.Random(0)
+    encoder = DeltaEncoder(TelemetryCodec(), column_thresholds(DEFAULT_THRESHOLDS))
+    splitter = FrameSplitter()
+
+    sent = 0
+    for values in _bench_samples(frames, period=0.1):
+        clock[0] = values[0] + rng.uniform(0.0, 0.03)     # 0-30 ms of queueing on the way
+        frame = encoder.encode(values)
+        if frame is None:
+            continue
+        sent += 1
+        if rng.random() < loss:
+            continue
+        copies = 2 if rng.random() < 0.01 else 1
+        for _ in range(copies):
+            if rng.random() < 0.005:
+                frame = frame[:5] + bytes([frame[5] ^ 0x40]) + frame[6:]    # A flipped bit
+            for _, message in splitter.feed(frame):
+                metrics.received("frame", len(message) + 2)
+                try:
+                    _, seq, _ = unpack_frame(message)
+                except Exception as e:
+                    metrics.parse_error(getattr(e, "reason", "malformed"))
+                    continue
+                metrics.sequence(seq)
+                metrics.arrival(values[0])
+
+    snapshot = metrics.snapshot({"tx_queue_depth": 0})
+    print(f"[BENCH] {frames} samples, {sent} frames sent, {loss:.0%} loss, 1% duplicated, 0.5% corrupted")
+    print(f"[BENCH] totals {snapshot['totals']}")
+    print(f"[BENCH] parse errors {snapshot['parse_errors']}, jitter {snapshot['jitter_ms']} ms")
+    print(f"[BENCH] last 60 s {snapshot['windows']['60s']}")
+    print(metrics.prometheus({"tx_queue_depth": 0}))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LoRa link metrics demo")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--loss", type=float, default=0.05)
+    args = parser.parse_args()
+
+    demo(args.frames, args.loss)
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+TRITON LoRa Frame - Binary telemetry frames for the 9600 baud LoRa link
+
+The Pi used to send every sample as a CSV text line ("2025-01-01 12:00:00,
+12.345,21.3,...", about 100 bytes). A telemetry frame carries the same
+sample in 40 bytes:
+
+    0x00 | COBS( header | payload | crc16 ) | 0x00
+
+    header   version (u8), frame type (u8), sequence number (u16)
+    payload  layout id (u8), timestamp (u32, wall-clock seconds),
+             one scaled integer per column
+    crc16    CRC-16/CCITT-FALSE of header + payload (binascii.crc_hqx)
+
+- values are sent as round(value * 10**decimals) (the DECIMALS the Pi rounds
+  to anyway), Elapsed as u32, the sensors as i16; out-of-range values
+  saturate, missing ones ("Error", NaN) a reserved marker value
+- the layout id is derived from the decimals, so a ground station with other
+  scale factors rejects the frame instead of mis-scaling it
+- COBS removes every 0x00 from the frame, so 0x00 only ever delimits frames.
+  Text lines (ACKs, commands, CSV from older Pi scripts) never contain 0x00
+  either; FrameSplitter separates both from one byte stream, and resyncs
+  on the next delimiter after noise or a lost byte
+
+Delta telemetry (DeltaEncoder/DeltaDecoder) goes further: the Pi only sends
+the columns that moved by more than their transmission_threshold since the
+last value the ground station received, as a bitmask plus varint deltas
+(typically 14-20 bytes), and nothing at all while no column moves, with a
+full telemetry frame as keyframe every KEYFRAME_INTERVAL seconds. The
+thresholds come from the dashboard config (CMD:THRESHOLDS, see
+threshold_command).
+
+Usage (benchmark):
+    # Wire size and samples/s at 9600 baud: text line, binary frame, delta telemetry
+    python3 lora_frame.py [--baud 9600] [--samples 100000]
+"""
+
+import binascii
+import calendar
+import struct
+from datetime import datetime, timedelta
+
+FRAME_VERSION = 1
+TYPE_TELEMETRY = 1      # Full sample (also the keyframe of delta telemetry)
+TYPE_DELTA = 2          # Changed columns only, see DeltaEncoder
+TYPE_BEACON = 3         # TDMA superframe start from the ground station, see airtime.py
+TYPE_BACKLOG = 4        # Pi uplink backlog report, see airtime.py
+
+TELEMETRY_LABELS = [
+    "Elapsed [s]",
+    "Temp_BME280 [°C]", "Hum [%]", "Press [hPa]", "Alt [m]",
+    "Acc x [m/s²]", "Acc y [m/s²]", "Acc z [m/s²]",
+    "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
+    "Temp_MPU [°C]"
+]
+TELEMETRY_DECIMALS = [3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+TELEMETRY_TYPES = "I" + "h" * (len(TELEMETRY_LABELS) - 1)
+
+# transmission_thresholds keys (app.py config) -> telemetry columns
+THRESHOLD_COLUMNS = {
+    "temp_bme280": [1], "humidity": [2], "pressure": [3], "altitude": [4],
+    "acceleration": [5, 6, 7], "gyroscope": [8, 9, 10], "temp_mpu": [11]
+}
+DEFAULT_THRESHOLDS = {
+    "temp_bme280": 0.25, "humidity": 1.0, "pressure": 0.5, "altitude": 0.5,
+    "acceleration": 0.25, "gyroscope": 5.0, "temp_mpu": 0.25
+}
+# Pi-side sensor settings of the config, pushed in the same command as the thresholds
+SENSOR_SETTINGS = {"sea_level_pressure": float, "bme280_profile": str}
+KEYFRAME_INTERVAL = 10.0  # Seconds of Elapsed between delta telemetry keyframes
+
+DELIMITER = b"\x00"
+MAX_FRAME = 254         # Longest COBS-encoded frame accepted by FrameSplitter
+MAX_LINE = 1024         # Longest text line accepted by FrameSplitter
+
+_HEADER = struct.Struct(">BBH")
+_CRC = struct.Struct(">H")
+_DELTA_HEADER = struct.Struct(">BHHB")
+_RANGES = {"B": (0, 0xFF), "H": (0, 0xFFFF), "I": (0, 0xFFFFFFFF),
+           "b": (-0x80, 0x7F), "h": (-0x8000, 0x7FFF), "i": (-0x80000000, 0x7FFFFFFF)}
+_EPOCH = datetime(1970, 1, 1)
+
+
+class FrameError(ValueError):
+    """A frame that fails COBS decoding, the CRC, or doesn't match the codec."""
+
+    def __init__(self, message, reason="malformed"):
+        super().__init__(message)
+        self.reason = reason    # "crc", "layout", "gap" or "malformed" (counted by link_metrics.py)
+
+
+# ==================== Framing ====================
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def cobs_encode(data):
+    """Consistent Overhead Byte Stuffing: `data` without any 0x00 byte."""
+    out = bytearray()
+    for block in data.split(b"\x00"):
+        while len(block) >= 0xFE:
+            out.append(0xFF)
+            out += block[:0xFE]
+            block = block[0xFE:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """Inverse of cobs_encode(); raises FrameError on malformed input."""
+    out = bytearray()
+    i, n = 0, len(data)
+    while i < n:
+        code = data[i]
+        if code == 0:
+            raise FrameError("0x00 inside COBS data")
+        end = i + code
+        if end > n:
+            raise FrameError("truncated COBS block")
+        out += data[i + 1:end]
+        i = end
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def pack_frame(frame_type, seq, payload):
+    """Header + payload + CRC, COBS-encoded between delimiters, ready to write."""
+    body = _HEADER.pack(FRAME_VERSION, frame_type, seq & 0xFFFF) + payload
+    return DELIMITER + cobs_encode(body + _CRC.pack(crc16(body))) + DELIMITER
+
+
+def unpack_frame(data):
+    """(frame type, seq, payload) of a COBS-encoded frame (delimiters stripped)."""
+    body = cobs_decode(data)
+    if len(body) < _HEADER.size + _CRC.size:
+        raise FrameError(f"frame too short ({len(body)} bytes)")
+    body, (crc,) = body[:-_CRC.size], _CRC.unpack(body[-_CRC.size:])
+    if crc16(body) != crc:
+        raise FrameError("CRC mismatch", "crc")
+    version, frame_type, seq = _HEADER.unpack_from(body)
+    if version != FRAME_VERSION:
+        raise FrameError(f"unsupported frame version {version}")
+    return frame_type, seq, body[_HEADER.size:]
+
+
+class FrameSplitter:
+    """
+    Splits a serial byte stream into text lines and binary frames.
+
+    feed() returns a list of ("line", str) and ("frame", bytes) messages in
+    arrival order; frames are still COBS-encoded (see unpack_frame). Bytes
+    after a delimiter belong to a frame, anything else is text up to "\\n".
+    An empty frame (two delimiters in a row) keeps the splitter in frame
+    mode, which is how it resyncs after starting mid-frame.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._in_frame = False
+
+    def feed(self, data):
+        messages = []
+        buffer = self._buffer
+        for byte in data:
+            if byte == 0:
+                if self._in_frame and buffer:
+                    messages.append(("frame", bytes(buffer)))
+                    self._in_frame = False
+                else:
+                    # Opening delimiter; a partial text line before it is noise
+                    self._in_frame = True
+                buffer.clear()
+            elif not self._in_frame and byte == 0x0A:
+                messages.append(("line", buffer.decode(errors='ignore')))
+                buffer.clear()
+            else:
+                buffer.append(byte)
+                if len(buffer) > (MAX_FRAME if self._in_frame else MAX_LINE):
+                    buffer.clear()
+                    self._in_frame = False
+        return messages
+
+
+# ==================== Telemetry ====================
+
+class Telemetry:
+    """One decoded telemetry sample."""
+
+    __slots__ = ("seq", "timestamp", "values")
+
+    def __init__(self, seq, timestamp, values):
+        self.seq = seq              # Frame sequence number (0..65535, wraps)
+        self.timestamp = timestamp  # "YYYY-mm-dd HH:MM:SS" (Pi wall clock), "" if unknown
+        self.values = values        # Floats in label order, None for missing values
+
+    def __repr__(self):
+        return f"Telemetry(seq={self.seq}, timestamp={self.timestamp!r}, values={self.values!r})"
+
+
+def layout_id(decimals, types):
+    """One byte identifying the column scale factors and types."""
+    return crc16(bytes(decimals) + types.encode()) & 0xFF
+
+
+class TelemetryCodec:
+    """Encodes/decodes telemetry frames for one column layout (see module docstring)."""
+
+    def __init__(self, decimals=TELEMETRY_DECIMALS, types=TELEMETRY_TYPES):
+        if len(decimals) != len(types):
+            raise ValueError("decimals and types must have one entry per column")
+        self.decimals = list(decimals)
+        self.types = types
+        self.layout = layout_id(self.decimals, types)
+        self._struct = struct.Struct(">BI" + types)
+        # (scale, lowest, highest, missing) per column; the missing marker is the
+        # maximum of an unsigned type and the minimum of a signed one
+        self._fields = []
+        for d, t in zip(decimals, types):
+            low, high = _RANGES[t]
+            if t.isupper():
+                self._fields.append((10 ** d, low, high - 1, high))
+            else:
+                self._fields.append((10 ** d, low + 1, high, low))
+
+    @property
+    def frame_size(self):
+        """Bytes on the wire per telemetry frame, delimiters included."""
+        return len(pack_frame(TYPE_TELEMETRY, 0, bytes(self._struct.size)))
+
+    def scale(self, values):
+        """Scaled integers of a sample, as sent on the wire (missing values as markers)."""
+        packed = []
+        for value, (scale, lowest, highest, missing) in zip(values, self._fields):
+            try:
+                packed.append(min(max(round(float(value) * scale), lowest), highest))
+            except (TypeError, ValueError, OverflowError):
+                packed.append(missing)
+        return packed
+
+    def unscale(self, packed):
+        """Inverse of scale(): floats, None for missing values."""
+        return [None if raw == missing else raw / scale
+                for raw, (scale, _, _, missing) in zip(packed, self._fields)]
+
+    def is_missing(self, column, raw):
+        """True if a scaled value is the missing marker of its column."""
+        return raw == self._fields[column][3]
+
+    def pack(self, seq, packed, seconds):
+        """Telemetry frame of already scaled integers and wall-clock seconds."""
+        return pack_frame(TYPE_TELEMETRY, seq, self._struct.pack(self.layout, seconds, *packed))
+
+    def unpack(self, payload):
+        """(seconds, scaled integers) of a telemetry frame payload; raises FrameError."""
+        if len(payload) != self._struct.size:
+            raise FrameError(f"telemetry payload has {len(payload)} bytes, expected {self._struct.size}")
+        layout, seconds, *packed = self._struct.unpack(payload)
+        self.check_layout(layout)
+        return seconds, packed
+
+    def check_layout(self, layout):
+        if layout != self.layout:
+            raise FrameError(f"column layout {layout:#04x} doesn't match {self.layout:#04x} (DECIMALS differ)",
+                             "layout")
+
+    def encode(self, seq, values, timestamp=None):
+        """Wire bytes for one sample; `timestamp` is a naive local datetime (or None)."""
+        return self.pack(seq, self.scale(values), wall_seconds(timestamp))
+
+    def decode(self, data):
+        """Telemetry of a COBS-encoded frame from FrameSplitter; raises FrameError."""
+        frame_type, seq, payload = unpack_frame(data)
+        if frame_type != TYPE_TELEMETRY:
+            raise FrameError(f"not a telemetry frame (type {frame_type})")
+        seconds, packed = self.unpack(payload)
+        return Telemetry(seq, format_seconds(seconds), self.unscale(packed))
+
+
+def wall_seconds(timestamp):
+    """Wall-clock fields of a datetime as seconds since 1970 (0 for None); the zone is dropped."""
+    return calendar.timegm(timestamp.timetuple()) if timestamp is not None else 0
+
+
+def format_seconds(seconds):
+    """Inverse of wall_seconds() as "YYYY-mm-dd HH:MM:SS", "" for 0."""
+    return (_EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S") if seconds else ""
+
+
+# ==================== Delta Telemetry ====================
+
+def _put_varint(out, value):
+    """Append a zigzag LEB128 integer (1 byte for -64..63, 2 up to +-8191, 3 up to +-1M)."""
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, i):
+    """(value, next index) of a zigzag LEB128 integer at data[i]; raises FrameError."""
+    value = shift = 0
+    while True:
+        if i >= len(data) or shift > 35:
+            raise FrameError("truncated delta field")
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return (value >> 1) ^ -(value & 1), i
+
+
+def column_thresholds(thresholds, columns=len(TELEMETRY_LABELS)):
+    """Per-column thresholds from the config's transmission_thresholds (unknown keys ignored)."""
+    per_column = [0.0] * columns
+    for key, value in thresholds.items():
+        for column in THRESHOLD_COLUMNS.get(key, ()):
+            if column < columns:
+                per_column[column] = max(0.0, float(value))
+    return per_column
+
+
+def threshold_command(thresholds, settings=None):
+    """CMD line that pushes the config's transmission_thresholds (and SENSOR_SETTINGS) to the Pi."""
+    items = [f"{key}={float(thresholds[key]):g}" for key in THRESHOLD_COLUMNS if key in thresholds]
+    for key, kind in SENSOR_SETTINGS.items():
+        if settings and key in settings:
+            items.append(f"{key}={float(settings[key]):g}" if kind is float else f"{key}={settings[key]}")
+    return "CMD:THRESHOLDS:" + ",".join(items)
+
+
+def parse_thresholds(text):
+    """transmission_thresholds dict of a threshold_command() argument; bad entries are skipped."""
+    thresholds = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        if key.strip() in THRESHOLD_COLUMNS:
+            try:
+                thresholds[key.strip()] = float(value)
+            except ValueError:
+                continue
+    return thresholds
+
+
+def parse_sensor_settings(text):
+    """SENSOR_SETTINGS in a threshold_command() argument; absent or bad entries are skipped."""
+    settings = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        convert = SENSOR_SETTINGS.get(key.strip())
+        if convert is not None:
+            try:
+                settings[key.strip()] = convert(value.strip())
+            except ValueError:
+                continue
+    return settings
+
+
+class DeltaEncoder:
+    """
+    Change-driven telemetry for the Pi.
+
+    encode() returns a keyframe (the full telemetry frame) every
+    `keyframe_interval` seconds of Elapsed, otherwise a delta frame with only
+    the columns that moved by at least their threshold since the value the
+    ground station last received - or None when nothing did. The ground side
+    is therefore never further off than one threshold, without drift.
+
+    Delta frame payload: layout (u8), column bitmask (u16, bit i = column i),
+    Elapsed delta (u16, scaled), wall-clock seconds since the keyframe (u8),
+    then one zigzag varint delta per masked column. Anything a delta can't
+    express (a restart of Elapsed, a column turning missing, large gaps)
+    makes the next frame a keyframe.
+    """
+
+    def __init__(self, codec, thresholds=None, keyframe_interval=KEYFRAME_INTERVAL):
+        self.codec = codec
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.set_thresholds(thresholds or [0.0] * len(codec.decimals))
+        self._sent = None       # Scaled values the ground station holds
+        self._key_elapsed = 0
+        self._key_seconds = 0
+
+    def set_thresholds(self, thresholds):
+        """Per-column thresholds in sensor units (see column_thresholds); 0 sends every change."""
+        self._thresholds = [float(t) * scale for t, (scale, _, _, _) in zip(thresholds, self.codec._fields)]
+
+    def keyframe(self):
+        """Make the next encode() send a keyframe."""
+        self._sent = None
+
+    def encode(self, values, timestamp=None):
+        """Wire bytes for one sample, or None if no column changed enough."""
+        packed = self.codec.scale(values)
+        seconds = wall_seconds(timestamp)
+        frame = None if self._sent is None else self._delta(packed, seconds)
+        if frame is False:
+            return None
+        if frame is None:
+            frame = self.codec.pack(self.seq, packed, seconds)
+            self._sent = packed
+            self._key_elapsed = packed[0]
+            self._key_seconds = seconds
+        self.seq = (self.seq + 1) & 0xFFFF
+        return frame
+
+    def _delta(self, packed, seconds):
+        """Delta frame, False if nothing to send, None if a keyframe is needed."""
+        codec, sent = self.codec, self._sent
+        elapsed_delta = packed[0] - sent[0]
+        offset = seconds - self._key_seconds
+        if (not 0 <= elapsed_delta <= 0xFFFF or not 0 <= offset <= 0xFF
+                or codec.is_missing(0, packed[0])
+                or packed[0] - self._key_elapsed >= self.keyframe_interval * codec._fields[0][0]):
+            return None
+
+        mask = 0
+        deltas = bytearray()
+        for column in range(1, len(packed)):
+            delta = packed[column] - sent[column]
+            if delta == 0 or abs(delta) < self._thresholds[column]:
+                continue
+            if codec.is_missing(column, packed[column]) or codec.is_missing(column, sent[column]):
+                return None
+            mask |= 1 << column
+            _put_varint(deltas, delta)
+        if not mask:
+            return False
+
+        for column in range(1, len(packed)):
+            if mask >> column & 1:
+                sent[column] = packed[column]
+        sent[0] = packed[0]
+        payload = _DELTA_HEADER.pack(codec.layout, mask, elapsed_delta, offset) + deltas
+        return pack_frame(TYPE_DELTA, self.seq, payload)
+
+
+class DeltaDecoder:
+    """
+    Ground-side counterpart of DeltaEncoder: full rows from keyframes and deltas.
+
+    Plain telemetry frames are keyframes, so it also decodes the output of
+    TelemetryCodec.encode(). A delta frame that doesn't directly follow the
+    previous frame (a lost frame in between) can't be applied; it and the
+    following deltas raise FrameError until the next keyframe.
+    """
+
+    def __init__(self, codec):
+        self.codec = codec
+        self._held = None       # Scaled values of the last decoded frame
+        self._seq = None
+        self._key_seconds = 0
+
+    def decode(self, data):
+        """Telemetry of a COBS-encoded frame from FrameSplitter; raises FrameError."""
+        frame_type, seq, payload = unpack_frame(data)
+        codec = self.codec
+        if frame_type == TYPE_TELEMETRY:
+            seconds, packed = codec.unpack(payload)
+            self._held, self._seq, self._key_seconds = packed, seq, seconds
+            return Telemetry(seq, format_seconds(seconds), codec.unscale(packed))
+        if frame_type != TYPE_DELTA:
+            raise FrameError(f"not a telemetry frame (type {frame_type})")
+
+        if len(payload) < _DELTA_HEADER.size:
+            raise FrameError("delta frame too short")
+        layout, mask, elapsed_delta, offset = _DELTA_HEADER.unpack_from(payload)
+        codec.check_layout(layout)
+        if self._held is None or seq != (self._seq + 1) & 0xFFFF:
+            self._held = None
+            raise FrameError(f"delta frame {seq} without its predecessor, waiting for a keyframe", "gap")
+
+        packed = list(self._held)
+        packed[0] += elapsed_delta
+        i = _DELTA_HEADER.size
+        for column in range(1, len(packed)):
+            if mask >> column & 1:
+                delta, i = _get_varint(payload, i)
+                packed[column] += delta
+        if i != len(payload) or mask >> len(packed):
+            self._held = None
+            raise FrameError("delta frame doesn't match the column layout", "layout")
+
+        self._held, self._seq = packed, seq
+        seconds = self._key_seconds + offset if self._key_seconds else 0
+        return Telemetry(seq, format_seconds(seconds), codec.unscale(packed))
+
+
+# ==================== Benchmark ====================
+
+def _bench_samples(count, period=0.1):
+    """Sensor traces at `period` s: slow drift and sensor noise, a maneuver every 60 s."""
+    import math
+    import random
+
+    rng = random.Random(0)
+    for i in range(count):
+        t = i * period
+        maneuver = 1.0 if (t % 60) < 5 else 0.0
+        yield [round(t, 3),
+               round(18 + 0.5 * math.sin(t / 600) + rng.gauss(0, 0.03), 1),
+               round(55 + 2 * math.sin(t / 900) + rng.gauss(0, 0.2), 1),
+               round(1013 - 0.02 * t / 60 + rng.gauss(0, 0.1), 1),
+               round(12 + 0.2 * t / 60 + rng.gauss(0, 0.1), 1),
+               round(maneuver * 2 * math.sin(t) + rng.gauss(0, 0.05), 1),
+               round(rng.gauss(0, 0.05), 1),
+               round(9.81 + rng.gauss(0, 0.05), 1),
+               round(maneuver * 40 * math.sin(t) + rng.gauss(0, 0.8), 1),
+               round(rng.gauss(0, 0.8), 1),
+               round(maneuver * 90 + rng.gauss(0, 0.8), 1),
+               round(31 + 0.5 * math.sin(t / 600) + rng.gauss(0, 0.03), 1)]
+
+
+def benchmark(baud=9600, samples=100_000):
+    import time
+
+    codec = TelemetryCodec()
+    rows = list(_bench_samples(samples))
+    start = datetime(2025, 6, 1, 12, 0, 0)
+    stamps = [start + timedelta(seconds=int(row[0])) for row in rows]
+
+    t0 = time.perf_counter()
+    lines = [(now.strftime("%Y-%m-%d %H:%M:%S") + "," + ",".join(str(x) for x in row) + "\n").encode()
+             for row, now in zip(rows, stamps)]
+    text_encode = (time.perf_counter() - t0) / samples
+    t0 = time.perf_counter()
+    for line in lines:
+        [float(x) for x in line.decode().strip().split(",")[1:]]
+    text_decode = (time.perf_counter() - t0) / samples
+
+    t0 = time.perf_counter()
+    frames = [codec.encode(i, row, now) for i, (row, now) in enumerate(zip(rows, stamps))]
+    frame_encode = (time.perf_counter() - t0) / samples
+    t0 = time.perf_counter()
+    decoded = [codec.decode(message) for _, message in FrameSplitter().feed(b"".join(frames))]
+    frame_decode = (time.perf_counter() - t0) / samples
+    assert len(decoded) == samples and decoded[-1].values == rows[-1]
+
+    thresholds = column_thresholds(DEFAULT_THRESHOLDS)
+    encoder = DeltaEncoder(codec, thresholds)
+    t0 = time.perf_counter()
+    deltas = [encoder.encode(row, now) for row, now in zip(rows, stamps)]
+    delta_encode = (time.perf_counter() - t0) / samples
+    sent = [(row, frame) for row, frame in zip(rows, deltas) if frame is not None]
+    decoder = DeltaDecoder(codec)
+    t0 = time.perf_counter()
+    rebuilt = [decoder.decode(message) for _, message in FrameSplitter().feed(b"".join(f for _, f in sent))]
+    delta_decode = (time.perf_counter() - t0) / max(len(sent), 1)
+    worst = max(abs(got - want) - limit
+                for (row, _), telemetry in zip(sent, rebuilt)
+                for got, want, limit in zip(telemetry.values[1:], row[1:], thresholds[1:]))
+    assert len(rebuilt) == len(sent) and worst < 0.11  # Within a threshold (+ rounding)
+
+    bytes_per_second = baud / 10  # 8N1: start + 8 data + stop bits
+    print(f"[BENCH] {samples:,} samples at 10 Hz, {baud} baud 8N1 = {bytes_per_second:.0f} bytes/s on the serial line")
+    print(f"[BENCH] {'format':<8} {'bytes/sample':>13} {'samples/s':>10} {'encode [us]':>12} {'decode [us]':>12}")
+    for name, size, enc, dec in (
+            ("text", sum(map(len, lines)) / samples, text_encode, text_decode),
+            ("binary", sum(map(len, frames)) / samples, frame_encode, frame_decode),
+            ("delta", sum(len(f) for _, f in sent) / samples, delta_encode, delta_decode)):
+        print(f"[BENCH] {name:<8} {size:>13.1f} {bytes_per_second / size:>10.1f} "
+              f"{enc * 1e6:>12.1f} {dec * 1e6:>12.1f}")
+    print(f"[BENCH] delta: {len(sent):,} frames for {samples:,} samples "
+          f"({len(sent) / samples:.1%}), ground values within the thresholds")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LoRa telemetry frame benchmark")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--samples", type=int, default=100_000)
+    args = parser.parse_args()
+
+    benchmark(args.baud, args.samples)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+TRITON Mission Catalog - Cached metadata for every mission file
+
+The listing endpoints (/api/missions/list, /download/list, /recordings/list)
+used to walk the log directories and stat every file on each request, and
+/recordings/list read every recording end to end to count its rows. The
+catalog keeps one entry per CSV file instead:
+
+    size, mtime, row count, time span (Elapsed [s]), column list and
+    per-column min/max
+
+Entries are persisted as JSON lines (logs/mission_catalog.jsonl) and kept
+in memory. app.py updates them directly when recordings start and stop and
+when files are archived or deleted. Files added from outside (e.g. copied
+from the Pi) are picked up by refresh(), which stats only the directories
+and rescans one only when its mtime changed; within a rescan a file is
+re-read only if its size or mtime changed.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from mission_log import MissionLog, binary_path
+from mission_loader import X_LABELS, load_mission_data
+
+CATALOG_VERSION = 1
+
+
+def column_stats(headers, columns):
+    """Per-column [min, max] of numeric columns (label -> float array)."""
+    stats = {}
+    for header in headers:
+        values = columns.get(header)
+        if values is None or not len(values):
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        if len(valid):
+            stats[header] = [float(valid.min()), float(valid.max())]
+    return stats
+
+
+def describe(path):
+    """Catalog entry fields for one mission file (reads the file once)."""
+    stat = os.stat(path)
+    entry = {"size": stat.st_size, "mtime": stat.st_mtime, "rows": 0,
+             "columns": [], "time_span": None, "stats": {}}
+    if not stat.st_size:
+        return entry
+
+    try:
+        log_path = binary_path(path)
+        if os.path.isfile(log_path) and os.path.getmtime(log_path) >= stat.st_mtime:
+            log = MissionLog(log_path)
+            headers = log.labels
+            numeric = [label for label in headers if label != log.time_label]
+            columns = log.columns(numeric)
+            rows = log.rows
+        else:
+            headers, data, rows = load_mission_data(path)
+            columns = {}
+            for header in headers:
+                values = data[header]
+                if any(isinstance(v, float) for v in values):
+                    columns[header] = np.array([v if isinstance(v, float) else np.nan for v in values])
+    except Exception as e:
+        print(f"[CATALOG] Could not read {path}: {e}")
+        return entry
+
+    entry["rows"] = int(rows)
+    entry["columns"] = list(headers)
+    entry["stats"] = column_stats(headers, columns)
+    x_key = next((x for x in X_LABELS if x in entry["stats"]), None)
+    if x_key:
+        entry["time_span"] = entry["stats"][x_key]
+    return entry
+
+
+class MissionCatalog:
+    """In-memory catalog of mission CSVs, persisted as JSON lines."""
+
+    def __init__(self, path, directories, ext=".csv"):
+        self.path = path
+        self.directories = dict(directories)   # Catalog key (e.g. "logs/recordings") -> directory
+        self.ext = ext
+        self.lock = threading.RLock()
+        self._entries = {}                      # (key, filename) -> entry
+        self._dir_mtimes = {}
+        self._load()
+
+    # ==================== Persistence ====================
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return
+        if not lines or lines[0].get("version") != CATALOG_VERSION:
+            return
+        self._dir_mtimes = lines[0].get("dir_mtimes", {})
+        for entry in lines[1:]:
+            self._entries[(entry["dir"], entry["filename"])] = entry
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"version": CATALOG_VERSION, "dir_mtimes": self._dir_mtimes}) + "\n")
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[CATALOG] Could not save {self.path}: {e}")
+            return
+
+        # Writing the catalog itself must not look like a change to its directory
+        home = os.path.dirname(os.path.abspath(self.path))
+        for key, directory in self.directories.items():
+            if os.path.abspath(directory) == home and key in self._dir_mtimes:
+                self._dir_mtimes[key] = os.stat(directory).st_mtime
+
+    # ==================== Updates ====================
+
+    def _key_of(self, filepath):
+        directory = os.path.dirname(os.path.abspath(filepath))
+        for key, path in self.directories.items():
+            if os.path.abspath(path) == directory:
+                return key, os.path.basename(filepath)
+        return None
+
+    def _index(self, key, filename):
+        entry = describe(os.path.join(self.directories[key], filename))
+        entry.update({"dir": key, "filename": filename})
+        self._entries[(key, filename)] = entry
+        return entry
+
+    def update(self, filepath):
+        """(Re)index one file, e.g. when a recording starts or stops."""
+        key = self._key_of(filepath)
+        if key is None or not os.path.isfile(filepath):
+            return None
+        with self.lock:
+            entry = self._index(*key)
+            self._save()
+        return entry
+
+    def remove(self, filepath):
+        key = self._key_of(filepath)
+        with self.lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def move(self, src, dst):
+        """Carry an entry along when a file is archived (no re-read)."""
+        old, new = self._key_of(src), self._key_of(dst)
+        with self.lock:
+            entry = self._entries.pop(old, None)
+            if entry is not None and new is not None:
+                entry.update({"dir": new[0], "filename": new[1]})
+                self._entries[new] = entry
+            elif new is not None:
+                self._index(*new)
+            self._save()
+
+    def refresh(self):
+        """Rescan directories whose mtime changed since the last scan."""
+        changed = False
+        with self.lock:
+            for key, directory in self.directories.items():
+                try:
+                    mtime = os.stat(directory).st_mtime
+                except OSError:
+                    continue
+                if self._dir_mtimes.get(key) == mtime:
+                    continue
+                self._rescan(key, directory)
+                self._dir_mtimes[key] = mtime
+                changed = True
+            if changed:
+                self._save()
+
+    def _rescan(self, key, directory):
+        try:
+            present = {f for f in os.listdir(directory) if f.endswith(self.ext)}
+        except OSError as e:
+            print(f"[CATALOG] Error listing {directory}: {e}")
+            return
+
+        for entry_key in [k for k in self._entries if k[0] == key and k[1] not in present]:
+            del self._entries[entry_key]
+
+        for filename in present:
+            entry = self._entries.get((key, filename))
+            try:
+                stat = os.stat(os.path.join(directory, filename))
+            except OSError:
+                continue
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                self._index(key, filename)
+
+    # ==================== Queries ====================
+
+    def entries(self, *keys):
+        """Entries of the given directory keys (all if none given)."""
+        self.refresh()
+        with self.lock:
+            return [dict(entry) for (key, _), entry in self._entries.items() if not keys or key in keys]
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+TRITON Mission Loader - Range-aware, memory-mapped mission loading
+
+Backs /api/missions/load. Callers ask for a subset of columns, a time window
+and an optional point budget; only the matching part of the file is decoded:
+
+- binary logs (.tlog, see mission_log.py) are sliced as np.memmap views
+- comma/semicolon CSVs are memory-mapped and sliced through a sparse
+  byte-offset index (every `stride`-th line's offset and Elapsed value),
+  built on first access and cached next to the file as `.cidx`. The cache
+  is keyed by size and mtime; a file that only grew (active recording) is
+  indexed incrementally from the last known offset.
+- legacy fixed-width files are parsed in full and then filtered
+
+Elapsed [s] is expected to be monotonic. If the sampled index shows it going
+backwards (Pi restart mid-mission) each monotonic run is bisected separately
+(see time_index.py).
+
+Usage (benchmark):
+    python3 mission_loader.py <mission.csv> [--start 600 --end 1200] [--columns "Alt [m]"]
+"""
+
+import csv
+import io
+import json
+import mmap
+import os
+
+import numpy as np
+
+from downsample import downsample
+from history_store import HistoryStore
+from mission_log import CSV_INDEX_EXT, MissionLog, binary_path, parse_mission_csv, read_text
+from time_index import find_breaks, runs
+
+CSV_INDEX_VERSION = 1
+DEFAULT_CSV_STRIDE = 64
+X_LABELS = ("Elapsed [s]", "MET [s]")
+
+
+def csv_index_path(csv_path):
+    return os.path.splitext(csv_path)[0] + CSV_INDEX_EXT
+
+
+def _to_value(cell):
+    """Float where possible, raw string otherwise (same rules as parse_mission_csv)."""
+    try:
+        return float(cell)
+    except (ValueError, TypeError):
+        return cell
+
+
+def _is_trailer(row):
+    """Blank lines and the MIN/MAX summary lines at the end of Pi logs."""
+    return len(row) <= 1 or row[0] in ("MIN", "MAX")
+
+
+# ==================== CSV Byte-Offset Index ====================
+
+class CsvIndex:
+    """Sparse line-offset index over a memory-mapped delimited mission file."""
+
+    def __init__(self, path, stride=DEFAULT_CSV_STRIDE):
+        self.path = path
+        self.stride = stride
+        self.headers = None
+        self.delimiter = None
+        self.encoding = "utf-8"
+        self.x_col = None
+        self.offsets = np.empty(0, dtype=np.int64)   # Byte offset of every stride-th data line
+        self.x_values = np.empty(0, dtype=np.float64)
+        self.lines = 0                                # Data lines (incl. trailer) after the header
+        self.size = 0
+        self.mtime = 0.0
+
+    # ==================== Build / Cache ====================
+
+    @classmethod
+    def open(cls, path, stride=DEFAULT_CSV_STRIDE):
+        """Cached index for `path`, (re)built or extended as needed. None if not delimited."""
+        index = cls(path, stride)
+        stat = os.stat(path)
+        cached = index._load_cache()
+        if cached and index.size == stat.st_size and index.mtime == stat.st_mtime:
+            return index if index.delimiter else None
+        if not index._build(resume=cached and 0 < index.size < stat.st_size):
+            return None
+        index._save_cache()
+        return index
+
+    def _load_cache(self):
+        try:
+            with np.load(csv_index_path(self.path), allow_pickle=False) as cache:
+                meta = json.loads(str(cache["meta"]))
+                if meta.get("version") != CSV_INDEX_VERSION or meta.get("stride") != self.stride:
+                    return False
+                self.offsets = cache["offsets"]
+                self.x_values = cache["x_values"]
+        except (OSError, ValueError, KeyError):
+            return False
+        self.headers = meta["headers"]
+        self.delimiter = meta["delimiter"]
+        self.encoding = meta["encoding"]
+        self.x_col = meta["x_col"]
+        self.lines = meta["lines"]
+        self.size = meta["size"]
+        self.mtime = meta["mtime"]
+        return True
+
+    def _save_cache(self):
+        meta = {
+            "version": CSV_INDEX_VERSION, "stride": self.stride,
+            "headers": self.headers, "delimiter": self.delimiter, "encoding": self.encoding,
+            "x_col": self.x_col, "lines": self.lines, "size": self.size, "mtime": self.mtime
+        }
+        try:
+            with open(csv_index_path(self.path), "wb") as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), offsets=self.offsets, x_values=self.x_values)
+        except OSError as e:
+            print(f"[MISSIONS] Could not cache index for {self.path}: {e}")
+
+    def _build(self, resume=False):
+        """Scan the file for line starts. With `resume`, continue after the cached part."""
+        stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            if not stat.st_size:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not resume:
+                    first_nl = mm.find(b"\n")
+                    header_end = (first_nl + 1) if first_nl >= 0 else len(mm)
+                    if not self._read_header(bytes(mm[:header_end])):
+                        return False
+                    scan_from, line_no = header_end, 0
+                    offsets, x_values = [], []
+                else:
+                    # Re-scan from the last sampled line; everything before it is unchanged
+                    scan_from = int(self.offsets[-1]) if len(self.offsets) else self._data_start(mm)
+                    line_no = (len(self.offsets) - 1) * self.stride if len(self.offsets) else 0
+                    offsets = self.offsets[:-1].tolist() if len(self.offsets) else []
+                    x_values = self.x_values[:-1].tolist() if len(self.x_values) else []
+
+                buf = np.frombuffer(mm, dtype=np.uint8, offset=scan_from)
+                starts = np.flatnonzero(buf == 10) + 1 + scan_from
+                starts = np.concatenate([[scan_from], starts[starts < len(mm)]]).astype(np.int64)
+                del buf
+
+                ends = np.append(starts[1:], len(mm))
+                sampled = np.flatnonzero((np.arange(len(starts)) + line_no) % self.stride == 0)
+                for offset, end in zip(starts[sampled].tolist(), ends[sampled].tolist()):
+                    offsets.append(offset)
+                    x_values.append(self._x_at(mm[offset:end]))
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.x_values = np.array(x_values, dtype=np.float64)
+        self.lines = line_no + len(starts)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        return True
+
+    def _data_start(self, mm):
+        first_nl = mm.find(b"\n")
+        return (first_nl + 1) if first_nl >= 0 else len(mm)
+
+    def _read_header(self, raw):
+        for encoding in ("utf-8", "latin-1"):
+            try:
+                line = raw.decode(encoding).strip("\r\n")
+                break
+            except UnicodeDecodeError:
+                continue
+        if line.count(";") >= 5:
+            self.delimiter = ";"
+        elif line.count(",") >= 5:
+            self.delimiter = ","
+        else:
+            return False
+        self.encoding = encoding
+        self.headers = next(csv.reader([line], delimiter=self.delimiter))
+        self.x_col = next((self.headers.index(x) for x in X_LABELS if x in self.headers), None)
+        return True
+
+    def _x_at(self, raw):
+        if self.x_col is None:
+            return np.nan
+        cells = raw.decode(self.encoding, errors="replace").strip("\r\n").split(self.delimiter)
+        try:
+            return float(cells[self.x_col])
+        except (IndexError, ValueError):
+            return np.nan
+
+    # ==================== Queries ====================
+
+    def byte_ranges(self, start=None, end=None):
+        """
+        Byte ranges that hold every line with start <= x <= end.
+
+        Each monotonic run of the sampled index is bisected on its own, so a
+        Pi restart mid-file costs one extra range instead of a full scan. The
+        block a run starts in (where x jumped back) is always included.
+        """
+        if not len(self.offsets):
+            return []
+
+        # Unparseable samples ("Error", summary lines) take the previous value
+        x = self.x_values
+        last = np.where(~np.isnan(x), np.arange(len(x)), -1)
+        last = np.maximum.accumulate(last)
+        x = np.where(last >= 0, x[np.maximum(last, 0)], -np.inf)
+
+        ranges = []
+        for a, b in runs(len(x), find_breaks(x)):
+            lo_block = a - 1 if start is None else a + int(np.searchsorted(x[a:b], start, side="left")) - 1
+            hi_block = b if end is None else a + int(np.searchsorted(x[a:b], end, side="right"))
+            lo = int(self.offsets[max(lo_block, 0)])
+            hi = int(self.offsets[hi_block]) if hi_block < len(self.offsets) else self.size
+            if hi <= lo:
+                continue
+            if ranges and ranges[-1][1] >= lo:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], hi))
+            else:
+                ranges.append((lo, hi))
+        return ranges
+
+    def read(self, columns=None, start=None, end=None):
+        """
+        Decode the lines inside [start, end] for the selected columns.
+
+        Returns (headers, data) in the same shape as parse_mission_csv.
+        """
+        headers = [h for h in self.headers if columns is None or h in columns]
+        picks = [self.headers.index(h) for h in headers]
+        ranged = start is not None or end is not None
+
+        with open(self.path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = self.byte_ranges(start, end) if ranged and self.x_col is not None \
+                else [(self._data_start(mm), len(mm))]
+            text = "".join(mm[lo:hi].decode(self.encoding, errors="replace") for lo, hi in ranges)
+
+        # Plain split unless the slice actually uses CSV quoting
+        if '"' in text:
+            rows = csv.reader(io.StringIO(text), delimiter=self.delimiter)
+        else:
+            rows = (line.rstrip("\r").split(self.delimiter) for line in text.split("\n"))
+
+        data = {h: [] for h in headers}
+        for row in rows:
+            if _is_trailer(row):
+                continue
+            if ranged:
+                try:
+                    x = float(row[self.x_col])
+                except (IndexError, ValueError, TypeError):
+                    continue
+                if (start is not None and x < start) or (end is not None and x > end):
+                    continue
+            for h, i in zip(headers, picks):
+                data[h].append(_to_value(row[i]) if i < len(row) else None)
+        return headers, data
+
+
+# ==================== Loading ====================
+
+def _select(all_headers, columns):
+    """Requested columns (in file order) plus the x axis, or everything."""
+    if not columns:
+        return list(all_headers)
+    wanted = set(columns) | set(X_LABELS)
+    return [h for h in all_headers if h in wanted]
+
+
+def downsample_mission(data, headers, max_points, method):
+    """Downsample parsed mission columns; non-numeric columns follow the chosen rows"""
+    x_key = "Elapsed [s]" if "Elapsed [s]" in data else None
+    numeric = {}
+    for header in headers:
+        values = data.get(header, [])
+        if values and all(isinstance(v, float) for v in values):
+            numeric[header] = np.array(values, dtype=np.float64)
+            if x_key is None:
+                x_key = header
+    if x_key not in numeric:
+        return data
+
+    n = len(numeric[x_key])
+    for header, values in numeric.items():
+        if len(values) != n:
+            numeric[header] = np.resize(np.append(values, np.nan), n) if len(values) < n else values[:n]
+
+    reduced, rows = downsample(numeric, x_key, max_points, method)
+    result = {}
+    for header in headers:
+        if header in reduced:
+            result[header] = HistoryStore.to_list(reduced[header])
+        else:
+            values = data.get(header, [])
+            result[header] = [values[i] if i < len(values) else None for i in rows.tolist()]
+    return result
+
+
+def load_binary(log_path, columns=None, start=None, end=None, max_points=None, method="lttb"):
+    """Slice of a binary mission log (memmap view), optionally downsampled"""
+    log = MissionLog(log_path)
+    headers = _select(log.labels, columns)
+    numeric = [label for label in headers if label != log.time_label]
+    x_key = next((x for x in X_LABELS if x in log.labels), None)
+
+    rows = log.time_slice(start, end) if x_key == log.index_label else slice(None)
+    selected = log.columns(numeric, rows)
+    count = len(selected[numeric[0]]) if numeric else 0
+    picked = np.arange(count)
+    if max_points and numeric and count > max_points:
+        selected, picked = downsample(selected, x_key if x_key in selected else numeric[0],
+                                      max_points, method)
+
+    data = {}
+    for label in headers:
+        if label == log.time_label:
+            source_rows = np.arange(log.rows)[rows][picked]
+            data[label] = log.timestamps(source_rows)
+        else:
+            data[label] = HistoryStore.to_list(selected[label])
+    return headers, data, count
+
+
+def load_mission_data(full_path, columns=None, start=None, end=None, max_points=None, method="lttb"):
+    """
+    Load (part of) a mission file.
+
+    Returns (headers, data, source_rows): `data` maps header -> JSON-ready list
+    and `source_rows` is the number of rows in range before downsampling.
+    """
+    log_path = binary_path(full_path)
+    if os.path.isfile(log_path) and os.path.getmtime(log_path) >= os.path.getmtime(full_path):
+        return load_binary(log_path, columns, start, end, max_points, method)
+
+    index = CsvIndex.open(full_path)
+    if index is not None:
+        headers, data = index.read(_select(index.headers, columns), start, end)
+    else:
+        # Legacy fixed-width file: full parse, then filter
+        file_content = read_text(full_path)
+        if file_content is None:
+            raise ValueError("Could not decode file with any supported encoding")
+        headers, data = parse_mission_csv(file_content)
+        headers = _select(headers, columns)
+        data = {h: data[h] for h in headers}
+        x_key = next((x for x in X_LABELS if x in data), None)
+        if x_key and (start is not None or end is not None):
+            keep = [i for i, x in enumerate(data[x_key]) if isinstance(x, float)
+                    and (start is None or x >= start) and (end is None or x <= end)]
+            data = {h: [values[i] for i in keep if i < len(values)] for h, values in data.items()}
+
+    source_rows = len(data.get(headers[0], [])) if headers else 0
+    if max_points and headers:
+        data = downsample_mission(data, headers, max_points, method)
+    return headers, data, source_rows
+
+
+# ==================== Benchmark ====================
+
+def benchmark(path, columns=None, start=None, end=None, repeat=5):
+    import time
+
+    cache = csv_index_path(path)
+    if os.path.isfile(cache):
+        os.remove(cache)
+
+    t0 = time.perf_counter()
+    content = read_text(path)
+    headers, data = parse_mission_csv(content)
+    full = time.perf_counter() - t0
+    print(f"[BENCH] full parse        {full * 1e3:9.1f} ms  ({len(data[headers[0]])} rows)")
+
+    t0 = time.perf_counter()
+    CsvIndex.open(path)
+    print(f"[BENCH] index build       {(time.perf_counter() - t0) * 1e3:9.1f} ms")
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        headers, data, rows = load_mission_data(path, columns, start, end)
+    dt = (time.perf_counter() - t0) / repeat
+    print(f"[BENCH] ranged load       {dt * 1e3:9.1f} ms  ({rows} rows, {len(headers)} columns)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mission loader benchmark")
+    parser.add_argument("path")
+    parser.add_argument("--start", type=float)
+    parser.add_argument("--end", type=float)
+    parser.add_argument("--columns", nargs="*")
+    args = parser.parse_args()
+
+    benchmark(args.path, args.columns, args.start, args.end)
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+TRITON Mission Log - Compact binary columnar mission format
+
+CSV stays the human-readable format; every mission can also be stored as a
+binary log next to it (`recording_X.csv` -> `recording_X.tlog`), which loads
+as an np.memmap view instead of being re-parsed cell by cell.
+
+File layout (.tlog):
+    8 bytes   magic b"TRITONML"
+    4 bytes   header length, little-endian uint32
+    N bytes   UTF-8 JSON header (labels, units, dtype, start time, ...),
+              space-padded so the records start on a 64-byte boundary
+    records   fixed-width rows, one little-endian float64 (or float32) per
+              label, NaN for missing values
+
+The row count is derived from the file size, so a log cut short by a crash is
+still readable up to its last complete row. A timestamp column (if any) is
+stored as seconds since the header's start time; the header's time_format
+(separator, fractional digits, UTC offset of the source text) lets
+timestamps() write them back the way the CSV had them.
+
+Sparse time index (.tidx): the index column ("Elapsed [s]") sampled every
+`index_stride` rows as raw float64. Range queries bisect the index and then
+only the matching block of the memmap; the index is rebuilt automatically if
+it is missing or stale.
+
+Run breaks (.tbrk): little-endian int64, the number of rows covered followed
+by the rows where the index column stops growing (Pi restarts, NaN). The
+writer finds them as rows come in, so opening a log doesn't scan the whole
+column to learn whether it is monotonic; rows past the covered count (a log
+still being written) and logs without the file are scanned.
+
+Usage:
+    # Convert the CSV archive (default: logs/previous_data) to binary logs
+    python3 mission_log.py to-binary [paths ...] [--float32] [--force]
+
+    # Convert binary logs back to CSV
+    python3 mission_log.py to-csv <file.tlog> [-o out.csv]
+
+    # Show a binary log's header and row count
+    python3 mission_log.py info <file.tlog>
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from time_index import find_breaks, find_range
+
+MAGIC = b"TRITONML"
+FORMAT_VERSION = 1
+BINARY_EXT = ".tlog"
+INDEX_EXT = ".tidx"
+BREAKS_EXT = ".tbrk"
+CSV_INDEX_EXT = ".cidx"     # Byte-offset index of the CSV itself (mission_loader.py)
+HEADER_ALIGN = 64
+DEFAULT_INDEX_STRIDE = 256
+DEFAULT_INDEX_LABEL = "Elapsed [s]"
+DEFAULT_TIME_FORMAT = {"sep": " ", "digits": 0, "zone": "", "utc_offset": None}   # 2025-01-01 12:00:00
+
+_UNIT_RE = re.compile(r"\[(.*?)\]")
+_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:([T ])\d{2}:\d{2}(?::\d{2}(?:[.,](\d+))?)?)?(.*)$")
+
+
+# ==================== Helpers ====================
+
+def binary_path(csv_path):
+    """Binary log that sits next to a CSV mission file."""
+    return os.path.splitext(csv_path)[0] + BINARY_EXT
+
+
+def index_path(log_path):
+    return os.path.splitext(log_path)[0] + INDEX_EXT
+
+
+def breaks_path(log_path):
+    return os.path.splitext(log_path)[0] + BREAKS_EXT
+
+
+def log_sidecars(log_path):
+    """Index files belonging to a binary log (whether or not they exist)."""
+    return [index_path(log_path), breaks_path(log_path)]
+
+
+def sidecar_paths(csv_path):
+    """Binary log and index files belonging to a CSV file (whether or not they exist)."""
+    log = binary_path(csv_path)
+    return [log, *log_sidecars(log), os.path.splitext(csv_path)[0] + CSV_INDEX_EXT]
+
+
+def unit_of(label):
+    match = _UNIT_RE.search(label)
+    return match.group(1) if match else ""
+
+
+def parse_time(value):
+    """Unix seconds from a datetime string or number, NaN if unparseable."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).strip()).timestamp()
+    except ValueError:
+        return float("nan")
+
+
+def time_format_of(value):
+    """How a timestamp string is written (see DEFAULT_TIME_FORMAT), None if it isn't one."""
+    text = str(value).strip()
+    match = _TIME_RE.match(text)
+    if not match:
+        return None
+    try:
+        offset = datetime.fromisoformat(text).utcoffset()
+    except ValueError:
+        return None
+    return {"sep": match.group(1) or "", "digits": len(match.group(2) or ""), "zone": match.group(3).strip(),
+            "utc_offset": offset.total_seconds() if offset is not None else None}
+
+
+def format_time(seconds, time_format=None):
+    """Unix seconds as text in `time_format` (a time_format_of() result; sep "" is a date only)."""
+    fmt = time_format or DEFAULT_TIME_FORMAT
+    digits = fmt["digits"]
+    offset = fmt["utc_offset"]
+    moment = datetime.fromtimestamp(round(seconds, min(digits, 6)),
+                                     timezone(timedelta(seconds=offset)) if offset is not None else None)
+    if not fmt["sep"]:
+        return moment.strftime("%Y-%m-%d") + fmt["zone"]
+    text = moment.strftime(f"%Y-%m-%d{fmt['sep']}%H:%M:%S")
+    if digits:
+        text += "." + f"{moment.microsecond:06d}"[:digits].ljust(digits, "0")
+    return text + fmt["zone"]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float("nan")
+
+
+# ==================== Writing ====================
+
+class MissionLogWriter:
+    """
+    Append-only binary mission log.
+
+    append_rows() takes the same rows as the CSV writer (the time column may be
+    a datetime string, other values anything float() accepts), so it can be
+    passed as RecordingWriter's `mirror` and written on the same thread.
+    `time_format` (time_format_of()) is how those strings are written;
+    the default is "2025-01-01 12:00:00", what the Pi and app.py log.
+    """
+
+    def __init__(self, path, labels, time_label=None, start_time=None, dtype="<f8",
+                 index_label=DEFAULT_INDEX_LABEL, index_stride=DEFAULT_INDEX_STRIDE, source=None, time_format=None):
+        self.path = path
+        self.labels = list(labels)
+        self.dtype = np.dtype(dtype)
+        self.time_index = self.labels.index(time_label) if time_label in self.labels else None
+        self.index_col = self.labels.index(index_label) if index_label in self.labels else None
+        self.index_stride = int(index_stride)
+        self.rows = 0
+
+        start = start_time or datetime.now()
+        self.start_unix = start.timestamp()
+        header = {
+            "format": "triton-mission",
+            "version": FORMAT_VERSION,
+            "labels": self.labels,
+            "units": [unit_of(label) for label in self.labels],
+            "dtype": self.dtype.str,
+            "start_time": start.isoformat(),
+            "start_unix": self.start_unix,
+            "time_label": time_label if self.time_index is not None else None,
+            "time_format": (time_format or DEFAULT_TIME_FORMAT) if self.time_index is not None else None,
+            "index_label": index_label if self.index_col is not None else None,
+            "index_stride": self.index_stride,
+            "source": source
+        }
+
+        raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        data_offset = -(-(len(MAGIC) + 4 + len(raw)) // HEADER_ALIGN) * HEADER_ALIGN
+        raw += b" " * (data_offset - len(MAGIC) - 4 - len(raw))
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + struct.pack("<I", len(raw)) + raw)
+        self._index = open(index_path(path), "wb") if self.index_col is not None else None
+        self._breaks = open(breaks_path(path), "wb") if self.index_col is not None else None
+        if self._breaks is not None:
+            self._breaks.write(struct.pack("<q", 0))
+        self._last_index = np.nan
+
+    def _to_array(self, rows):
+        out = np.empty((len(rows), len(self.labels)), dtype=np.float64)
+        for r, row in enumerate(rows):
+            for c in range(len(self.labels)):
+                value = row[c] if c < len(row) else None
+                if c == self.time_index:
+                    out[r, c] = parse_time(value) - self.start_unix
+                else:
+                    out[r, c] = _to_float(value)
+        return out
+
+    def append_array(self, array):
+        """Append a (rows x labels) float array."""
+        array = np.asarray(array, dtype=np.float64)
+        if not len(array):
+            return
+        self._file.write(array.astype(self.dtype).tobytes())
+
+        if self._index is not None:
+            # Index entries for every row number that is a multiple of the stride
+            first = -(-self.rows // self.index_stride) * self.index_stride
+            picks = np.arange(first, self.rows + len(array), self.index_stride) - self.rows
+            if len(picks):
+                self._index.write(array[picks, self.index_col].astype("<f8").tobytes())
+
+        if self._breaks is not None:
+            col = array[:, self.index_col]
+            if self.rows:
+                found = find_breaks(np.concatenate(([self._last_index], col))) - 1 + self.rows
+            else:
+                found = find_breaks(col)
+            self._last_index = col[-1]
+            if len(found):
+                self._breaks.write(found.astype("<i8").tobytes())
+            # Rows covered go in front, once their breaks are written
+            self._breaks.seek(0)
+            self._breaks.write(struct.pack("<q", self.rows + len(array)))
+            self._breaks.seek(0, os.SEEK_END)
+        self.rows += len(array)
+
+    def append_rows(self, rows):
+        self.append_array(self._to_array(rows))
+
+    def flush(self):
+        for f in (self._file, self._index, self._breaks):
+            if f is not None:
+                f.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        for f in (self._file, self._index, self._breaks):
+            if f is not None and not f.closed:
+                f.close()
+
+
+def write_mission_log(path, columns, **kwargs):
+    """Write a whole mission (label -> float array) in one go."""
+    labels = list(columns)
+    writer = MissionLogWriter(path, labels, **kwargs)
+    try:
+        if labels:
+            writer.append_array(np.column_stack([np.asarray(columns[label], dtype=np.float64)
+                                                 for label in labels]))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+# ==================== Reading ====================
+
+class MissionLog:
+    """Read-only memmap view of a binary mission log."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a TRITON mission log")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+
+        self.labels = self.header["labels"]
+        self.units = self.header["units"]
+        self.dtype = np.dtype(self.header["dtype"])
+        self.start_unix = self.header["start_unix"]
+        self.time_label = self.header.get("time_label")
+        self.time_format = self.header.get("time_format") or DEFAULT_TIME_FORMAT
+        self.index_label = self.header.get("index_label")
+        self.index_stride = self.header.get("index_stride", DEFAULT_INDEX_STRIDE)
+        self._col = {label: i for i, label in enumerate(self.labels)}
+
+        offset = len(MAGIC) + 4 + header_len
+        row_bytes = self.dtype.itemsize * len(self.labels)
+        self.rows = max(0, (os.path.getsize(path) - offset) // row_bytes) if row_bytes else 0
+        if self.rows:
+            self.data = np.memmap(path, dtype=self.dtype, mode="r", offset=offset,
+                                  shape=(self.rows, len(self.labels)))
+        else:
+            self.data = np.empty((0, len(self.labels)), dtype=self.dtype)
+        self._index = None
+        self._breaks = None
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, label, rows=slice(None)):
+        """Zero-copy (strided) view of one column."""
+        return self.data[rows, self._col[label]]
+
+    def columns(self, labels=None, rows=slice(None)):
+        return {label: self.column(label, rows) for label in (labels or self.labels)}
+
+    def timestamps(self, rows=slice(None)):
+        """Time column as strings in the source's time_format (None for missing)."""
+        if self.time_label is None:
+            return None
+        seconds = np.asarray(self.column(self.time_label, rows), dtype=np.float64) + self.start_unix
+        return [None if s != s else format_time(s, self.time_format) for s in seconds.tolist()]
+
+    # ==================== Time Index ====================
+
+    def index(self):
+        """Sparse index (index column every `index_stride` rows), rebuilt if stale."""
+        if self._index is not None or self.index_label is None:
+            return self._index
+
+        expected = -(-self.rows // self.index_stride)
+        path = index_path(self.path)
+        index = None
+        if os.path.isfile(path) and os.path.getsize(path) >= expected * 8:
+            index = np.fromfile(path, dtype="<f8", count=expected)
+        if index is None or len(index) != expected:
+            index = np.array(self.column(self.index_label, slice(None, None, self.index_stride)),
+                             dtype=np.float64)
+            try:
+                index.astype("<f8").tofile(path)
+            except OSError:
+                pass
+        self._index = index
+        return index
+
+    def breaks(self):
+        """
+        Run breaks of the index column (see time_index.find_breaks), found once
+        per open: the writer's .tbrk, plus a scan of the rows it doesn't cover.
+        """
+        if self._breaks is None:
+            stored, covered = self._stored_breaks()
+            # From the last covered row on, to catch a break right after it
+            tail = max(0, covered - 1)
+            found = np.empty(0, dtype=np.int64)
+            if covered < self.rows:
+                found = find_breaks(self.column(self.index_label or self.labels[0], slice(tail, None))) + tail
+            self._breaks = np.concatenate((stored[stored < covered], found))
+        return self._breaks
+
+    def _stored_breaks(self):
+        """(breaks, rows covered) from the .tbrk file, (none, 0) if there is none."""
+        path = breaks_path(self.path)
+        if self.index_label is None or not os.path.isfile(path):
+            return np.empty(0, dtype=np.int64), 0
+        stored = np.fromfile(path, dtype="<i8")
+        if not len(stored):
+            return np.empty(0, dtype=np.int64), 0
+        return stored[1:].astype(np.int64), min(int(stored[0]), self.rows)
+
+    def monotonic(self):
+        """True if the index column never decreases and has no gaps."""
+        return self.index_label is not None and not len(self.breaks())
+
+    def time_slice(self, start=None, end=None):
+        """
+        Rows with `start <= index column <= end`.
+
+        Returns a slice when the index column is monotonic (the normal case),
+        so `columns(rows=...)` stays a memmap view; otherwise (e.g. Elapsed
+        restarts after a Pi reboot) usually an array of matching row numbers.
+        """
+        if start is None and end is None:
+            return slice(0, self.rows)
+
+        if self.monotonic():
+            index, stride = self.index(), self.index_stride
+            lo, hi = 0, self.rows
+            # Bisect the sparse index, then only the one block it points at
+            if start is not None:
+                block = max(0, int(np.searchsorted(index, start, side="left")) - 1) * stride
+                col = self.column(self.index_label, slice(block, block + stride + 1))
+                lo = block + int(np.searchsorted(col, start, side="left"))
+            if end is not None:
+                block = max(0, int(np.searchsorted(index, end, side="right")) - 1) * stride
+                col = self.column(self.index_label, slice(block, block + stride + 1))
+                hi = block + int(np.searchsorted(col, end, side="right"))
+            return slice(lo, max(lo, hi))
+
+        # Non-monotonic: bisect every monotonic run on its own
+        return find_range(self.column(self.index_label or self.labels[0]), start, end, self.breaks())
+
+
+# ==================== CSV Parsing ====================
+
+LEGACY_HEADERS = [
+    "Timestamp (MET)", "Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]",
+    "Press [hPa]", "Alt [m]", "Acc x [m/s²]", "Acc y [m/s²]",
+    "Acc z [m/s²]", "Gyro x [°/s]", "Gyro y [°/s]", "Gyro z [°/s]",
+    "Temp_MPU [°C]"
+]
+
+
+def read_text(path):
+    """File contents, trying the encodings missions have been saved with."""
+    for encoding in ('utf-8', 'latin-1', 'cp1252', 'iso-8859-1'):
+        try:
+            with open(path, 'r', encoding=encoding) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def parse_mission_csv(file_content):
+    """
+    Parse a mission file (comma, semicolon or legacy fixed-width format).
+
+    Returns (headers, data) where data maps header -> list of values (float
+    where the cell parses as a number, otherwise the raw string).
+    """
+    data = {}
+    lines = file_content.strip().split('\n')
+    first_line = lines[0] if lines else ""
+
+    # Detect format: comma-delimited, semicolon-delimited, or fixed-width
+    is_semicolon_csv = ';' in first_line and first_line.count(';') >= 5
+    is_comma_csv = ',' in first_line and first_line.count(',') >= 5
+
+    if is_semicolon_csv or is_comma_csv:
+        reader = csv.DictReader(io.StringIO(file_content), delimiter=';' if is_semicolon_csv else ',')
+        headers = reader.fieldnames
+
+        for header in headers:
+            data[header] = []
+
+        for row in reader:
+            for header in headers:
+                try:
+                    value = float(row[header])
+                except (ValueError, TypeError):
+                    value = row[header]
+                data[header].append(value)
+    else:
+        # Fixed-width format from legacy lorareceivertest.py
+        if "Timestamp (MET)" in first_line or "Elapsed [s]" in first_line:
+            headers = LEGACY_HEADERS
+        else:
+            # Fallback to splitting by multiple spaces
+            header_parts = re.split(r'\s{2,}', first_line.strip())
+            headers = [h.strip() for h in header_parts if h.strip()]
+
+        for header in headers:
+            data[header] = []
+
+        for line in lines[1:]:
+            if not line.strip():
+                continue
+            # Skip MIN/MAX summary lines at the end
+            if line.strip().startswith('MIN,') or line.strip().startswith('MAX,'):
+                continue
+
+            values = re.split(r'\s{2,}', line.strip())
+            values = [v.strip() for v in values if v.strip()]
+
+            for i, header in enumerate(headers):
+                if i < len(values):
+                    try:
+                        value = float(values[i])
+                    except (ValueError, TypeError):
+                        value = values[i]
+                    data[header].append(value)
+
+    return headers, data
+
+
+def csv_to_binary(csv_path, out_path=None, dtype="<f8"):
+    """Convert a mission CSV to a binary log. Returns (path, rows)."""
+    content = read_text(csv_path)
+    if content is None:
+        raise ValueError("Could not decode file with any supported encoding")
+    headers, data = parse_mission_csv(content)
+
+    # Summary lines (MIN/MAX) in CSV logs are not data rows
+    first = headers[0] if headers else None
+    keep = [i for i, v in enumerate(data.get(first, [])) if v not in ("MIN", "MAX")]
+    n = len(keep)
+
+    columns, time_label, start, time_format = {}, None, None, None
+    for header in headers:
+        values = data[header]
+        values = [values[i] if i < len(values) else None for i in keep]
+        numeric = np.array([_to_float(v) for v in values], dtype=np.float64)
+        if n and np.isnan(numeric).all() and time_label is None:
+            parsed = np.array([parse_time(v) for v in values], dtype=np.float64)
+            if not np.isnan(parsed).all():
+                time_label = header
+                start = datetime.fromtimestamp(float(np.nanmin(parsed)))
+                numeric = parsed - start.timestamp()
+                # Written back like the source: its separator and zone, the most fractional digits it used
+                formats = [f for f in map(time_format_of, values) if f is not None]
+                time_format = dict(formats[0], digits=max(f["digits"] for f in formats)) if formats else None
+        columns[header] = numeric
+
+    out_path = out_path or binary_path(csv_path)
+    rows = write_mission_log(out_path, columns, time_label=time_label, start_time=start,
+                             dtype=dtype, source=os.path.basename(csv_path), time_format=time_format)
+    return out_path, rows
+
+
+def binary_to_csv(log_path, out_path=None):
+    """Convert a binary log back to CSV. Returns (path, rows)."""
+    log = MissionLog(log_path)
+    out_path = out_path or os.path.splitext(log_path)[0] + ".csv"
+    timestamps = log.timestamps()
+
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(log.labels)
+        time_col = log.labels.index(log.time_label) if log.time_label else None
+        for r, row in enumerate(np.asarray(log.data, dtype=np.float64).tolist()):
+            out = ["" if v != v else v for v in row]
+            if time_col is not None:
+                out[time_col] = timestamps[r] or ""
+            writer.writerow(out)
+    return out_path, log.rows
+
+
+# ==================== CLI ====================
+
+def _expand(paths, default_dir, ext):
+    if not paths:
+        paths = [default_dir]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(ext)))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TRITON mission log converter")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_bin = sub.add_parser("to-binary", help="CSV -> binary log")
+    p_bin.add_argument("paths", nargs="*", help="CSV files or directories (default: logs/previous_data)")
+    p_bin.add_argument("--float32", action="store_true", help="store values as float32")
+    p_bin.add_argument("--force", action="store_true", help="overwrite binary logs that are up to date")
+
+    p_csv = sub.add_parser("to-csv", help="binary log -> CSV")
+    p_csv.add_argument("path")
+    p_csv.add_argument("-o", "--output")
+
+    p_info = sub.add_parser("info", help="show a binary log's header")
+    p_info.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        for path in _expand(args.paths, os.path.join("logs", "previous_data"), ".csv"):
+            target = binary_path(path)
+            if (not args.force and os.path.isfile(target)
+                    and os.path.getmtime(target) >= os.path.getmtime(path)):
+                print(f"[SKIP] {target} is up to date")
+                continue
+            try:
+                out, rows = csv_to_binary(path, dtype="<f4" if args.float32 else "<f8")
+                print(f"[OK] {path} -> {out} ({rows} rows, "
+                      f"{os.path.getsize(path):,} -> {os.path.getsize(out):,} bytes)")
+            except Exception as e:
+                print(f"[ERROR] {path}: {e}")
+
+    elif args.command == "to-csv":
+        out, rows = binary_to_csv(args.path, args.output)
+        print(f"[OK] {args.path} -> {out} ({rows} rows)")
+
+    elif args.command == "info":
+        log = MissionLog(args.path)
+        print(json.dumps(dict(log.header, rows=log.rows), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
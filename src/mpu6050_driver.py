@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+TRITON MPU6050 - Burst-read IMU driver with FIFO draining
+
+test.py used the mpu6050-raspberrypi library: get_accel_data(),
+get_gyro_data() and get_temp() read every register byte on its own and look
+up the range register each time, 16 I2C transactions per sample. This
+driver takes the path src/legacy/MPU6050.py already showed:
+
+- read() fetches ACCEL_XOUT_H..GYRO_ZOUT_L (0x3B, 14 bytes) with a single
+  read_i2c_block_data() and decodes it with a precompiled struct.Struct.
+  The scale factors are worked out once, when the ranges are set
+- start_fifo(rate_hz) lets the chip sample on its own clock (sample-rate
+  divider, digital low-pass filter) into its 1024-byte FIFO. read_fifo()
+  then takes every complete 14-byte record in block reads, so 200 Hz - 1 kHz
+  needs one drain every few ten milliseconds instead of a read per sample.
+  SMBus block reads stop at 32 bytes; with smbus2 the whole drain is one
+  i2c_rdwr transaction. A full FIFO has lost data and record alignment, so
+  it is reset and counted as an overflow
+- SimulatedBus stands in for smbus: a register file with synthetic motion,
+  a FIFO that fills at the configured rate and a cost model per transaction
+  (bus clock plus driver overhead), so the driver can be tried and
+  benchmarked without a Pi. RecordingBus writes the transactions on a real
+  bus to a dump, ReplayBus plays such a dump back
+
+Values come out in the units the library used: m/s², °/s and °C, in the
+order accel x/y/z, gyro x/y/z, temperature (test.py's SENSOR_COLUMNS).
+
+Usage (benchmark):
+    # Library-style byte reads vs. one burst read vs. draining the FIFO
+    python3 mpu6050_driver.py [--rate 1000] [--seconds 5]
+"""
+
+import json
+import math
+import random
+import struct
+import time
+
+try:
+    from smbus2 import i2c_msg
+except ImportError:
+    i2c_msg = None
+
+ADDRESS = 0x68
+GRAVITY = 9.80665               # m/s² per g
+
+# Registers
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+GYRO_CONFIG = 0x1B
+ACCEL_CONFIG = 0x1C
+FIFO_EN = 0x23
+ACCEL_XOUT_H = 0x3B
+SIGNAL_PATH_RESET = 0x68
+USER_CTRL = 0x6A
+PWR_MGMT_1 = 0x6B
+FIFO_COUNTH = 0x72
+FIFO_R_W = 0x74
+
+# Register values
+DEVICE_RESET = 0x80
+CLOCK_PLL_XGYRO = 0x01          # More stable than the internal oscillator the chip starts on
+RESET_ALL_PATHS = 0x07
+FIFO_EN_TEMP_GYRO_ACCEL = 0xF8  # Same order as the data registers, so FIFO records decode like read()
+USER_FIFO_EN = 0x40
+USER_FIFO_RESET = 0x04
+
+ACCEL_RANGES = {2: 0x00, 4: 0x08, 8: 0x10, 16: 0x18}               # g -> ACCEL_CONFIG
+GYRO_RANGES = {250: 0x00, 500: 0x08, 1000: 0x10, 2000: 0x18}       # °/s -> GYRO_CONFIG
+DLPF_BANDWIDTHS = {260: 0, 184: 1, 94: 2, 44: 3, 21: 4, 10: 5, 5: 6}  # Hz -> CONFIG
+
+RECORD = struct.Struct(">7h")   # accel x/y/z, temperature, gyro x/y/z: 0x3B..0x48 and one FIFO record
+FIFO_SIZE = 1024
+SMBUS_BLOCK = 32                # Longest SMBus block read
+
+
+def open_bus(number=1):
+    """The I2C bus as an SMBus object: smbus2 if installed, else the distribution's smbus."""
+    try:
+        from smbus2 import SMBus
+    except ImportError:
+        from smbus import SMBus
+    return SMBus(number)
+
+
+def sample_rate_config(rate_hz, dlpf_hz=None):
+    """(CONFIG, SMPLRT_DIV, actual rate) for `rate_hz`.
+
+    Without `dlpf_hz` the widest filter below rate/2 is used, so the FIFO
+    samples aren't aliased. The gyro output runs at 8 kHz with the filter
+    off (260 Hz) and at 1 kHz otherwise; the rate is that divided by
+    1 + SMPLRT_DIV.
+    """
+    if dlpf_hz is None:
+        dlpf_hz = max((bw for bw in DLPF_BANDWIDTHS if bw <= rate_hz / 2), default=5)
+    config = DLPF_BANDWIDTHS[dlpf_hz]
+    base = 8000.0 if config == 0 else 1000.0
+    divider = min(255, max(0, round(base / rate_hz) - 1))
+    return config, divider, base / (1 + divider)
+
+
+# ==================== Driver ====================
+
+class MPU6050:
+    """One MPU6050 on an SMBus-like `bus` (see module docstring)."""
+
+    def __init__(self, bus, address=ADDRESS, accel_range=2, gyro_range=250, reset=True):
+        self.bus = bus
+        self.address = address
+        self.sample_rate = None         # Hz while the FIFO runs
+        self.fifo_overflows = 0
+        self._rdwr = i2c_msg is not None and hasattr(bus, "i2c_rdwr")
+
+        if reset:
+            bus.write_byte_data(address, PWR_MGMT_1, DEVICE_RESET)
+            time.sleep(0.1)
+            bus.write_byte_data(address, SIGNAL_PATH_RESET, RESET_ALL_PATHS)
+            time.sleep(0.1)
+        bus.write_byte_data(address, PWR_MGMT_1, CLOCK_PLL_XGYRO)
+        self.set_ranges(accel_range, gyro_range)
+
+    def set_ranges(self, accel_range, gyro_range):
+        self.bus.write_byte_data(self.address, ACCEL_CONFIG, ACCEL_RANGES[accel_range])
+        self.bus.write_byte_data(self.address, GYRO_CONFIG, GYRO_RANGES[gyro_range])
+        self.accel_range = accel_range
+        self.gyro_range = gyro_range
+        self.accel_scale = accel_range * GRAVITY / 32768.0     # m/s² per LSB
+        self.gyro_scale = gyro_range / 32768.0                # °/s per LSB
+
+    # ==================== Polled Reads ====================
+
+    def read_raw(self):
+        """Raw register values (accel x/y/z, temperature, gyro x/y/z) in one transaction."""
+        return RECORD.unpack(bytes(self.bus.read_i2c_block_data(self.address, ACCEL_XOUT_H, RECORD.size)))
+
+    def read(self):
+        """(ax, ay, az, gx, gy, gz, temperature) in m/s², °/s and °C."""
+        return self.convert(self.read_raw())
+
+    def convert(self, raw):
+        ax, ay, az, temp, gx, gy, gz = raw
+        a, g = self.accel_scale, self.gyro_scale
+        return (ax * a, ay * a, az * a, gx * g, gy * g, gz * g, temp / 340.0 + 36.53)
+
+    # ==================== FIFO ====================
+
+    def start_fifo(self, rate_hz, dlpf_hz=None):
+        """Sample at `rate_hz` into the FIFO; returns the rate the divider actually gives."""
+        config, divider, self.sample_rate = sample_rate_config(rate_hz, dlpf_hz)
+        self.bus.write_byte_data(self.address, CONFIG, config)
+        self.bus.write_byte_data(self.address, SMPLRT_DIV, divider)
+        self.bus.write_byte_data(self.address, FIFO_EN, FIFO_EN_TEMP_GYRO_ACCEL)
+        self.reset_fifo()
+        return self.sample_rate
+
+    def stop_fifo(self):
+        self.bus.write_byte_data(self.address, FIFO_EN, 0)
+        self.bus.write_byte_data(self.address, USER_CTRL, 0)
+        self.sample_rate = None
+
+    def reset_fifo(self):
+        self.bus.write_byte_data(self.address, USER_CTRL, USER_FIFO_RESET)
+        self.bus.write_byte_data(self.address, USER_CTRL, USER_FIFO_EN)
+
+    def fifo_count(self):
+        high, low = self.bus.read_i2c_block_data(self.address, FIFO_COUNTH, 2)
+        return high << 8 | low
+
+    def read_fifo_bytes(self, max_records=None):
+        """Complete records waiting in the FIFO as one bytes object (b"" after an overflow)."""
+        count = self.fifo_count()
+        if count >= FIFO_SIZE:
+            self.fifo_overflows += 1
+            self.reset_fifo()
+            return b""
+        records = count // RECORD.size
+        if max_records is not None:
+            records = min(records, max_records)
+        return self._read_block(FIFO_R_W, records * RECORD.size) if records else b""
+
+    def read_fifo_raw(self, max_records=None):
+        return list(RECORD.iter_unpack(self.read_fifo_bytes(max_records)))
+
+    def read_fifo(self, max_records=None):
+        """Converted samples from the FIFO, oldest first (see read())."""
+        return [self.convert(raw) for raw in self.read_fifo_raw(max_records)]
+
+    def _read_block(self, register, length):
+        if self._rdwr:
+            write, read = i2c_msg.write(self.address, [register]), i2c_msg.read(self.address, length)
+            self.bus.i2c_rdwr(write, read)
+            return bytes(read)
+        data = bytearray()
+        while len(data) < length:
+            data += bytes(self.bus.read_i2c_block_data(self.address, register,
+                                                       min(SMBUS_BLOCK, length - len(data))))
+        return bytes(data)
+
+
+# ==================== Simulated Bus ====================
+
+_ACCEL_G = {value: g for g, value in ACCEL_RANGES.items()}
+_GYRO_DPS = {value: dps for dps, value in GYRO_RANGES.items()}
+
+
+class SimulatedBus:
+    """
+    smbus stand-in with one MPU6050 behind it.
+
+    Time is virtual unless a `clock` is given: every transaction advances it
+    by its modelled cost, advance() by whatever the caller waits. The cost
+    is the bits on the wire (9 per byte plus start/stop) at `i2c_hz` plus a
+    fixed `overhead` for the system call and driver. `vibration_hz` is the
+    frequency of the simulated vibration (a motor's, say).
+    """
+
+    def __init__(self, address=ADDRESS, clock=None, i2c_hz=400_000, overhead=60e-6, vibration_hz=7.0, seed=0):
+        self.address = address
+        self.vibration_hz = vibration_hz
+        self.i2c_hz = i2c_hz
+        self.overhead = overhead
+        self.transactions = 0
+        self.bus_time = 0.0
+        self._clock = clock
+        self._virtual = 0.0
+        self._rng = random.Random(seed)
+        self._registers = bytearray(128)
+        self._fifo = bytearray()
+        self._fifo_next = None          # Time of the next FIFO sample
+        self._power_on()
+
+    def now(self):
+        return self._clock() if self._clock else self._virtual
+
+    def advance(self, seconds):
+        self._virtual += seconds
+
+    # ---- SMBus interface ----
+
+    def write_byte_data(self, address, register, value):
+        self._transaction(address, 3)
+        self._write(register, value & 0xFF)
+
+    def read_byte_data(self, address, register):
+        return self.read_i2c_block_data(address, register, 1)[0]
+
+    def read_i2c_block_data(self, address, register, length):
+        if length > SMBUS_BLOCK:
+            raise OSError(22, "Invalid argument")
+        self._transaction(address, 3 + length)
+        self._fill_fifo()
+        if register == FIFO_R_W:
+            data, self._fifo[:length] = self._fifo[:length], b""
+            return list(data) + [0] * (length - len(data))
+        return [self._read(register + i) for i in range(length)]
+
+    # ---- Chip model ----
+
+    def _transaction(self, address, nbytes):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+        cost = self.overhead + (9 * nbytes + 3) / self.i2c_hz
+        self.transactions += 1
+        self.bus_time += cost
+        self._virtual += cost
+
+    def _power_on(self):
+        self._registers[:] = bytes(128)
+        self._registers[PWR_MGMT_1] = 0x40      # Sleep
+        self._fifo.clear()
+        self._fifo_next = None
+
+    def _write(self, register, value):
+        if register == PWR_MGMT_1 and value & DEVICE_RESET:
+            self._power_on()
+            return
+        if register == USER_CTRL:
+            if value & USER_FIFO_RESET:
+                self._fifo.clear()
+            value &= ~USER_FIFO_RESET
+            self._fifo_next = self.now() if value & USER_FIFO_EN else None
+        self._registers[register] = value
+
+    def _read(self, register):
+        if ACCEL_XOUT_H <= register < ACCEL_XOUT_H + RECORD.size:
+            return RECORD.pack(*self._sample(self.now()))[register - ACCEL_XOUT_H]
+        if register in (FIFO_COUNTH, FIFO_COUNTH + 1):
+            return len(self._fifo).to_bytes(2, "big")[register - FIFO_COUNTH]
+        return self._registers[register]
+
+    def _sample_rate(self):
+        config, divider = self._registers[CONFIG] & 0x07, self._registers[SMPLRT_DIV]
+        return (8000.0 if config in (0, 7) else 1000.0) / (1 + divider)
+
+    def _fill_fifo(self):
+        if self._fifo_next is None or not self._registers[FIFO_EN]:
+            return
+        now, period = self.now(), 1.0 / self._sample_rate()
+        while self._fifo_next <= now:
+            self._fifo += RECORD.pack(*self._sample(self._fifo_next))
+            self._fifo_next += period
+        if len(self._fifo) > FIFO_SIZE:             # Full: the oldest bytes are overwritten
+            del self._fifo[:len(self._fifo) - FIFO_SIZE]
+
+    def _sample(self, t):
+        """Raw values at time `t`: gravity on z, a vibration, a slow roll, sensor noise."""
+        accel_lsb = 32768.0 / (_ACCEL_G[self._registers[ACCEL_CONFIG]] * GRAVITY)
+        gyro_lsb = 32768.0 / _GYRO_DPS[self._registers[GYRO_CONFIG]]
+        noise = self._rng.gauss
+        phase = 2 * math.pi * self.vibration_hz * t
+        accel = (0.3 * math.sin(phase) + noise(0, 0.02),
+                 0.2 * math.cos(phase) + noise(0, 0.02),
+                 GRAVITY + 0.5 * math.sin(phase) + noise(0, 0.02))
+        gyro = (20.0 * math.sin(2 * math.pi * 0.5 * t) + noise(0, 0.05), noise(0, 0.05), noise(0, 0.05))
+        temp = (25.0 - 36.53) * 340.0
+
+        def clip(value):
+            return max(-32768, min(32767, int(round(value))))
+
+        return ([clip(a * accel_lsb) for a in accel] + [clip(temp)] + [clip(g * gyro_lsb) for g in gyro])
+
+
+# ==================== Recorded Buses ====================
+
+class RecordingBus:
+    """Passes calls through to `bus` and writes every transaction to a JSON-lines dump for ReplayBus."""
+
+    def __init__(self, bus, path, clock=time.perf_counter):
+        self.bus = bus
+        self.clock = clock
+        self._started = clock()
+        self._file = open(path, "w")
+
+    def _record(self, op, register, data):
+        self._file.write(json.dumps({"t": round(self.clock() - self._started, 6), "op": op,
+                                     "register": register, "data": data}) + "\n")
+
+    def write_byte_data(self, address, register, value):
+        self.bus.write_byte_data(address, register, value)
+        self._record("write", register, [value])
+
+    def read_byte_data(self, address, register):
+        value = self.bus.read_byte_data(address, register)
+        self._record("read", register, [value])
+        return value
+
+    def read_i2c_block_data(self, address, register, length):
+        data = list(self.bus.read_i2c_block_data(address, register, length))
+        self._record("read", register, data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+class ReplayBus:
+    """
+    Plays a RecordingBus dump back, so a capture can be re-run without the chip.
+
+    The recorded reads of each register form one byte stream: the driver
+    asking in the same order (FIFO count, then FIFO data) gets exactly the
+    recorded answers. Writes only go into a register file. When a stream runs
+    out, the register file answers (a FIFO count of 0) and `exhausted` is set.
+    """
+
+    def __init__(self, dump, address=ADDRESS):
+        self.address = address
+        self.exhausted = False
+        self._registers = bytearray(128)
+        self._streams = {}
+        if isinstance(dump, str):
+            with open(dump) as f:
+                dump = [json.loads(line) for line in f if line.strip()]
+        for entry in dump:
+            if entry["op"] == "read":
+                self._streams.setdefault(entry["register"], bytearray()).extend(entry["data"])
+
+    def write_byte_data(self, address, register, value):
+        self._check(address)
+        self._registers[register] = value & 0xFF
+
+    def read_byte_data(self, address, register):
+        return self.read_i2c_block_data(address, register, 1)[0]
+
+    def read_i2c_block_data(self, address, register, length):
+        self._check(address)
+        stream = self._streams.get(register)
+        if stream is not None and len(stream) >= length:
+            data, stream[:length] = stream[:length], b""
+            return list(data)
+        if stream is not None:
+            self.exhausted = True
+        return list(self._registers[register:register + length])
+
+    def _check(self, address):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+
+
+# ==================== Benchmark ====================
+
+def _library_read(bus, address=ADDRESS):
+    """What mpu6050-raspberrypi does per sample: range lookups plus two byte reads per word."""
+    def word(register):
+        value = (bus.read_byte_data(address, register) << 8) + bus.read_byte_data(address, register + 1)
+        return value - 65536 if value >= 0x8000 else value
+
+    accel_scale = {0x00: 16384.0, 0x08: 8192.0, 0x10: 4096.0, 0x18: 2048.0}[bus.read_byte_data(address, ACCEL_CONFIG)]
+    accel = [word(ACCEL_XOUT_H + 2 * i) / accel_scale * GRAVITY for i in range(3)]
+    gyro_scale = {0x00: 131.0, 0x08: 65.5, 0x10: 32.8, 0x18: 16.4}[bus.read_byte_data(address, GYRO_CONFIG)]
+    gyro = [word(0x43 + 2 * i) / gyro_scale for i in range(3)]
+    return accel + gyro + [word(0x41) / 340.0 + 36.53]
+
+
+def benchmark(rate=1000.0, seconds=5.0, samples=2000):
+    def polled(label, read):
+        bus = SimulatedBus()
+        mpu = MPU6050(bus, reset=False)
+        bus.transactions, bus.bus_time = 0, 0.0
+        started = time.perf_counter()
+        for _ in range(samples):
+            read(mpu, bus)
+        cpu = (time.perf_counter() - started) / samples
+        per = bus.bus_time / samples
+        print(f"[BENCH] {label:<18}: {bus.transactions / samples:5.1f} transactions  bus {per * 1e6:7.1f} us/sample  "
+              f"python {cpu * 1e6:6.1f} us/sample  bus-limited max {1.0 / per:6.0f} Hz")
+
+    print("[BENCH] Simulated MPU6050 at 400 kHz I2C, 60 us overhead per transaction "
+          "(python times include the simulated chip)")
+    polled("library byte reads", lambda mpu, bus: _library_read(bus))
+    polled("burst read()", lambda mpu, bus: mpu.read())
+
+    # FIFO: the chip samples at `rate`, drained every 20 ms of (virtual) time
+    bus = SimulatedBus()
+    mpu = MPU6050(bus, reset=False)
+    actual = mpu.start_fifo(rate)
+    bus.transactions, bus.bus_time = 0, 0.0
+    started, collected, drains = time.perf_counter(), 0, 0
+    end = bus.now() + seconds
+    while bus.now() < end:
+        bus.advance(0.02)
+        collected += len(mpu.read_fifo())
+        drains += 1
+    cpu = time.perf_counter() - started
+    print(f"[BENCH] FIFO {actual:g} Hz, 20 ms drains: {collected} samples in {seconds:g} s  "
+          f"{bus.transactions / collected:5.2f} transactions  bus {bus.bus_time / collected * 1e6:5.1f} us/sample "
+          f"({bus.bus_time / seconds * 100:.1f} % of the bus)  python {cpu / collected * 1e6:5.1f} us/sample  "
+          f"overflows {mpu.fifo_overflows}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MPU6050 driver benchmark on the simulated bus")
+    parser.add_argument("--rate", type=float, default=1000.0, help="FIFO sample rate (Hz)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    benchmark(args.rate, args.seconds)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+TRITON PDF Report - Formatted PDF summary of the session history
+
+Moved out of app.export_pdf() so the report can also be built by the export
+job workers (export_jobs.py). The layout is unchanged: report information,
+per-sensor statistics (min, max, average, standard deviation) and the first
+50 rows of the BME280 and MPU6050 data. Only those sample rows are converted
+to Python values; statistics come from the (labels x rows) matrix directly.
+"""
+
+from datetime import datetime
+
+from excel_export import DATA_LABELS
+from history_store import HistoryStore
+from stats_engine import column_statistics
+
+SAMPLE_ROWS = 50
+
+
+def report_statistics(labels, matrix):
+    """column_statistics() plus the population standard deviation ("std")."""
+    return column_statistics(labels, matrix, std=True)
+
+
+def write_pdf_report(target, labels, matrix, start=None, end=None, progress=None, statistics=None):
+    """
+    Build the PDF report into `target` (path or binary file object).
+
+    `statistics` (label -> {"min", "max", "avg", "count", "std"}) is computed
+    from `matrix` if not given. Raises ImportError if reportlab is not installed.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.enums import TA_CENTER
+
+    def report(fraction):
+        if progress is not None:
+            progress(fraction)
+
+    total = matrix.shape[1]
+    if statistics is None:
+        statistics = report_statistics(labels, matrix)
+    export_data = {label: HistoryStore.to_list(matrix[i, :SAMPLE_ROWS]) for i, label in enumerate(labels)}
+    report(0.2)
+
+    doc = SimpleDocTemplate(target, pagesize=landscape(letter),
+                           leftMargin=0.5*inch, rightMargin=0.5*inch,
+                           topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Title'],
+        fontSize=24,
+        spaceAfter=20,
+        alignment=TA_CENTER
+    )
+    heading_style = ParagraphStyle(
+        'Heading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceBefore=15,
+        spaceAfter=10,
+        textColor=colors.HexColor('#0066CC')
+    )
+    normal_style = styles['Normal']
+
+    elements = []
+
+    # Title
+    elements.append(Paragraph("TRITON Sensor Data Report", title_style))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Metadata section
+    elements.append(Paragraph("Report Information", heading_style))
+    elapsed = statistics.get("Elapsed [s]")
+    meta_data = [
+        ["Project:", "TRITON - Autonomous Submarine Navigation System"],
+        ["Export Date:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+        ["Data Points:", str(total)],
+        ["Time Range:", f"{elapsed['min']:.2f}s - {elapsed['max']:.2f}s" if elapsed else "No data"],
+    ]
+    if start is not None or end is not None:
+        meta_data.append(["Filter Applied:", f"Start: {start if start else 'N/A'}, End: {end if end else 'N/A'}"])
+
+    meta_table = Table(meta_data, colWidths=[1.5*inch, 5*inch])
+    meta_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ]))
+    elements.append(meta_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Statistics section
+    elements.append(Paragraph("Sensor Statistics", heading_style))
+
+    stats_data = [["Metric", "Min", "Max", "Average", "Std Dev"]]
+    for key in DATA_LABELS[1:]:  # Skip Elapsed
+        stats = statistics.get(key)
+        if stats:
+            stats_data.append([
+                key,
+                f"{stats['min']:.3f}",
+                f"{stats['max']:.3f}",
+                f"{stats['avg']:.3f}",
+                f"{stats['std']:.3f}"
+            ])
+
+    stats_table = Table(stats_data, colWidths=[2.5*inch, 1.3*inch, 1.3*inch, 1.3*inch, 1.3*inch])
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
+    ]))
+    elements.append(stats_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    report(0.4)
+
+    # BME280 Data Table (first 50 rows as sample)
+    elements.append(PageBreak())
+    elements.append(Paragraph("BME280 Environmental Data (Sample)", heading_style))
+
+    bme_headers = ["Elapsed [s]", "Temp [C]", "Humidity [%]", "Pressure [hPa]", "Altitude [m]"]
+    bme_data = [bme_headers]
+    num_rows = min(SAMPLE_ROWS, total)
+    for i in range(num_rows):
+        row = [
+            f"{export_data.get('Elapsed [s]', [])[i]:.2f}" if i < len(export_data.get('Elapsed [s]', [])) else "",
+            f"{export_data.get('Temp_BME280 [°C]', [])[i]:.2f}" if i < len(export_data.get('Temp_BME280 [°C]', [])) and export_data.get('Temp_BME280 [°C]', [])[i] is not None else "",
+            f"{export_data.get('Hum [%]', [])[i]:.1f}" if i < len(export_data.get('Hum [%]', [])) and export_data.get('Hum [%]', [])[i] is not None else "",
+            f"{export_data.get('Press [hPa]', [])[i]:.1f}" if i < len(export_data.get('Press [hPa]', [])) and export_data.get('Press [hPa]', [])[i] is not None else "",
+            f"{export_data.get('Alt [m]', [])[i]:.1f}" if i < len(export_data.get('Alt [m]', [])) and export_data.get('Alt [m]', [])[i] is not None else "",
+        ]
+        bme_data.append(row)
+
+    bme_table = Table(bme_data, colWidths=[1.2*inch, 1.2*inch, 1.2*inch, 1.4*inch, 1.2*inch])
+    bme_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
+    ]))
+    elements.append(bme_table)
+
+    if total > SAMPLE_ROWS:
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"<i>Showing first {SAMPLE_ROWS} of {total} data points. Use Excel or JSON export for complete data.</i>", normal_style))
+
+    # MPU6050 Data Table (first 50 rows as sample)
+    elements.append(PageBreak())
+    elements.append(Paragraph("MPU6050 Inertial Data (Sample)", heading_style))
+
+    mpu_headers = ["Time [s]", "Acc X", "Acc Y", "Acc Z", "Gyro X", "Gyro Y", "Gyro Z", "Temp [C]"]
+    mpu_data = [mpu_headers]
+    for i in range(num_rows):
+        row = [
+            f"{export_data.get('Elapsed [s]', [])[i]:.2f}" if i < len(export_data.get('Elapsed [s]', [])) else "",
+            f"{export_data.get('Acc x [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc x [m/s²]', [])) and export_data.get('Acc x [m/s²]', [])[i] is not None else "",
+            f"{export_data.get('Acc y [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc y [m/s²]', [])) and export_data.get('Acc y [m/s²]', [])[i] is not None else "",
+            f"{export_data.get('Acc z [m/s²]', [])[i]:.3f}" if i < len(export_data.get('Acc z [m/s²]', [])) and export_data.get('Acc z [m/s²]', [])[i] is not None else "",
+            f"{export_data.get('Gyro x [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro x [°/s]', [])) and export_data.get('Gyro x [°/s]', [])[i] is not None else "",
+            f"{export_data.get('Gyro y [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro y [°/s]', [])) and export_data.get('Gyro y [°/s]', [])[i] is not None else "",
+            f"{export_data.get('Gyro z [°/s]', [])[i]:.2f}" if i < len(export_data.get('Gyro z [°/s]', [])) and export_data.get('Gyro z [°/s]', [])[i] is not None else "",
+            f"{export_data.get('Temp_MPU [°C]', [])[i]:.1f}" if i < len(export_data.get('Temp_MPU [°C]', [])) and export_data.get('Temp_MPU [°C]', [])[i] is not None else "",
+        ]
+        mpu_data.append(row)
+
+    mpu_table = Table(mpu_data, colWidths=[0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch])
+    mpu_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066CC')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
+    ]))
+    elements.append(mpu_table)
+
+    if total > SAMPLE_ROWS:
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"<i>Showing first {SAMPLE_ROWS} of {total} data points. Use Excel or JSON export for complete data.</i>", normal_style))
+
+    # Build PDF
+    doc.build(elements)
+    report(1.0)
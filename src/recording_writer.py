@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+TRITON Recording Writer - Buffered, batched CSV writer on a background thread
+
+Replaces the open/append/close per row pattern used by app.py recordings and
+the Pi collector in test.py. One thread owns the file handle and drains a
+queue of rows; callers only enqueue, so ingest threads never wait on disk.
+
+- rows are written in batches, flushed when `flush_rows` are pending or
+  `flush_interval` seconds have passed since the last flush
+- fsync policy:
+    "batch"  fsync after every flushed batch (crash loses at most one batch)
+    "close"  fsync only on close()
+    "never"  leave it to the OS
+- close() drains everything still queued, flushes, fsyncs (unless "never")
+  and closes the file; it is safe to call more than once
+- an optional `mirror` (e.g. a mission_log.MissionLogWriter) receives every
+  batch on the same thread, so a binary copy is written alongside the CSV
+
+Usage (benchmark):
+    # Replaced path (open/append/close per row, + an fsync variant for reference) vs. RecordingWriter
+    python3 recording_writer.py [--rows 2000] [--dir /mnt/sdcard] [--latency-ms 5]
+"""
+
+import csv
+import os
+import threading
+import time
+from collections import deque
+
+FSYNC_POLICIES = ("batch", "close", "never")
+
+DEFAULT_FLUSH_ROWS = 200
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class RecordingWriter:
+    """Background CSV writer that owns one file handle."""
+
+    def __init__(self, path, header=None, flush_rows=DEFAULT_FLUSH_ROWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, fsync="batch", append=False,
+                 lineterminator="\r\n", mirror=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}' (use {', '.join(FSYNC_POLICIES)})")
+
+        self.path = path
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = float(flush_interval)
+        self.fsync = fsync
+        self.mirror = mirror
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.rows_written = 0
+        self.batches = 0
+        self.errors = 0
+
+        # Opened here so a bad path fails in the caller, not silently in the thread
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file, lineterminator=lineterminator)
+        if header:
+            self._writer.writerow(header)
+            self._file.flush()
+
+        self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+        self._thread.start()
+
+    # ==================== Producer Side ====================
+
+    def write(self, row):
+        """Queue one row (sequence of values). Never touches the disk."""
+        with self._cond:
+            if self._closed:
+                return False
+            self._pending.append(row)
+            if len(self._pending) >= self.flush_rows:
+                self._cond.notify()
+        return True
+
+    @property
+    def backlog(self):
+        """Rows queued but not yet written."""
+        return len(self._pending)
+
+    def close(self, timeout=10.0):
+        """Drain the queue, flush and fsync, then close the file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    # ==================== Writer Thread ====================
+
+    def _take(self):
+        with self._cond:
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def _write_batch(self, batch, sync):
+        try:
+            if batch:
+                self._writer.writerows(batch)
+                self.rows_written += len(batch)
+                self.batches += 1
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        except Exception as e:
+            self.errors += 1
+            print(f"[RECORDING] Error writing {self.path}: {e}")
+
+        if self.mirror is not None:
+            try:
+                if batch:
+                    self.mirror.append_rows(batch)
+                self.mirror.flush()
+                if sync:
+                    os.fsync(self.mirror.fileno())
+            except Exception as e:
+                self.errors += 1
+                print(f"[RECORDING] Error writing mirror of {self.path}: {e}")
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                while (not self._closed and len(self._pending) < self.flush_rows):
+                    remaining = self.flush_interval - (time.monotonic() - last_flush)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closing = self._closed
+
+            batch = self._take()
+            if batch:
+                self._write_batch(batch, self.fsync == "batch")
+            last_flush = time.monotonic()
+
+            if closing:
+                # Rows queued between _take() and close() are picked up here
+                self._write_batch(self._take(), self.fsync != "never")
+                for f in (self._file, self.mirror):
+                    try:
+                        if f is not None:
+                            f.close()
+                    except Exception as e:
+                        print(f"[RECORDING] Error closing {self.path}: {e}")
+                return
+
+
+# ==================== Benchmark ====================
+
+class _ThrottledFile:
+    """File wrapper that adds a fixed latency to every flush to the device (slow SD card)."""
+
+    def __init__(self, f, latency):
+        self._f = f
+        self._latency = latency
+
+    def flush(self):
+        time.sleep(self._latency)
+        return self._f.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def _legacy_append(path, row, latency, fsync=False):
+    """The replaced path: open, csv.writer, write one row, close; `fsync` adds an fsync per row (for reference)."""
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        throttled = _ThrottledFile(f, latency)
+        csv.writer(throttled).writerow(row)
+        throttled.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+
+def benchmark(rows=2000, directory=None, latency_ms=5.0, flush_rows=DEFAULT_FLUSH_ROWS):
+    import tempfile
+
+    latency = latency_ms / 1000.0
+    sample = ["2025-01-01 12:00:00", 12.345, 21.3, 45.1, 993.2, 120.4,
+              0.1, -0.2, 9.8, 1.2, -0.5, 0.3, 30.1]
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        print(f"[BENCH] {rows} rows, simulated device latency {latency_ms} ms per flush, dir={tmp}")
+
+        # The baseline (app.py recordings, test.py's log) never fsynced; the fsync variant is only a reference
+        for fsync, label in ((False, "open/append/close"), (True, "  same + fsync/row")):
+            path = os.path.join(tmp, f"legacy_{'fsync' if fsync else 'plain'}.csv")
+            t0 = time.perf_counter()
+            for _ in range(rows):
+                _legacy_append(path, sample, latency, fsync)
+            legacy = time.perf_counter() - t0
+            print(f"[BENCH] {label:<18} {rows / legacy:>12,.0f} rows/s  "
+                  f"(ingest blocked {legacy / rows * 1e3:.2f} ms/row)")
+
+        for policy in FSYNC_POLICIES:
+            path = os.path.join(tmp, f"writer_{policy}.csv")
+            writer = RecordingWriter(path, flush_rows=flush_rows, fsync=policy)
+            writer._file = _ThrottledFile(writer._file, latency)
+            writer._writer = csv.writer(writer._file)
+
+            t0 = time.perf_counter()
+            for _ in range(rows):
+                writer.write(sample)
+            enqueue = time.perf_counter() - t0
+            writer.close()
+            total = time.perf_counter() - t0
+            print(f"[BENCH] writer fsync={policy:<6} {rows / total:>12,.0f} rows/s  "
+                  f"(ingest blocked {enqueue / rows * 1e6:.2f} us/row, {writer.batches} batches)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="RecordingWriter benchmark")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="directory on the filesystem to test (default: temp dir)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated latency per flush")
+    parser.add_argument("--flush-rows", type=int, default=DEFAULT_FLUSH_ROWS)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.dir, args.latency_ms, args.flush_rows)
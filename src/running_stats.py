@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+TRITON Running Stats - Session statistics maintained at ingest time
+
+/stats and the exports used to recompute every aggregate from the whole
+history (spill file included) on each request. RunningStats is fed one row
+at a time by app.ingest_row(), like the LodTiers of downsample.py, and keeps
+what is needed to answer without touching the rows again:
+
+- rows are collected in blocks of `block_rows`; when a block is full its
+  moments are computed in one vectorized pass: count, mean, M2 (variance),
+  min, max and the co-moment with the time column (regression slope)
+- block moments merge exactly (Chan et al.), so the session is "closed
+  blocks + open block" and a time range is the blocks inside it plus the
+  rows of the (at most two) blocks cut by its ends, read through a
+  `rows(lo, hi)` callback (HistoryStore.rows)
+- percentiles come from a merging t-digest per column (Dunning), updated
+  once per block from the block's values; it holds about COMPRESSION / 2
+  centroids per column and is exact until that many values were seen.
+  Time ranges have no digest and come without percentiles
+
+Appending is a copy into the block buffer, reading the session statistics is
+O(columns x centroids). Rows without a time value are skipped, the same rows
+time_index.find_range() never returns.
+
+Usage (benchmark):
+    # Ingest cost per row, then reads vs. stats_engine over the full matrix
+    python3 running_stats.py [--rows 1000000] [--block-rows 256]
+"""
+
+import threading
+
+import numpy as np
+
+from stats_engine import MAX_WINDOWS, PERCENTILES
+
+BLOCK_ROWS = 256
+COMPRESSION = 200
+
+# Moments kept per column; "p*" are the pairs (time, value) behind the slope
+FIELDS = ("n", "mean", "m2", "min", "max", "pn", "pt", "pv", "pm2t", "pc")
+_F = {name: i for i, name in enumerate(FIELDS)}
+
+
+# ==================== Moments ====================
+
+def empty_moments(columns):
+    """(FIELDS x columns) moments of no rows."""
+    moments = np.zeros((len(FIELDS), columns))
+    moments[_F["min"]] = np.inf
+    moments[_F["max"]] = -np.inf
+    return moments
+
+
+def moments_of(matrix, t_index):
+    """Exact moments of a (labels x rows) matrix, vectorized."""
+    moments = empty_moments(matrix.shape[0])
+    if not matrix.shape[1]:
+        return moments
+    valid = np.isfinite(matrix)
+    n = valid.sum(axis=1)
+    safe = np.maximum(n, 1)
+    mean = np.where(valid, matrix, 0.0).sum(axis=1) / safe
+    dev = np.where(valid, matrix - mean[:, None], 0.0)
+    moments[_F["n"]] = n
+    moments[_F["mean"]] = mean
+    moments[_F["m2"]] = (dev * dev).sum(axis=1)
+    moments[_F["min"]] = np.where(valid, matrix, np.inf).min(axis=1)
+    moments[_F["max"]] = np.where(valid, matrix, -np.inf).max(axis=1)
+
+    pair = valid & np.isfinite(matrix[t_index])
+    pn = pair.sum(axis=1)
+    safe = np.maximum(pn, 1)
+    t = np.where(pair, matrix[t_index], 0.0)
+    pt = t.sum(axis=1) / safe
+    pv = np.where(pair, matrix, 0.0).sum(axis=1) / safe
+    dt = np.where(pair, t - pt[:, None], 0.0)
+    moments[_F["pn"]] = pn
+    moments[_F["pt"]] = pt
+    moments[_F["pv"]] = pv
+    moments[_F["pm2t"]] = (dt * dt).sum(axis=1)
+    moments[_F["pc"]] = (dt * np.where(pair, matrix - pv[:, None], 0.0)).sum(axis=1)
+    return moments
+
+
+def merge_moments(parts):
+    """Moments of the union of disjoint row sets, from a (sets x FIELDS x columns) array."""
+    parts = np.asarray(parts)
+    moments = empty_moments(parts.shape[2])
+    if not len(parts):
+        return moments
+
+    for count, means, squares, cross in (("n", ("mean",), "m2", None),
+                                         ("pn", ("pt", "pv"), "pm2t", "pc")):
+        n = parts[:, _F[count]]
+        total = n.sum(axis=0)
+        deltas = []
+        for name in means:
+            mean = (n * parts[:, _F[name]]).sum(axis=0) / np.maximum(total, 1)
+            moments[_F[name]] = mean
+            deltas.append(parts[:, _F[name]] - mean)
+        # M2 of the union = the parts' M2 + the spread of the parts' means
+        moments[_F[squares]] = (parts[:, _F[squares]] + n * deltas[0] * deltas[0]).sum(axis=0)
+        if cross:
+            moments[_F[cross]] = (parts[:, _F[cross]] + n * deltas[0] * deltas[1]).sum(axis=0)
+        moments[_F[count]] = total
+    moments[_F["min"]] = parts[:, _F["min"]].min(axis=0)
+    moments[_F["max"]] = parts[:, _F["max"]].max(axis=0)
+    return moments
+
+
+def finish(labels, moments):
+    """label -> {"count", "min", "max", "mean", "std", "slope"} for labels with values."""
+    result = {}
+    for i, label in enumerate(labels):
+        n = int(moments[_F["n"], i])
+        if not n:
+            continue
+        m2t = moments[_F["pm2t"], i]
+        result[label] = {
+            "count": n,
+            "min": float(moments[_F["min"], i]),
+            "max": float(moments[_F["max"], i]),
+            "mean": float(moments[_F["mean"], i]),
+            "std": float(np.sqrt(max(moments[_F["m2"], i], 0.0) / n)),
+            "slope": float(moments[_F["pc"], i] / m2t) if moments[_F["pn"], i] >= 2 and m2t > 0 else 0.0
+        }
+    return result
+
+
+def as_column_statistics(statistics, std=False):
+    """finish()/describe() entries in the stats_engine.column_statistics() layout."""
+    keys = ("min", "max", "avg", "count", "std") if std else ("min", "max", "avg", "count")
+    return {label: {key: entry["mean" if key == "avg" else key] for key in keys}
+            for label, entry in statistics.items()}
+
+
+# ==================== Quantile Digest ====================
+
+def digest_merge(means, weights, values=(), compression=COMPRESSION):
+    """
+    Add raw `values` to a t-digest (centroid `means` and `weights`) and
+    compress it again.
+
+    Neighbouring centroids are combined while they stay within one unit of
+    the k1 scale function, so the tails keep small (exact) centroids.
+    Returns the new (means, weights), sorted by mean.
+    """
+    means = np.concatenate([means, values])
+    weights = np.concatenate([weights, np.ones(len(values))])
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    if len(means) <= compression // 2:
+        return means, weights
+
+    q = (np.cumsum(weights) - weights / 2) / weights.sum()
+    k = compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+    groups = np.floor(k - k[0]).astype(np.int64)
+    starts = np.flatnonzero(np.diff(groups, prepend=-1))
+    merged = np.add.reduceat(weights, starts)
+    return np.add.reduceat(means * weights, starts) / merged, merged
+
+
+def digest_quantile(means, weights, fraction):
+    """
+    Value at `fraction` (0..1) of a t-digest. Interpolates between centroid
+    centers at rank fraction * (count - 1), the convention of stats_engine,
+    so a digest of single values gives the exact percentile.
+    """
+    if not len(means):
+        return float("nan")
+    centers = np.cumsum(weights) - weights / 2
+    return float(np.interp(fraction * (weights.sum() - 1) + 0.5, centers, means))
+
+
+# ==================== Accumulator ====================
+
+class RunningStats:
+    """Per-column block moments and percentile digests of a row stream."""
+
+    def __init__(self, labels, time_label="Elapsed [s]", block_rows=BLOCK_ROWS,
+                 percentiles=PERCENTILES, compression=COMPRESSION):
+        self.labels = list(labels)
+        self.t_index = self.labels.index(time_label)
+        self.block_rows = max(1, int(block_rows))
+        self.percentiles = dict(percentiles)
+        self.compression = compression
+        self.lock = threading.Lock()
+        with self.lock:
+            self._reset()
+
+    def clear(self):
+        with self.lock:
+            self._reset()
+
+    def _reset(self):
+        cols = len(self.labels)
+        self._closed = empty_moments(cols)      # All closed blocks merged
+        self._blocks = np.zeros((64, len(FIELDS), cols))
+        self._spans = np.zeros((64, 4))         # First row, end row, min time, max time
+        self._nblocks = 0
+        self._digests = [(np.empty(0), np.empty(0)) for _ in range(cols)]
+
+        self._buffer = np.full((cols, self.block_rows), np.nan)   # Open block
+        self._fill = 0
+        self._first = 0                         # Row position of the open block's first row
+        self._end = 0                           # ... and one past its last row
+        self._rows = 0                          # Rows seen since clear(), with or without time
+
+    def add(self, row):
+        """Add one row (float array in label order, NaN for missing)."""
+        with self.lock:
+            position = self._rows
+            self._rows += 1
+            if not np.isfinite(row[self.t_index]):
+                return
+            if not self._fill:
+                self._first = position
+            self._buffer[:, self._fill] = row
+            self._fill += 1
+            self._end = position + 1
+            if self._fill == self.block_rows:
+                self._close()
+
+    def _close(self):
+        """Summarize the full block buffer and start a new block."""
+        if self._nblocks == len(self._blocks):
+            self._blocks = np.concatenate([self._blocks, np.zeros_like(self._blocks)])
+            self._spans = np.concatenate([self._spans, np.zeros_like(self._spans)])
+
+        block = self._buffer[:, :self._fill]
+        moments = moments_of(block, self.t_index)
+        t = block[self.t_index]
+        self._blocks[self._nblocks] = moments
+        self._spans[self._nblocks] = (self._first, self._end, t.min(), t.max())
+        self._nblocks += 1
+        self._closed = merge_moments([self._closed, moments])
+
+        for i, values in enumerate(block):
+            values = values[np.isfinite(values)]
+            if len(values):
+                self._digests[i] = digest_merge(*self._digests[i], values, self.compression)
+        self._fill = 0
+
+    def _snapshot(self):
+        """(blocks, spans) of the closed blocks plus the open one, copied."""
+        blocks, spans = self._blocks[:self._nblocks], self._spans[:self._nblocks]
+        if self._fill:
+            t = self._buffer[self.t_index, :self._fill]
+            blocks = np.concatenate([blocks, moments_of(self._buffer[:, :self._fill], self.t_index)[None]])
+            spans = np.concatenate([spans, [(self._first, self._end, t.min(), t.max())]])
+        return blocks.copy(), spans.copy()
+
+    @property
+    def rows(self):
+        """Rows added since the last clear()."""
+        return self._rows
+
+    # ==================== Reading ====================
+
+    def summary(self):
+        """
+        Session statistics: finish() entries plus the percentiles (named as
+        in stats_engine.PERCENTILES) from the digests.
+        """
+        with self.lock:
+            open_block = self._buffer[:, :self._fill].copy()
+            moments = merge_moments([self._closed, moments_of(open_block, self.t_index)])
+            digests = list(self._digests)
+
+        statistics = finish(self.labels, moments)
+        for i, label in enumerate(self.labels):
+            if label not in statistics:
+                continue
+            values = open_block[i][np.isfinite(open_block[i])]
+            means, weights = digest_merge(*digests[i], values, self.compression)
+            for name, q in self.percentiles.items():
+                statistics[label][name] = digest_quantile(means, weights, q / 100.0)
+        return statistics
+
+    def range_moments(self, start=None, end=None, rows=None):
+        """
+        Moments of the rows with `start <= time <= end`.
+
+        Blocks inside the range are merged; blocks cut by it are read with
+        `rows(lo, hi)`, which returns the (labels x rows) matrix of row
+        positions lo..hi-1 (HistoryStore.rows). Without `rows` those blocks
+        are left out.
+        """
+        with self.lock:
+            blocks, spans = self._snapshot()
+        return self._range_moments(blocks, spans, start, end, rows)
+
+    def _range_moments(self, blocks, spans, start, end, rows, open_end=False):
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        below = spans[:, 3] < hi if open_end else spans[:, 3] <= hi
+        inside = (spans[:, 2] >= lo) & below
+        cut = ~inside & (spans[:, 3] >= lo) & (spans[:, 2] <= hi)
+
+        parts = [blocks[inside]]
+        if rows is not None:
+            for first, stop, _, _ in spans[cut]:
+                matrix = rows(int(first), int(stop))
+                t = matrix[self.t_index]
+                with np.errstate(invalid='ignore'):
+                    keep = (t >= lo) & ((t < hi) if open_end else (t <= hi))
+                parts.append(moments_of(matrix[:, keep], self.t_index)[None])
+        return merge_moments(np.concatenate(parts))
+
+    def range(self, start=None, end=None, rows=None):
+        """finish() entries of a time range (see range_moments)."""
+        return finish(self.labels, self.range_moments(start, end, rows))
+
+    def windows(self, window, rows=None, start=None, end=None, origin=None):
+        """
+        range() of every `window`-second time window with data, in the layout
+        of stats_engine.window_statistics() (without percentiles). Raises
+        ValueError for a non-positive window or more than MAX_WINDOWS windows.
+        """
+        if not window > 0:
+            raise ValueError("window must be a positive number of seconds")
+        with self.lock:
+            blocks, spans = self._snapshot()
+        if not len(spans):
+            return []
+        first = spans[:, 2].min() if start is None else start
+        last = spans[:, 3].max() if end is None else end
+        if origin is None:
+            origin = float(np.floor(first / window) * window)
+
+        ids = np.arange(np.floor((first - origin) / window), np.floor((last - origin) / window) + 1)
+        if len(ids) > MAX_WINDOWS:
+            raise ValueError(f"{len(ids)} windows requested, at most {MAX_WINDOWS} allowed")
+
+        result = []
+        for k in ids:
+            w_start, w_end = origin + k * window, origin + (k + 1) * window
+            # Half-open like stats_engine.window_statistics(); the last window
+            # stops at `end` (inclusive) when that comes first
+            closed = end is not None and end < w_end
+            moments = self._range_moments(blocks, spans, max(w_start, first),
+                                          end if closed else w_end, rows, open_end=not closed)
+            count = int(moments[_F["n"], self.t_index])
+            if count:
+                result.append({"start": float(w_start), "end": float(w_end), "rows": count,
+                               "statistics": finish(self.labels, moments)})
+        return result
+
+
+# ==================== Benchmark ====================
+
+def benchmark(rows=1_000_000, block_rows=BLOCK_ROWS):
+    import time
+
+    from excel_export import DATA_LABELS
+    from stats_engine import describe, window_statistics
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(len(DATA_LABELS), rows)) * 10 + 20
+    matrix[0] = np.arange(rows) / 20.0
+    matrix[1] += np.linspace(0, 5, rows)
+    matrix[2, ::97] = np.nan
+
+    stats = RunningStats(DATA_LABELS, block_rows=block_rows)
+    rows_t = matrix.T.copy()
+    t0 = time.perf_counter()
+    for row in rows_t:
+        stats.add(row)
+    ingest = (time.perf_counter() - t0) / rows
+    print(f"[BENCH] {rows:,} rows x {len(DATA_LABELS)} columns, blocks of {block_rows}")
+    print(f"[BENCH] ingest {ingest * 1e6:.1f} us/row (block summaries included)")
+
+    def read_rows(lo, hi):
+        return matrix[:, lo:hi]
+
+    span = rows / 20.0
+    keys = ("count", "min", "max", "mean", "std", "slope")
+    for name, start, end in (("session", None, None), ("range 40-45 %", span * 0.4, span * 0.45)):
+        t0 = time.perf_counter()
+        selected = matrix if start is None else matrix[:, (matrix[0] >= start) & (matrix[0] <= end)]
+        exact = describe(DATA_LABELS, selected)
+        full = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        running = stats.summary() if start is None else stats.range(start, end, read_rows)
+        fast = time.perf_counter() - t0
+
+        worst = max(abs(running[label][key] - exact[label][key]) / max(1.0, abs(exact[label][key]))
+                    for label in exact for key in keys)
+        line = (f"[BENCH] {name:<14} describe {full * 1e3:9.2f} ms   running {fast * 1e3:7.3f} ms   "
+                f"max rel. difference {worst:.1e}")
+        if start is None:
+            error = max(abs(running[label][q] - exact[label][q]) / exact[label]["std"]
+                        for label in DATA_LABELS[1:] for q in PERCENTILES)
+            line += f", percentiles within {error:.4f} std"
+        print(line)
+
+    t0 = time.perf_counter()
+    exact = window_statistics(DATA_LABELS, matrix, span / 100)
+    full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    running = stats.windows(span / 100, read_rows)
+    fast = time.perf_counter() - t0
+    worst = max(abs(r["statistics"][label][key] - e["statistics"][label][key]) /
+                max(1.0, abs(e["statistics"][label][key]))
+                for r, e in zip(running, exact) for label in e["statistics"] for key in keys)
+    print(f"[BENCH] {len(running)} windows    describe {full * 1e3:9.2f} ms   running {fast * 1e3:7.3f} ms   "
+          f"max rel. difference {worst:.1e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Running statistics benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.block_rows)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+TRITON Serial Link - Event-driven I/O engine that owns the LoRa serial port
+
+app.py used to have two threads (motor transmit, LoRa receiver) that both
+opened the port, polled `in_waiting`, slept 20-500 ms and read under a shared
+lock; a received line waited on average half a sleep interval, longer while
+the other thread held the lock. Here one object owns the port:
+
+- a reader thread blocks in read() until bytes arrive (the port's read
+  timeout only bounds how long a stop() takes), feeds a FrameSplitter and
+  hands every text line and binary frame to `on_message(kind, message)`
+  right away
+- a writer thread drains a priority queue: lower priority numbers go out
+  first, FIFO within a priority; send(..., key=...) supersedes a message with
+  the same key that is still queued (a newer throttle command replaces the
+  older one instead of queueing behind it)
+- a port error closes the port; the reader reopens it through `open_port`
+  after `reconnect_delay` seconds. Messages sent while no port is open are
+  dropped (and counted) - callers repeat what has to arrive
+- with `metrics` (link_metrics.LinkMetrics), every message received and
+  written is counted there as well, with its size on the wire
+
+Usage (benchmark):
+    # Receive latency against a pty pair: blocking reader vs. the old polling loop
+    python3 serial_link.py [--messages 100] [--poll-ms 50]
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from lora_frame import FrameSplitter
+
+PRIORITY_URGENT = 0     # Stop / emergency stop
+PRIORITY_COMMAND = 1    # Throttle commands
+PRIORITY_CONFIG = 2     # Threshold pushes and other configuration
+
+DEFAULT_RECONNECT_DELAY = 2.0
+READ_SIZE = 4096
+
+
+class SerialLink:
+    """Reader and writer thread around one serial port (see module docstring)."""
+
+    def __init__(self, open_port, on_message, name="LORA", reconnect_delay=DEFAULT_RECONNECT_DELAY, metrics=None):
+        self.open_port = open_port          # () -> serial.Serial-like, with a read timeout
+        self.on_message = on_message        # (kind, message) -> None, called on the reader thread
+        self.name = name
+        self.reconnect_delay = float(reconnect_delay)
+        self.metrics = metrics
+
+        self._port = None
+        self._port_lock = threading.Lock()  # Guards opening/closing, not reads or writes
+        self._splitter = FrameSplitter()
+        self._queue = []                    # Heap of (priority, order, key, data)
+        self._queued_keys = {}              # key -> order of its newest queued message
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._reader = None
+        self._writer = None
+
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.lines = 0
+        self.frames = 0
+        self.sent = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.errors = 0
+        self.reconnects = 0
+
+    # ==================== Lifecycle ====================
+
+    @property
+    def running(self):
+        return self._reader is not None and self._reader.is_alive()
+
+    @property
+    def connected(self):
+        port = self._port
+        return port is not None and port.is_open
+
+    def start(self):
+        """Start the reader and writer threads (no-op if running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._reader = threading.Thread(target=self._read_loop, name=f"{self.name.lower()}-reader", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name=f"{self.name.lower()}-writer", daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    def stop(self, timeout=2.0):
+        """Stop both threads and close the port; queued messages are discarded."""
+        self._stop.set()
+        with self._cond:
+            self._queue.clear()
+            self._queued_keys.clear()
+            self._cond.notify_all()
+        self._close_port()
+        for thread in (self._reader, self._writer):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+        return {"connected": self.connected, "running": self.running, "queued": queued,
+                "rx_bytes": self.rx_bytes, "tx_bytes": self.tx_bytes, "lines": self.lines,
+                "frames": self.frames, "sent": self.sent, "superseded": self.superseded,
+                "dropped": self.dropped, "errors": self.errors, "reconnects": self.reconnects}
+
+    # ==================== Transmit ====================
+
+    def send(self, data, priority=PRIORITY_COMMAND, key=None):
+        """
+        Queue bytes (or str, encoded as UTF-8) for the writer thread.
+
+        Returns False if the link is stopped. A still-queued message with the
+        same `key` is dropped in favour of this one.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        with self._cond:
+            if self._stop.is_set():
+                return False
+            order = next(self._order)
+            if key is not None:
+                if key in self._queued_keys:
+                    self.superseded += 1
+                self._queued_keys[key] = order
+            heapq.heappush(self._queue, (priority, order, key, data))
+            self._cond.notify()
+        return True
+
+    def _next_message(self):
+        """Block until a current (not superseded) message is queued; None on stop."""
+        with self._cond:
+            while not self._stop.is_set():
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+                _, order, key, data = heapq.heappop(self._queue)
+                if key is not None:
+                    if self._queued_keys.get(key) != order:
+                        continue
+                    del self._queued_keys[key]
+                return data
+        return None
+
+    def _write_loop(self):
+        while True:
+            data = self._next_message()
+            if data is None:
+                return
+            port = self._port
+            if port is None or not port.is_open:
+                self.dropped += 1
+                continue
+            try:
+                port.write(data)
+                port.flush()
+                self.tx_bytes += len(data)
+                self.sent += 1
+                if self.metrics is not None:
+                    self.metrics.sent(len(data))
+            except Exception as e:
+                self.errors += 1
+                print(f"[{self.name}-TX] Write failed: {e}", flush=True)
+                self._close_port(port)
+
+    # ==================== Receive ====================
+
+    def _ensure_port(self):
+        with self._port_lock:
+            if self._port is not None and self._port.is_open:
+                return self._port
+            try:
+                self._port = self.open_port()
+                self._splitter = FrameSplitter()
+                self.reconnects += 1
+                print(f"[{self.name}] Port open", flush=True)
+            except Exception as e:
+                print(f"[{self.name}] Could not open port: {e}", flush=True)
+                self._port = None
+            return self._port
+
+    def _close_port(self, port=None):
+        with self._port_lock:
+            if self._port is None or (port is not None and port is not self._port):
+                return
+            try:
+                self._port.close()
+            except Exception:
+                pass
+            self._port = None
+
+    def _read_loop(self):
+        print(f"[{self.name}-RX] Reader thread started", flush=True)
+        while not self._stop.is_set():
+            port = self._ensure_port()
+            if port is None:
+                self._stop.wait(self.reconnect_delay)
+                continue
+            try:
+                # Blocks until at least one byte arrives (or the read timeout passes)
+                data = port.read(max(1, min(port.in_waiting, READ_SIZE)))
+            except Exception as e:
+                if not self._stop.is_set():
+                    self.errors += 1
+                    print(f"[{self.name}-RX] Read failed: {e}", flush=True)
+                    self._close_port(port)
+                    self._stop.wait(self.reconnect_delay)
+                continue
+            if data:
+                self.rx_bytes += len(data)
+                self._dispatch(self._splitter.feed(data))
+        print(f"[{self.name}-RX] Reader thread stopped", flush=True)
+
+    def _dispatch(self, messages):
+        for kind, message in messages:
+            if kind == "frame":
+                self.frames += 1
+                size = len(message) + 2                     # Plus both delimiters
+            else:
+                self.lines += 1
+                size = len(message.encode()) + 1            # Plus the newline
+            if self.metrics is not None:
+                self.metrics.received(kind, size)
+            try:
+                self.on_message(kind, message)
+            except Exception as e:
+                self.errors += 1
+                print(f"[{self.name}-RX] Handler error: {e}", flush=True)
+
+
+# ==================== Benchmark ====================
+
+def _pty_pair():
+    """(master fd, slave device path) of a raw pseudo-terminal pair."""
+    import os
+    import pty
+    import tty
+
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, os.ttyname(slave), slave
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _measure(receive, master, messages, gap):
+    """Latencies (s) from writing a line on the master side to its arrival."""
+    import os
+
+    arrived = {}
+    done = threading.Event()
+
+    def got(line):
+        arrived[int(line.split(",")[0])] = time.perf_counter()
+        if len(arrived) == messages:
+            done.set()
+
+    stop = receive(got)
+    sent = {}
+    for i in range(messages):
+        sent[i] = time.perf_counter()
+        os.write(master, f"{i},21.3,55.0\n".encode())
+        time.sleep(gap)
+    done.wait(5)
+    stop()
+    return [arrived[i] - sent[i] for i in sent if i in arrived]
+
+
+def benchmark(messages=100, poll_ms=50):
+    import os
+    import random
+
+    import serial
+
+    master, path, slave = _pty_pair()
+    rng = random.Random(0)
+    gap = 0.047  # A 45-byte frame at 9600 baud, back to back
+
+    def polling(got):
+        """The old receive loop: in_waiting / readline() / sleep."""
+        port = serial.Serial(path, 9600, timeout=0.1)
+        running = [True]
+
+        def loop():
+            while running[0]:
+                if port.in_waiting:
+                    line = port.readline().decode(errors='ignore').strip()
+                    if line:
+                        got(line)
+                time.sleep(poll_ms / 1000 * (0.5 + rng.random()))  # 20-50 ms sleeps and lock waits
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return lambda: (running.__setitem__(0, False), thread.join(), port.close())
+
+    def link(got):
+        engine = SerialLink(lambda: serial.Serial(path, 9600, timeout=0.1),
+                            lambda kind, message: got(message), name="BENCH")
+        engine.start()
+        while not engine.connected:
+            time.sleep(0.01)
+        return engine.stop
+
+    print(f"[BENCH] {messages} lines through a pty pair, one every {gap * 1e3:.0f} ms")
+    for name, receive in (("polling", polling), ("SerialLink", link)):
+        latencies = _measure(receive, master, messages, gap)
+        print(f"[BENCH] {name:<11} received {len(latencies):>4}/{messages}  "
+              f"mean {sum(latencies) / max(len(latencies), 1) * 1e3:6.2f} ms  "
+              f"p95 {_percentile(latencies, 0.95) * 1e3:6.2f} ms  max {max(latencies) * 1e3:6.2f} ms")
+
+    # Priorities: a backlog of config messages, then an urgent stop and superseding throttles
+    engine = SerialLink(lambda: serial.Serial(path, 9600, timeout=0.1), lambda kind, message: None, name="BENCH")
+    engine.start()
+    while not engine.connected:
+        time.sleep(0.01)
+    with engine._cond:  # Holds the writer back until the whole backlog is queued
+        for i in range(5):
+            engine.send(f"CMD:CONFIG:{i}\n", PRIORITY_CONFIG)
+        for throttle in (10, 20, 30):
+            engine.send(f"CMD:THROTTLE:{throttle}\n", PRIORITY_COMMAND, key="throttle")
+        engine.send("CMD:ESTOP:0\n", PRIORITY_URGENT)
+    time.sleep(0.3)
+    order = os.read(master, 4096).decode().split()
+    engine.stop()
+    print(f"[BENCH] TX order: {' '.join(order)} ({engine.superseded} superseded)")
+
+    os.close(master)
+    os.close(slave)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serial link receive latency benchmark")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--poll-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    benchmark(args.messages, args.poll_ms)
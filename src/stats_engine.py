@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+TRITON Stats Engine - Vectorized statistics of the session history
+
+One implementation of the sensor statistics for the exports and the dashboard
+(/stats). They used to be computed three ways: Python min/max/sum over lists
+(JSON export), a generator expression for the variance (PDF report) and, every
+second, a sort of every column in the browser for the percentiles. Here they
+are NumPy passes over the (labels x rows) history matrix:
+
+- column_statistics()  min, max, avg, count; blocks of columns, small temporaries
+- describe()           plus std, percentiles, rate of change and regression
+                       slope, with one sort of a single copy of the matrix
+- window_statistics()  describe() per fixed-length time window
+
+Only finite values count; NaN (missing readings) are skipped per column. The
+formulas are those of dashboard.html computeExtendedStats():
+
+- std is the population standard deviation
+- percentiles interpolate linearly at index p * (n - 1) of the sorted values
+- rate is the least-squares slope over the last RATE_POINTS rows,
+  slope the same over all rows; both are 0 with fewer than two points or
+  a constant time column
+
+Usage (benchmark):
+    # Python port of the dashboard JS vs. NumPy (the values: tests/test_stats_engine.py)
+    python3 stats_engine.py [--rows 300 100000] [--repeat 5]
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+PERCENTILES = {"p25": 25, "median": 50, "p75": 75, "p95": 95}
+RATE_POINTS = 5
+STATS_BLOCK = 65536
+MAX_WINDOWS = 1000
+
+
+# ==================== Basic Statistics ====================
+
+def column_statistics(labels, matrix, block=STATS_BLOCK, std=False):
+    """
+    Min, max, avg and count of the finite values of every row of `matrix`.
+
+    Returns label -> {"min", "max", "avg", "count"} for labels with at least
+    one finite value; with `std` also the population standard deviation
+    (a second pass over the blocks).
+    """
+    n = matrix.shape[0]
+    mins = np.full(n, np.inf)
+    maxs = np.full(n, -np.inf)
+    sums = np.zeros(n)
+    counts = np.zeros(n, dtype=np.int64)
+
+    for start in range(0, matrix.shape[1], block):
+        part = matrix[:, start:start + block]
+        valid = np.isfinite(part)
+        counts += valid.sum(axis=1)
+        sums += np.where(valid, part, 0.0).sum(axis=1)
+        mins = np.minimum(mins, np.where(valid, part, np.inf).min(axis=1))
+        maxs = np.maximum(maxs, np.where(valid, part, -np.inf).max(axis=1))
+
+    means = sums / np.maximum(counts, 1)
+    if std:
+        squares = np.zeros(n)
+        for start in range(0, matrix.shape[1], block):
+            part = matrix[:, start:start + block]
+            deviations = np.where(np.isfinite(part), part - means[:, None], 0.0)
+            squares += (deviations * deviations).sum(axis=1)
+        stds = np.sqrt(squares / np.maximum(counts, 1))
+
+    statistics = {}
+    for i, label in enumerate(labels):
+        if counts[i]:
+            statistics[label] = {"min": float(mins[i]), "max": float(maxs[i]),
+                                 "avg": float(means[i]), "count": int(counts[i])}
+            if std:
+                statistics[label]["std"] = float(stds[i])
+    return statistics
+
+
+# ==================== Extended Statistics ====================
+
+def regression_slopes(times, values):
+    """
+    Least-squares slope of every row of `values` against `times`.
+
+    Pairs with a non-finite time or value are left out; rows with fewer than
+    two pairs or no spread in time get 0.
+    """
+    times = np.broadcast_to(np.asarray(times, dtype=np.float64), values.shape)
+    pair = np.isfinite(times) & np.isfinite(values)
+    n = pair.sum(axis=1)
+    safe = np.maximum(n, 1)
+
+    t = np.where(pair, times, 0.0)
+    v = np.where(pair, values, 0.0)
+    # Centered sums: same result as the JS n*Σxy - Σx*Σy form, without its cancellation
+    dt = np.where(pair, t - (t.sum(axis=1) / safe)[:, None], 0.0)
+    dv = np.where(pair, v - (v.sum(axis=1) / safe)[:, None], 0.0)
+    cov = (dt * dv).sum(axis=1)
+    var = (dt * dt).sum(axis=1)
+
+    slopes = np.zeros(len(values))
+    ok = (n >= 2) & (var > 0)
+    slopes[ok] = cov[ok] / var[ok]
+    return slopes
+
+
+def _percentiles(ordered, counts, q):
+    """Linear-interpolated percentile `q` of each row of sorted values (NaN last)."""
+    index = q / 100.0 * np.maximum(counts - 1, 0)
+    lower = np.floor(index).astype(np.int64)
+    upper = np.ceil(index).astype(np.int64)
+    weight = index - lower
+    rows = np.arange(len(ordered))
+    low, high = ordered[rows, lower], ordered[rows, upper]
+    return np.where(lower == upper, low, low * (1 - weight) + high * weight)
+
+
+def describe(labels, matrix, time_label="Elapsed [s]", percentiles=PERCENTILES,
+             rate_points=RATE_POINTS):
+    """
+    Full statistics of every row of a (labels x rows) matrix.
+
+    Returns label -> {"count", "min", "max", "mean", "std", <percentile
+    names>, "rate", "slope"} for labels with at least one finite value.
+    "rate" and "slope" are per second of `time_label` (0 if it is missing).
+    """
+    labels = list(labels)
+    if not matrix.shape[1]:
+        return {}
+    values = np.array(matrix, dtype=np.float64)
+    valid = np.isfinite(values)
+    values[~valid] = np.nan
+    counts = valid.sum(axis=1)
+    safe = np.maximum(counts, 1)
+
+    means = np.where(valid, values, 0.0).sum(axis=1) / safe
+    deviations = np.where(valid, values - means[:, None], 0.0)
+    stds = np.sqrt((deviations * deviations).sum(axis=1) / safe)
+    del deviations
+
+    if time_label in labels:
+        times = values[labels.index(time_label)]
+        slopes = regression_slopes(times, values)
+        tail = max(1, int(rate_points))
+        rates = regression_slopes(times[-tail:], values[:, -tail:])
+    else:
+        slopes = rates = np.zeros(len(labels))
+
+    values.sort(axis=1)  # In place, NaN last: the first `counts` entries are sorted
+    mins = values[:, 0]
+    maxs = values[np.arange(len(labels)), np.maximum(counts - 1, 0)]
+    quantiles = {name: _percentiles(values, counts, q) for name, q in percentiles.items()}
+
+    result = {}
+    for i, label in enumerate(labels):
+        if not counts[i]:
+            continue
+        entry = {"count": int(counts[i]), "min": float(mins[i]), "max": float(maxs[i]),
+                 "mean": float(means[i]), "std": float(stds[i])}
+        for name in percentiles:
+            entry[name] = float(quantiles[name][i])
+        entry["rate"] = float(rates[i])
+        entry["slope"] = float(slopes[i])
+        result[label] = entry
+    return result
+
+
+def window_statistics(labels, matrix, window, time_label="Elapsed [s]", origin=None,
+                      percentiles=PERCENTILES, rate_points=RATE_POINTS):
+    """
+    describe() of every `window`-second time window with data.
+
+    Windows are [origin + k * window, origin + (k + 1) * window); `origin`
+    defaults to the multiple of `window` at or below the smallest time. Rows of a restarted clock land in the
+    window of their time value. Returns a list of {"start", "end", "rows",
+    "statistics"} ordered by start. Raises ValueError for a non-positive
+    window, a missing time label or more than MAX_WINDOWS windows.
+    """
+    labels = list(labels)
+    if not window > 0:
+        raise ValueError("window must be a positive number of seconds")
+    if time_label not in labels:
+        raise ValueError(f"No '{time_label}' column")
+
+    times = np.asarray(matrix[labels.index(time_label)], dtype=np.float64)
+    timed = np.flatnonzero(np.isfinite(times))
+    if not len(timed):
+        return []
+    if origin is None:
+        origin = float(math.floor(times[timed].min() / window) * window)
+
+    buckets = np.floor((times[timed] - origin) / window).astype(np.int64)
+    order = np.argsort(buckets, kind="stable")  # Keeps row order inside a window
+    ids, starts = np.unique(buckets[order], return_index=True)
+    if len(ids) > MAX_WINDOWS:
+        raise ValueError(f"{len(ids)} windows requested, at most {MAX_WINDOWS} allowed")
+
+    windows = []
+    for k, rows in zip(ids, np.split(timed[order], starts[1:])):
+        windows.append({
+            "start": origin + int(k) * window,
+            "end": origin + (int(k) + 1) * window,
+            "rows": int(len(rows)),
+            "statistics": describe(labels, matrix[:, rows], time_label, percentiles, rate_points)
+        })
+    return windows
+
+
+# ==================== Benchmark ====================
+
+def _bench_matrix(rows, seed=0):
+    from excel_export import DATA_LABELS
+
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(len(DATA_LABELS), rows)) * 10 + 20
+    matrix[0] = np.arange(rows) / 20.0 + 1000.0  # Long sessions: large, closely spaced times
+    matrix[1] += np.linspace(0, 5, rows)          # A trend, so rates are not ~0
+    return DATA_LABELS, matrix
+
+
+def benchmark(sizes=(300, 100_000), repeat=5):
+    # The JS port is the reference of tests/test_stats_engine.py, which also checks the values
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+    from test_stats_engine import _js_extended_stats
+
+    print("[BENCH] dashboard stats panel, 11 sensor columns")
+    for rows in sizes:
+        labels, matrix = _bench_matrix(rows)
+        elapsed = matrix[0].tolist()
+        columns = [matrix[i].tolist() for i in range(1, len(labels))]
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for values in columns:
+                _js_extended_stats(values, elapsed)
+        port = (time.perf_counter() - t0) / repeat
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            describe(labels, matrix)
+        vectorized = (time.perf_counter() - t0) / repeat
+
+        print(f"[BENCH] {rows:>8,} rows: JS port {port * 1e3:9.2f} ms, NumPy {vectorized * 1e3:8.2f} ms "
+              f"(x{port / vectorized:.0f})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Statistics engine benchmark")
+    parser.add_argument("--rows", type=int, nargs="*", default=[300, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.repeat)
@@ -15,26 +15,37 @@ Usage:
 
 import os
 import glob
+import logging
 import shutil
 import time
-import board
-import busio
 import serial
 import subprocess
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import numpy as np
-from adafruit_bme280 import basic as adafruit_bme280
-from mpu6050 import mpu6050
 import pytz
 
+from mission_log import MissionLogWriter, binary_path, log_sidecars, sidecar_paths
+from recording_writer import RecordingWriter
+from acquisition import AcquisitionScheduler, LoopTimer, SensorTask
+from airtime import SlotClock, Uplink, beacon_of
+from command_tracker import split_sequence, with_sequence
+from bme280_driver import PROFILES as BME280_PROFILES, BME280
+from console_log import CollectorLog
+from imu_capture import ImuCapture
+from mpu6050_driver import MPU6050, open_bus
+from lora_frame import (DEFAULT_THRESHOLDS, DeltaEncoder, FrameSplitter, TelemetryCodec, column_thresholds,
+                        parse_sensor_settings, parse_thresholds)
+
+log = logging.getLogger("triton.collector")
+
 # Try to import pigpio for motor control
 try:
     import pigpio
     PIGPIO_AVAILABLE = True
 except ImportError:
-    print("[WARN] pigpio not installed. Motor control will be simulated.")
+    log.warning("pigpio not installed. Motor control will be simulated.")
     PIGPIO_AVAILABLE = False
 
 
@@ -44,9 +55,29 @@ TZ = pytz.timezone("Europe/Berlin")
 LOG_DIR = "logs"
 ARCHIVE_DIR = os.path.join(LOG_DIR, "previous_data")
 
+# Console/Log File (console_log.py: written by a background thread, never from the main loop)
+LOG_CONSOLE_LEVEL = "INFO"  # DEBUG also prints every logged row
+LOG_FILE_LEVEL = "INFO"     # logs/collector_*.log; DEBUG adds every logged row
+LOG_STATUS_INTERVAL = 1.0   # The newest row is redrawn as one console status line this often (s)
+
 # LoRa Configuration
 BAUD_RATE = 9600
 LORA_PORT = '/dev/ttyUSB0'
+LORA_TELEMETRY = "delta"    # "delta" (changed columns only), "binary" (lora_frame.py, 40 bytes) or "text" (CSV line)
+LORA_TDMA = True            # Transmit in the uplink slot of the PC's beacons (airtime.py); False: right away
+LORA_LISTEN_WINDOW = 0.6    # Without beacons: listen this long after each transmission
+
+# Sensor Acquisition (acquisition.py: fixed rates on their own thread)
+BME280_RATE_HZ = 10.0
+MPU6050_RATE_HZ = 20.0
+ACQ_STATS_INTERVAL = 10.0   # Print achieved rates, lateness and overruns this often (s)
+I2C_BUS = 1                 # /dev/i2c-1; each sensor opens its own handle
+BME280_PROFILE = "balanced"  # Oversampling/IIR (bme280_driver.PROFILES), until the PC pushes config["bme280_profile"]
+SEA_LEVEL_PRESSURE = 1013.25  # hPa for the altitude, until the PC pushes config["sea_level_pressure"]
+MPU6050_ACCEL_RANGE = 2     # g: 2, 4, 8 or 16
+MPU6050_GYRO_RANGE = 250    # °/s: 250, 500, 1000 or 2000
+IMU_CAPTURE = False         # True: MPU6050 FIFO at IMU_CAPTURE_RATE_HZ on its own thread (imu_capture.py)
+IMU_CAPTURE_RATE_HZ = 1000.0  # 200-1000; full rate goes to logs/imu_*.tlog, rows get block averages
 
 # Motor/ESC Configuration
 ESC_GPIO_PIN = 18
@@ -66,6 +97,7 @@ LABELS = [
     "Temp_MPU [°C]"
 ]
 DECIMALS = [3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+SENSOR_COLUMNS = {"bme280": slice(1, 5), "mpu6050": slice(5, 12)}  # Where each sensor's values go in a row
 
 
 # ==================== MOTOR CONTROLLER ====================
@@ -92,12 +124,12 @@ class MotorController:
                 text=True
             )
             if result.returncode == 0:
-                print("[MOTOR] pigpiod already running")
+                log.info("[MOTOR] pigpiod already running")
                 return True
         except FileNotFoundError:
             pass
 
-        print("[MOTOR] Starting pigpiod daemon...")
+        log.info("[MOTOR] Starting pigpiod daemon...")
         try:
             result = subprocess.run(
                 ["sudo", "pigpiod"],
@@ -106,33 +138,33 @@ class MotorController:
             )
             if result.returncode == 0:
                 time.sleep(1)
-                print("[MOTOR] pigpiod started successfully")
+                log.info("[MOTOR] pigpiod started successfully")
                 return True
         except Exception as e:
-            print(f"[MOTOR] Error starting pigpiod: {e}")
+            log.error("[MOTOR] Error starting pigpiod: %s", e)
             return False
         return False
 
     def connect(self):
         """Connect to pigpio daemon."""
         if not PIGPIO_AVAILABLE:
-            print("[MOTOR] Running in simulation mode (no pigpio)")
+            log.warning("[MOTOR] Running in simulation mode (no pigpio)")
             return True
 
         self.ensure_pigpiod_running()
 
         self.pi = pigpio.pi()
         if not self.pi.connected:
-            print("[MOTOR] Failed to connect to pigpio daemon")
+            log.error("[MOTOR] Failed to connect to pigpio daemon")
             return False
 
-        print(f"[MOTOR] Connected to pigpio, using GPIO {self.gpio_pin}")
+        log.info("[MOTOR] Connected to pigpio, using GPIO %s", self.gpio_pin)
         return True
 
     def _pwm_loop(self):
         """Background thread that continuously sends PWM signal."""
         interval = 1.0 / PWM_REFRESH_RATE
-        print(f"[MOTOR] PWM refresh thread started ({PWM_REFRESH_RATE}Hz)")
+        log.info("[MOTOR] PWM refresh thread started (%sHz)", PWM_REFRESH_RATE)
 
         while self.running:
             with self.lock:
@@ -142,11 +174,11 @@ class MotorController:
                 try:
                     self.pi.set_servo_pulsewidth(self.gpio_pin, pulse_width)
                 except Exception as e:
-                    print(f"[MOTOR] PWM error: {e}")
+                    log.error("[MOTOR] PWM error: %s", e)
 
             time.sleep(interval)
 
-        print("[MOTOR] PWM refresh thread stopped")
+        log.info("[MOTOR] PWM refresh thread stopped")
 
     def start_pwm_thread(self):
         """Start the continuous PWM refresh thread."""
@@ -165,8 +197,8 @@ class MotorController:
 
     def arm(self):
         """Arm the ESC by sending neutral signal."""
-        print("[MOTOR] Arming ESC...")
-        print("[MOTOR] Sending neutral signal for 3 seconds...")
+        log.info("[MOTOR] Arming ESC...")
+        log.info("[MOTOR] Sending neutral signal for 3 seconds...")
 
         with self.lock:
             self.current_pulse_width = PWM_NEUTRAL_US
@@ -175,12 +207,12 @@ class MotorController:
         time.sleep(3)
 
         self.armed = True
-        print("[MOTOR] ESC armed and ready!")
+        log.info("[MOTOR] ESC armed and ready!")
 
     def set_throttle(self, percent):
         """Set throttle as percentage (0-100)."""
         if not self.armed:
-            print("[MOTOR] Warning: ESC not armed")
+            log.warning("[MOTOR] ESC not armed")
             return False
 
         percent = max(0, min(percent, MAX_THROTTLE_PERCENT))
@@ -190,12 +222,12 @@ class MotorController:
             self.current_pulse_width = pulse_width
             self.target_throttle = percent
 
-        print(f"[MOTOR] Throttle set: {percent}% -> {pulse_width}us")
+        log.info("[MOTOR] Throttle set: %s%% -> %sus", percent, pulse_width)
         return True
 
     def stop(self):
         """Stop the motor (set to neutral)."""
-        print("[MOTOR] Stopping motor...")
+        log.info("[MOTOR] Stopping motor...")
         with self.lock:
             self.current_pulse_width = PWM_NEUTRAL_US
             self.target_throttle = 0
@@ -203,7 +235,7 @@ class MotorController:
 
     def emergency_stop(self):
         """Emergency stop - immediately set to neutral."""
-        print("[MOTOR] !!! EMERGENCY STOP !!!")
+        log.warning("[MOTOR] !!! EMERGENCY STOP !!!")
         with self.lock:
             self.current_pulse_width = PWM_NEUTRAL_US
             self.target_throttle = 0
@@ -221,7 +253,7 @@ class MotorController:
 
     def cleanup(self):
         """Clean up GPIO and stop motor."""
-        print("[MOTOR] Cleaning up...")
+        log.info("[MOTOR] Cleaning up...")
 
         with self.lock:
             self.current_pulse_width = PWM_NEUTRAL_US
@@ -233,7 +265,7 @@ class MotorController:
             self.pi.set_servo_pulsewidth(self.gpio_pin, 0)
             self.pi.stop()
 
-        print("[MOTOR] Cleanup complete")
+        log.info("[MOTOR] Cleanup complete")
 
 
 # ==================== COMMAND PARSER ====================
@@ -266,13 +298,87 @@ def parse_motor_command(line):
     return command_type, value
 
 
+def apply_thresholds_command(line, thresholds, encoder, bme=None):
+    """
+    Apply CMD:THRESHOLDS:<key>=<value>,... (transmission_thresholds pushed
+    by the dashboard) to `thresholds` and the delta encoder, and the sensor
+    settings that come with them (sea_level_pressure, bme280_profile) to
+    the BME280.
+
+    Returns the ACK line.
+    """
+    parts = line.strip().split(":", 2)
+    updates = parse_thresholds(parts[2]) if len(parts) == 3 else {}
+    thresholds.update(updates)
+    encoder.set_thresholds(column_thresholds(thresholds))
+    log.info("[LORA] Transmission thresholds: %s", thresholds)
+
+    settings = parse_sensor_settings(parts[2]) if len(parts) == 3 else {}
+    if bme is not None and settings:
+        if "sea_level_pressure" in settings:
+            bme.sea_level_pressure = settings["sea_level_pressure"]
+        if settings.get("bme280_profile") in BME280_PROFILES:
+            bme.set_profile(settings["bme280_profile"])
+        log.info("[SENSOR] BME280 settings: %s", settings)
+    return f"ACK:THRESHOLDS:{len(updates)}:{'OK' if updates else 'FAIL'}"
+
+
+def execute_command(line, motor, thresholds, encoder, bme=None):
+    """
+    Execute one command line from the PC (CMD:<type>:<value>[:<seq>]).
+
+    Returns the ACK line, echoing the sequence number, or "" if the line
+    isn't a command.
+    """
+    line, seq = split_sequence(line)
+    cmd_type, value = parse_motor_command(line)
+    if cmd_type is None:
+        return ""
+
+    if cmd_type == "THRESHOLDS":
+        response = apply_thresholds_command(line, thresholds, encoder, bme)
+    elif cmd_type in ("THROTTLE", "STOP", "ESTOP"):
+        if cmd_type == "THROTTLE":
+            success = motor.set_throttle(value)
+        elif cmd_type == "STOP":
+            success = motor.stop()
+        else:
+            success = motor.emergency_stop()
+        status = motor.get_status()
+        log.info("[MOTOR] Throttle: %s%% | PWM: %sus", status["throttle"], status["pulse_width"])
+        response = f"ACK:{cmd_type}:{status['throttle']}:{'OK' if success else 'FAIL'}"
+    else:
+        log.warning("Unknown command: %s", cmd_type)
+        response = f"ACK:{cmd_type}:0:UNKNOWN"
+
+    return with_sequence(response, seq) if seq is not None else response
+
+
+# ==================== SENSORS ====================
+
+def read_bme280(bme):
+    """Temperature, humidity, pressure, altitude (SENSOR_COLUMNS["bme280"]), all from one conversion."""
+    return [round(value, decimals) for value, decimals in zip(bme.read(), DECIMALS[1:5])]
+
+
+def read_mpu6050(mpu, capture=None):
+    """
+    Acceleration, rotation, chip temperature (SENSOR_COLUMNS["mpu6050"]): one
+    I2C transaction, or in capture mode the average of the FIFO samples since
+    the previous row.
+    """
+    values = capture.mean_since_last() if capture else mpu.read()
+    return [round(value, decimals) for value, decimals in zip(values, DECIMALS[5:12])]
+
+
+def format_row(now_str, data):
+    """Console line of one row (the status line, formatted by the console thread)."""
+    return f"{now_str:<22}" + ", ".join(f"{str(x):>8}" for x in data)
+
+
 # ==================== MAIN ====================
 
 def main():
-    print("=" * 60)
-    print("TRITON - Sensor Collection & Motor Control")
-    print("=" * 60)
-
     # ───── PREPARE DIRECTORIES ─────
     os.makedirs(ARCHIVE_DIR, exist_ok=True)
     os.makedirs(LOG_DIR, exist_ok=True)
@@ -280,40 +386,61 @@ def main():
     # Archive old logs
     for path in glob.glob(os.path.join(LOG_DIR, "sensor_data_*.csv")):
         shutil.move(path, ARCHIVE_DIR)
+        for sidecar in sidecar_paths(path):
+            if os.path.isfile(sidecar):
+                shutil.move(sidecar, ARCHIVE_DIR)
+    for path in glob.glob(os.path.join(LOG_DIR, "imu_*.tlog")):
+        for name in (path, *log_sidecars(path)):
+            if os.path.isfile(name):
+                shutil.move(name, ARCHIVE_DIR)
+    for path in glob.glob(os.path.join(LOG_DIR, "collector_*.log")):
+        shutil.move(path, ARCHIVE_DIR)
 
     # Create new log file
     timestamp = datetime.now(TZ).strftime("%Y%m%d_%H%M%S")
     logfile = os.path.join(LOG_DIR, f"sensor_data_{timestamp}.csv")
 
-    # Write CSV header
-    with open(logfile, "w") as f:
-        f.write("Timestamp (MET)," + ",".join(LABELS) + "\n")
+    # Console and collector log go through a queue to a background thread
+    collector_log = CollectorLog(os.path.join(LOG_DIR, f"collector_{timestamp}.log"), console_level=LOG_CONSOLE_LEVEL,
+                                 file_level=LOG_FILE_LEVEL, status_interval=LOG_STATUS_INTERVAL)
+    collector_log.start()
 
-    print(f"[INFO] Logging to: {logfile}")
+    log.info("=" * 60)
+    log.info("TRITON - Sensor Collection & Motor Control")
+    log.info("=" * 60)
 
-    # ───── INIT SENSORS ─────
-    i2c = busio.I2C(board.SCL, board.SDA)
+    # Write CSV header; rows are written in batches by a background thread,
+    # together with a binary copy of the log (mission_log.py)
+    log_header = ["Timestamp (MET)"] + LABELS
+    log_binary = MissionLogWriter(binary_path(logfile), log_header, time_label="Timestamp (MET)",
+                                  start_time=datetime.now(TZ).replace(tzinfo=None))
+    log_writer = RecordingWriter(logfile, header=log_header, lineterminator="\n", mirror=log_binary)
+
+    log.info("Logging to: %s", logfile)
 
+    # ───── INIT SENSORS ─────
     try:
-        bme = adafruit_bme280.Adafruit_BME280_I2C(i2c, address=0x76)
-        print("[SENSOR] BME280 detected")
+        # Pipelined: the next conversion runs between deadlines instead of holding up the IMU reads
+        bme = BME280(open_bus(I2C_BUS), address=0x76, profile=BME280_PROFILE, sea_level_pressure=SEA_LEVEL_PRESSURE,
+                     pipelined=True)
+        log.info("[SENSOR] BME280 detected (profile %s)", bme.profile)
     except Exception as e:
-        print(f"[SENSOR] BME280 init failed: {e}")
+        log.error("[SENSOR] BME280 init failed: %s", e)
         bme = None
 
     try:
-        mpu = mpu6050(0x68)
-        print("[SENSOR] MPU6050 detected")
+        mpu = MPU6050(open_bus(I2C_BUS), accel_range=MPU6050_ACCEL_RANGE, gyro_range=MPU6050_GYRO_RANGE)
+        log.info("[SENSOR] MPU6050 detected")
     except Exception as e:
-        print(f"[SENSOR] MPU6050 init failed: {e}")
+        log.error("[SENSOR] MPU6050 init failed: %s", e)
         mpu = None
 
     # ───── INIT LORA SERIAL ─────
     try:
-        lora_serial = serial.Serial(LORA_PORT, BAUD_RATE, timeout=0.1)
-        print(f"[LORA] Connected to {LORA_PORT} at {BAUD_RATE} baud")
+        lora_serial = serial.Serial(LORA_PORT, BAUD_RATE, timeout=0.01)
+        log.info("[LORA] Connected to %s at %s baud", LORA_PORT, BAUD_RATE)
     except Exception as e:
-        print(f"[LORA] Module not connected: {e}")
+        log.warning("[LORA] Module not connected: %s", e)
         lora_serial = None
 
     # ───── INIT MOTOR CONTROLLER ─────
@@ -322,183 +449,188 @@ def main():
 
     if motor_enabled:
         motor.arm()
-        print("[MOTOR] Motor control enabled")
+        log.info("[MOTOR] Motor control enabled")
     else:
-        print("[MOTOR] Motor control disabled (simulation mode)")
+        log.warning("[MOTOR] Motor control disabled (simulation mode)")
 
     # ───── INIT DATA CONTAINERS ─────
     data = [0] * len(LABELS)
+    telemetry_codec = TelemetryCodec(DECIMALS)
+    telemetry_seq = 0
+    transmission_thresholds = dict(DEFAULT_THRESHOLDS)
+    delta_encoder = DeltaEncoder(telemetry_codec, column_thresholds(transmission_thresholds))
+    # Lines (commands) and frames (beacons) share the port; while beacons arrive,
+    # everything we send waits in `uplink` for our slot
+    lora_splitter = FrameSplitter()
+    slot_clock = SlotClock()
+    uplink = Uplink(delta_encoder)
     last_data = [None] * len(LABELS)
     min_data = [float('inf')] * len(LABELS)
     max_data = [float('-inf')] * len(LABELS)
 
+    def send_lora(messages):
+        """Write wire messages; returns whether anything was sent."""
+        try:
+            for message in messages:
+                lora_serial.write(message)
+                if message.startswith(b"ACK:"):
+                    log.info("[LORA-TX] %s", message.decode(errors="ignore").strip())
+            lora_serial.flush()
+        except Exception as e:
+            log.error("[LORA-TX] Send failed: %s", e)
+        return bool(messages)
+
+    def service_lora(until):
+        """
+        Until `until` (perf_counter): execute incoming commands, follow the
+        beacons and send queued messages inside our uplink slot.
+        """
+        while True:
+            now_perf = time.perf_counter()
+            if lora_serial is None:
+                time.sleep(max(0.0, until - now_perf))
+                return
+            window = slot_clock.uplink_window(now_perf)
+            if window is not None:
+                send_lora(uplink.drain(now_perf, window))
+            if now_perf >= until:
+                return
+
+            try:
+                # Returns as soon as bytes are there, else after the port timeout (10 ms)
+                received = lora_serial.read(max(1, lora_serial.in_waiting))
+            except Exception as e:
+                log.error("[LORA-RX] Receive failed: %s", e)
+                time.sleep(max(0.0, until - time.perf_counter()))
+                return
+            for kind, message in lora_splitter.feed(received):
+                if kind == "frame":
+                    plan = beacon_of(message) if LORA_TDMA else None
+                    if plan is not None:
+                        slot_clock.on_beacon(plan, time.perf_counter())
+                    continue
+                line = message.strip()
+                if not line:
+                    continue
+                log.info("[LORA-RX] %s", line)
+                response = execute_command(line, motor, transmission_thresholds, delta_encoder, bme)
+                if not response:
+                    continue
+                if slot_clock.synced(time.perf_counter()):
+                    uplink.add_reply((response + "\n").encode())
+                else:
+                    send_lora([(response + "\n").encode()])
+
+    # ───── INIT ACQUISITION ─────
+    # Sensors are sampled at fixed rates on their own thread; the loop below
+    # turns the queued samples into rows for the log and the radio
+    tasks = []
+    if bme:
+        tasks.append(SensorTask("bme280", BME280_RATE_HZ, lambda: read_bme280(bme)))
+    imu_capture = None
+    if mpu and IMU_CAPTURE:
+        imu_capture = ImuCapture(mpu, IMU_CAPTURE_RATE_HZ, log_path=os.path.join(LOG_DIR, f"imu_{timestamp}.tlog"))
+    if mpu:
+        tasks.append(SensorTask("mpu6050", MPU6050_RATE_HZ, lambda: read_mpu6050(mpu, imu_capture)))
+    acquisition = AcquisitionScheduler(tasks)
+    loop_timer = LoopTimer()
+    if not tasks:
+        log.warning("[SENSOR] No sensors - nothing will be logged")
+
     # ───── MAIN LOOP ─────
     start_time = time.perf_counter()
+    start_wall = datetime.now(TZ)
     last_log_time = start_time
+    last_stats_time = start_time
+    if imu_capture:
+        imu_capture.start(epoch=start_time, start_time=start_wall.replace(tzinfo=None))
+        log.info("[IMU] Capturing at %g Hz to %s", imu_capture.rate_hz, imu_capture.log.path)
+    acquisition.start()
 
-    print("\n" + "=" * 60)
-    print("[READY] Sensor logging and motor control active")
-    print("Press Ctrl+C to exit")
-    print("=" * 60 + "\n")
+    log.info("=" * 60)
+    log.info("[READY] Sensor logging and motor control active")
+    log.info("Press Ctrl+C to exit")
+    log.info("=" * 60)
 
     try:
         while True:
-            now = datetime.now(TZ)
-            now_str = now.strftime("%Y-%m-%d %H:%M:%S")
-            elapsed = time.perf_counter() - start_time
-            data[0] = round(elapsed, DECIMALS[0])
-
+            loop_timer.start()
             # ─────────────────────────────────────────
-            # CHECK FOR INCOMING MOTOR COMMANDS
+            # ROWS FROM THE SAMPLES TAKEN SINCE THE LAST PASS
             # ─────────────────────────────────────────
-            if lora_serial and lora_serial.in_waiting:
-                try:
-                    line = lora_serial.readline().decode(errors='ignore').strip()
-                    if line:
-                        print(f"[LORA-RX] {line}")
-
-                        cmd_type, value = parse_motor_command(line)
-
-                        if cmd_type is not None:
-                            success = False
-                            response = ""
-
-                            if cmd_type == "THROTTLE":
-                                success = motor.set_throttle(value)
-                                actual = motor.get_status()["throttle"]
-                                response = f"ACK:THROTTLE:{actual}:{'OK' if success else 'FAIL'}"
-
-                            elif cmd_type == "STOP":
-                                success = motor.stop()
-                                actual = motor.get_status()["throttle"]
-                                response = f"ACK:STOP:{actual}:{'OK' if success else 'FAIL'}"
-
-                            elif cmd_type == "ESTOP":
-                                success = motor.emergency_stop()
-                                actual = motor.get_status()["throttle"]
-                                response = f"ACK:ESTOP:{actual}:{'OK' if success else 'FAIL'}"
-
-                            else:
-                                print(f"[WARN] Unknown command: {cmd_type}")
-                                response = f"ACK:{cmd_type}:0:UNKNOWN"
-
-                            # Send acknowledgment
-                            if response:
-                                lora_serial.write((response + "\n").encode())
-                                lora_serial.flush()
-                                print(f"[LORA-TX] {response}")
-
-                            # Print motor status
-                            status = motor.get_status()
-                            print(f"[MOTOR] Throttle: {status['throttle']}% | PWM: {status['pulse_width']}us")
-
-                except Exception as e:
-                    print(f"[LORA-RX] Error: {e}")
-
-            # ─────────────────────────────────────────
-            # READ SENSORS
-            # ─────────────────────────────────────────
-            if bme:
-                try:
-                    data[1] = round(bme.temperature, DECIMALS[1])
-                    data[2] = round(bme.humidity, DECIMALS[2])
-                    data[3] = round(bme.pressure, DECIMALS[3])
-                    data[4] = round(bme.altitude, DECIMALS[4])
-                except:
-                    data[1:5] = ["Error"] * 4
-
-            if mpu:
-                try:
-                    acc = mpu.get_accel_data()
-                    gyro = mpu.get_gyro_data()
-                    data[5] = round(acc["x"], DECIMALS[5])
-                    data[6] = round(acc["y"], DECIMALS[6])
-                    data[7] = round(acc["z"], DECIMALS[7])
-                    data[8] = round(gyro["x"], DECIMALS[8])
-                    data[9] = round(gyro["y"], DECIMALS[9])
-                    data[10] = round(gyro["z"], DECIMALS[10])
-                    data[11] = round(mpu.get_temp(), DECIMALS[11])
-                except:
-                    data[5:12] = ["Error"] * 7
-
-            # ─────────────────────────────────────────
-            # LOG DATA (on change or every 1 second)
-            # ─────────────────────────────────────────
-            now_perf = time.perf_counter()
-            changed = any(data[i] != last_data[i] for i in range(len(data)))
-
-            if changed or (now_perf - last_log_time) >= 1.0:
-                last_data = list(data)
-                last_log_time = now_perf
-
-                # Update min/max
-                for i in range(1, len(data)):
-                    try:
-                        val = float(data[i])
-                        min_data[i] = min(min_data[i], val)
-                        max_data[i] = max(max_data[i], val)
-                    except:
-                        continue
-
-                # Print to console
-                line = f"{now_str:<22}" + ", ".join(f"{str(x):>8}" for x in data)
-                print(line)
-
-                # Write to file
-                with open(logfile, "a") as f:
-                    f.write(now_str + "," + ",".join(str(x) for x in data) + "\n")
-
-                # Send sensor data over LoRa
-                if lora_serial:
-                    try:
-                        lora_line = now_str + "," + ",".join(str(x) for x in data) + "\n"
-                        lora_serial.write(lora_line.encode())
-                        lora_serial.flush()
-
-                        # IMPORTANT: Wait for transmission to complete, then listen for commands
-                        # LoRa is half-duplex - can't receive while transmitting
-                        time.sleep(0.1)  # Allow module to switch to receive mode
-
-                        # Check for incoming commands after transmission
-                        for _ in range(10):  # Check multiple times over 500ms
-                            if lora_serial.in_waiting:
-                                try:
-                                    cmd_line = lora_serial.readline().decode(errors='ignore').strip()
-                                    if cmd_line:
-                                        print(f"[LORA-RX] {cmd_line}")
-                                        cmd_type, value = parse_motor_command(cmd_line)
-                                        if cmd_type is not None:
-                                            success = False
-                                            response = ""
-                                            if cmd_type == "THROTTLE":
-                                                success = motor.set_throttle(value)
-                                                actual = motor.get_status()["throttle"]
-                                                response = f"ACK:THROTTLE:{actual}:{'OK' if success else 'FAIL'}"
-                                            elif cmd_type == "STOP":
-                                                success = motor.stop()
-                                                actual = motor.get_status()["throttle"]
-                                                response = f"ACK:STOP:{actual}:{'OK' if success else 'FAIL'}"
-                                            elif cmd_type == "ESTOP":
-                                                success = motor.emergency_stop()
-                                                actual = motor.get_status()["throttle"]
-                                                response = f"ACK:ESTOP:{actual}:{'OK' if success else 'FAIL'}"
-                                            if response:
-                                                lora_serial.write((response + "\n").encode())
-                                                lora_serial.flush()
-                                                print(f"[LORA-TX] {response}")
-                                except Exception as e:
-                                    print(f"[LORA-RX] Error: {e}")
-                            time.sleep(0.05)
-
-                    except Exception as e:
-                        print(f"[LORA-TX] Send failed: {e}")
-
-            time.sleep(0.05)  # 50ms loop for responsive motor control
+            for sample in acquisition.drain():
+                columns = SENSOR_COLUMNS[sample.task]
+                if sample.values is None:
+                    data[columns] = ["Error"] * (columns.stop - columns.start)
+                else:
+                    data[columns] = sample.values
+                data[0] = round(sample.actual - start_time, DECIMALS[0])
+                now = start_wall + timedelta(seconds=sample.actual - start_time)
+                now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+
+                # ─────────────────────────────────────────
+                # LOG DATA (on change or every 1 second)
+                # ─────────────────────────────────────────
+                changed = any(data[i] != last_data[i] for i in range(len(data)))
+
+                if changed or (sample.actual - last_log_time) >= 1.0:
+                    last_data = list(data)
+                    last_log_time = sample.actual
+
+                    # Update min/max
+                    for i in range(1, len(data)):
+                        try:
+                            val = float(data[i])
+                            min_data[i] = min(min_data[i], val)
+                            max_data[i] = max(max_data[i], val)
+                        except:
+                            continue
+
+                    # Console status line: only a reference swap here, drawn at most every LOG_STATUS_INTERVAL
+                    collector_log.set_status(format_row, now_str, last_data)
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("%s", format_row(now_str, last_data))
+
+                    # Queue for the log file (written by the writer thread)
+                    log_writer.write([now_str] + data)
+
+                    # Queue for LoRa
+                    if lora_serial:
+                        if LORA_TELEMETRY == "delta":
+                            # Encoded when sent; nothing goes out while no column moved past its threshold
+                            uplink.add_sample(data, now)
+                        elif LORA_TELEMETRY == "binary":
+                            uplink.add_frame(telemetry_codec.encode(telemetry_seq, data, now))
+                            telemetry_seq = (telemetry_seq + 1) & 0xFFFF
+                        else:
+                            uplink.add_frame((now_str + "," + ",".join(str(x) for x in data) + "\n").encode())
+
+            if time.perf_counter() - last_stats_time >= ACQ_STATS_INTERVAL:
+                last_stats_time = time.perf_counter()
+                log.info("[ACQ] %s | %s | log dropped %d", acquisition.status_line(), loop_timer.status_line(),
+                         collector_log.dropped)
+                if imu_capture:
+                    log.info("[IMU] %s", imu_capture.status_line())
+            loop_timer.stop()
+
+            # Without beacons, send right away and listen for commands afterwards
+            # (LoRa is half-duplex - can't receive while transmitting); sampling goes on meanwhile
+            if lora_serial and not slot_clock.synced(time.perf_counter()) and send_lora(uplink.drain_all()):
+                service_lora(time.perf_counter() + LORA_LISTEN_WINDOW)
+
+            service_lora(time.perf_counter() + 0.05)  # 50ms loop for responsive motor control
 
     except KeyboardInterrupt:
-        print("\n[INFO] Shutting down...")
+        log.info("Shutting down...")
 
     finally:
+        acquisition.stop()
+        log.info("[ACQ] %s | %s | log dropped %d", acquisition.status_line(), loop_timer.status_line(),
+                 collector_log.dropped)
+        if imu_capture:
+            imu_capture.stop()
+            log.info("[IMU] %s", imu_capture.status_line())
+
         # Cleanup motor
         if motor_enabled:
             motor.cleanup()
@@ -507,7 +639,8 @@ def main():
         if lora_serial:
             lora_serial.close()
 
-        # Write min/max to log
+        # Flush queued rows, then write min/max to log
+        log_writer.close()
         with open(logfile, "a") as f:
             f.write("\nMIN," + ",".join(
                 str(round(x, d)) if isinstance(x, float) and x != float('inf') else ""
@@ -517,9 +650,12 @@ def main():
                 str(round(x, d)) if isinstance(x, float) and x != float('-inf') else ""
                 for x, d in zip(max_data, DECIMALS)
             ) + "\n")
+        # The summary lines are CSV-only; keep the binary log counted as up to date
+        os.utime(binary_path(logfile))
 
-        print("[INFO] Min/Max values written to log")
-        print("[INFO] Goodbye!")
+        log.info("Min/Max values written to log")
+        log.info("Goodbye!")
+        collector_log.close()
 
 
 if __name__ == "__main__":
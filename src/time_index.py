@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+TRITON Time Index - Binary-search time-range queries
+
+Shared by the history store (exports, /data ranges) and the mission loader.
+Elapsed [s] only grows during normal operation, so "rows with start <= t <=
+end" is two np.searchsorted calls and the result is a slice (a view, not a
+copy). When the Pi restarts mid-mission the time column drops back to zero;
+the column is then treated as a list of monotonic runs, each searched on its
+own:
+
+- a break is any position i where not values[i] >= values[i - 1]
+  (a decrease, or a NaN on either side)
+- runs starting with NaN are skipped
+- one matching piece comes back as a slice, several as an index array
+
+Usage (benchmark):
+    # Mask scan vs. searchsorted, monotonic and with restarts
+    python3 time_index.py [--rows 1000000] [--restarts 3]
+"""
+
+import bisect
+from collections import deque
+
+import numpy as np
+
+
+def find_breaks(values):
+    """Start positions (> 0) of the monotonic runs of `values`, vectorized."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(~(values[1:] >= values[:-1])) + 1
+
+
+def runs(length, breaks, lo=0):
+    """(start, stop) of every run in [lo, lo + length) given absolute break positions."""
+    edges = [lo] + [int(b) for b in breaks if lo < b < lo + length] + [lo + length]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _search(run, value, side):
+    """searchsorted without copying strided columns (e.g. a memmap of rows)."""
+    if isinstance(run, np.ndarray) and run.flags.c_contiguous:
+        return int(np.searchsorted(run, value, side=side))
+    search = bisect.bisect_left if side == "left" else bisect.bisect_right
+    return search(run, value)
+
+
+def find_range(values, start=None, end=None, breaks=None):
+    """
+    Rows with `start <= values <= end` (either bound may be None).
+
+    `breaks` are the run starts from find_breaks() / TimeIndex; they are
+    computed here (O(n)) if not given. Returns a slice when the matching rows
+    are contiguous, otherwise an int64 index array in row order.
+    """
+    n = len(values)
+    if breaks is None:
+        breaks = find_breaks(values)
+
+    pieces = []
+    for a, b in runs(n, breaks):
+        if a == b or values[a] != values[a]:
+            continue
+        run = values[a:b]
+        lo = a if start is None else a + _search(run, start, "left")
+        hi = b if end is None else a + _search(run, end, "right")
+        if hi > lo:
+            if pieces and pieces[-1][1] == lo:
+                pieces[-1] = (pieces[-1][0], hi)
+            else:
+                pieces.append((lo, hi))
+
+    if not pieces:
+        return slice(0, 0)
+    if len(pieces) == 1:
+        return slice(*pieces[0])
+    return np.concatenate([np.arange(lo, hi) for lo, hi in pieces])
+
+
+def range_length(rows):
+    """Number of rows selected by a find_range() result."""
+    return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+
+class TimeIndex:
+    """Run breaks of a time column that grows one value at a time."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._breaks = deque()
+        self._last = np.nan
+        self._count = 0
+
+    def append(self, value):
+        if self._count and not value >= self._last:
+            self._breaks.append(self._count)
+        self._last = value
+        self._count += 1
+
+    def forget(self, first):
+        """Drop breaks before absolute position `first` (rows no longer kept)."""
+        while self._breaks and self._breaks[0] <= first:
+            self._breaks.popleft()
+
+    def breaks(self, lo=0, hi=None):
+        """Absolute break positions in [lo, hi)."""
+        breaks = list(self._breaks)
+        hi = self._count if hi is None else hi
+        return breaks[bisect.bisect_right(breaks, lo):bisect.bisect_left(breaks, hi)]
+
+    @property
+    def monotonic(self):
+        return not self._breaks
+
+
+# ==================== Benchmark ====================
+
+def _mask_scan(values, start, end):
+    """The old filter: boolean mask over every row, then copy."""
+    mask = ~np.isnan(values)
+    mask &= values >= start
+    mask &= values <= end
+    return np.flatnonzero(mask)
+
+
+def benchmark(rows=1_000_000, restarts=3, repeat=50):
+    import time
+
+    rate = 20.0
+    values = np.arange(rows) / rate
+    for cut in np.linspace(0, rows, restarts + 2)[1:-1].astype(int):
+        values[cut:] -= values[cut]
+    matrix = np.vstack([values] + [np.random.default_rng(0).normal(size=rows)] * 11)
+    span = float(np.nanmax(values))
+    start, end = span * 0.4, span * 0.45
+
+    for label, breaks in (("precomputed breaks", find_breaks(values)), ("breaks computed per call", None)):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            picked = matrix[:, _mask_scan(values, start, end)]
+        mask = (time.perf_counter() - t0) / repeat
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            picked = matrix[:, find_range(values, start, end, breaks)]
+        ranged = (time.perf_counter() - t0) / repeat
+        print(f"[BENCH] {rows:,} rows, {restarts} restarts, {label}: mask {mask * 1e3:.2f} ms, "
+              f"searchsorted {ranged * 1e3:.3f} ms ({picked.shape[1]:,} rows)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time-range query benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--restarts", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.restarts)
+    benchmark(args.rows, 0)
@@ -0,0 +1,57 @@
+"""Regression tests for link_metrics.LinkMetrics sequence tracking."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from link_metrics import LinkMetrics  # noqa: E402
+from lora_frame import DeltaEncoder, TelemetryCodec, TYPE_TELEMETRY, unpack_frame  # noqa: E402
+
+
+def _elapsed(codec, frame):
+    """What app.keyframe_elapsed() passes: Elapsed of full telemetry frames, None for deltas."""
+    frame_type, _, payload = unpack_frame(frame[1:-1])
+    if frame_type != TYPE_TELEMETRY:
+        return None
+    return codec.unscale(codec.unpack(payload)[1])[0]
+
+
+def test_duplicates_are_rejected():
+    metrics = LinkMetrics()
+    for seq in range(40):
+        assert metrics.sequence(seq, elapsed=seq * 0.1)
+    assert not metrics.sequence(39, elapsed=39 * 0.1)    # The same keyframe twice
+    assert not metrics.sequence(38)                  # A delta frame twice
+    assert metrics.totals["telemetry_duplicates"] == 2
+
+
+def test_restart_mid_window_is_not_a_duplicate():
+    metrics = LinkMetrics()
+    for seq in range(40):
+        assert metrics.sequence(seq, elapsed=100.0 + seq * 0.1)
+    # The Pi restarts: seq and Elapsed start over, the keyframe comes first
+    assert metrics.sequence(0, elapsed=0.2)
+    assert all(metrics.sequence(seq) for seq in range(1, 10))
+    assert metrics.totals["telemetry_duplicates"] == 0
+    assert metrics.seq_resets == 1
+    assert not metrics.sequence(9)                   # Duplicates are caught again afterwards
+
+
+def test_restart_with_delta_encoder():
+    codec = TelemetryCodec()
+    metrics = LinkMetrics()
+
+    def accepted(encoder, start, count):
+        ok = 0
+        for i in range(count):
+            elapsed = start + i * 0.1
+            frame = encoder.encode([elapsed] + [20.0 + i] * 11)
+            if frame is not None:
+                _, seq, _ = unpack_frame(frame[1:-1])
+                ok += metrics.sequence(seq, _elapsed(codec, frame))
+        return ok
+
+    assert accepted(DeltaEncoder(codec), 50.0, 40) == 40
+    # A restarted Pi has a new encoder: seq 0 again, starting with a keyframe
+    assert accepted(DeltaEncoder(codec), 0.0, 10) == 10
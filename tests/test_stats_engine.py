@@ -0,0 +1,140 @@
+"""stats_engine.describe() against the dashboard's computeExtendedStats(), and window bounds."""
+
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stats_engine import describe, window_statistics  # noqa: E402
+
+LABELS = ["Elapsed [s]", "Temp_BME280 [°C]", "Hum [%]", "Acc x [m/s²]"]
+FIELDS = ("min", "max", "mean", "std", "median", "p25", "p75", "p95", "rate")
+
+
+def _js_extended_stats(values, elapsed):
+    """Line-by-line port of dashboard.html computeExtendedStats() (unformatted)."""
+    def percentile(ordered, p):
+        if len(ordered) == 1:
+            return ordered[0]
+        index = p * (len(ordered) - 1)
+        lower, upper = math.floor(index), math.ceil(index)
+        weight = index - lower
+        if upper >= len(ordered):
+            return ordered[-1]
+        if lower == upper:
+            return ordered[lower]
+        return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+    def slope(xs, ys):
+        n = len(xs)
+        if n < 2:
+            return 0
+        sum_x = sum_y = sum_xy = sum_x2 = 0
+        for x, y in zip(xs, ys):
+            sum_x += x
+            sum_y += y
+            sum_xy += x * y
+            sum_x2 += x * x
+        denominator = n * sum_x2 - sum_x * sum_x
+        return 0 if denominator == 0 else (n * sum_xy - sum_x * sum_y) / denominator
+
+    n = len(values)
+    avg = sum(values) / n
+    ordered = sorted(values)
+    rate = 0
+    if len(elapsed) >= 2:
+        size = min(5, n)
+        rate = slope(elapsed[-size:], values[-size:])
+    return {"min": min(values), "max": max(values), "mean": avg,
+            "std": math.sqrt(sum((v - avg) ** 2 for v in values) / n),
+            "median": percentile(ordered, 0.5), "p25": percentile(ordered, 0.25),
+            "p75": percentile(ordered, 0.75), "p95": percentile(ordered, 0.95), "rate": rate}
+
+
+def _matrix(elapsed, seed=0):
+    rng = np.random.default_rng(seed)
+    elapsed = np.asarray(elapsed, dtype=np.float64)
+    matrix = rng.normal(size=(len(LABELS), len(elapsed))) * 10 + 20
+    matrix[0] = elapsed
+    matrix[1] += np.linspace(0, 5, len(elapsed))     # A trend, so rates are not ~0
+    return matrix
+
+
+def _assert_matches_js(matrix):
+    """describe() equals the JS over each column's finite rows (the dashboard drops the gaps)."""
+    ours = describe(LABELS, matrix)
+    for i, label in enumerate(LABELS):
+        keep = np.isfinite(matrix[i]) & np.isfinite(matrix[0])
+        expected = _js_extended_stats(matrix[i][keep].tolist(), matrix[0][keep].tolist())
+        scale = max(1.0, abs(ours[label]["std"]))
+        for field in FIELDS:
+            assert math.isclose(ours[label][field], expected[field], rel_tol=1e-9, abs_tol=1e-9 * scale), \
+                (label, field, ours[label][field], expected[field])
+        assert ours[label]["count"] == np.isfinite(matrix[i]).sum()
+
+
+def test_matches_js():
+    _assert_matches_js(_matrix(np.arange(300) / 20.0 + 1000.0))
+
+
+def test_one_row():
+    matrix = _matrix([12.5])
+    _assert_matches_js(matrix)
+    stats = describe(LABELS, matrix)["Hum [%]"]
+    assert stats["std"] == 0.0 and stats["rate"] == 0.0
+    assert stats["min"] == stats["max"] == stats["median"] == stats["p95"] == matrix[2, 0]
+
+
+def test_nan_gaps():
+    matrix = _matrix(np.arange(200) / 20.0)
+    matrix[1, [3, 50, 51, 52, 120]] = np.nan
+    matrix[3, ::7] = np.nan
+    matrix[3, -5:] = 0.0                            # No gap in the rate rows (next test)
+    _assert_matches_js(matrix)
+
+
+def test_nan_gap_in_rate_window():
+    # The rate is over the last 5 rows: a gap there leaves fewer points, it doesn't reach further back
+    matrix = _matrix(np.arange(50) / 20.0)
+    matrix[2, -2] = np.nan
+    rows = [-5, -4, -3, -1]
+    expected = _js_extended_stats(matrix[2, rows].tolist(), matrix[0, rows].tolist())["rate"]
+    assert math.isclose(describe(LABELS, matrix)["Hum [%]"]["rate"], expected, rel_tol=1e-9, abs_tol=1e-12)
+
+
+def test_elapsed_reset():
+    # A Pi restart: Elapsed starts over, once well before and once inside the last 5 rows
+    _assert_matches_js(_matrix(np.concatenate([np.arange(100), np.arange(60)]) / 20.0))
+    _assert_matches_js(_matrix(np.concatenate([np.arange(100), np.arange(3)]) / 20.0))
+
+
+def test_all_nan_columns():
+    matrix = _matrix(np.arange(40) / 20.0)
+    matrix[2] = np.nan
+    stats = describe(LABELS, matrix)
+    assert "Hum [%]" not in stats                   # The dashboard shows "-" for it
+    assert set(stats) == {"Elapsed [s]", "Temp_BME280 [°C]", "Acc x [m/s²]"}
+
+    # Without any time the rates are 0, like the JS with an empty elapsed list
+    matrix[0] = np.nan
+    stats = describe(LABELS, matrix)
+    assert "Elapsed [s]" not in stats
+    assert all(entry["rate"] == 0.0 and entry["slope"] == 0.0 for entry in stats.values())
+    assert _js_extended_stats(matrix[1].tolist(), [])["rate"] == 0
+
+
+def test_windows_are_half_open():
+    elapsed = np.array([0.0, 0.5, 1.0, 1.5, 1.999, 2.0, 3.0])
+    windows = window_statistics(LABELS, _matrix(elapsed), 1.0)
+    assert [(w["start"], w["end"], w["rows"]) for w in windows] == [
+        (0.0, 1.0, 2), (1.0, 2.0, 3), (2.0, 3.0, 1), (3.0, 4.0, 1)]
+    for window in windows:
+        times = window["statistics"]["Elapsed [s]"]
+        assert window["start"] <= times["min"] and times["max"] < window["end"]
+
+    # Same with an explicit origin: 1.5 opens a window, 2.5 would open the next
+    windows = window_statistics(LABELS, _matrix(elapsed), 1.0, origin=0.5)
+    assert [(w["start"], w["rows"]) for w in windows] == [(-0.5, 1), (0.5, 2), (1.5, 3), (2.5, 1)]